@@ -1,560 +1,920 @@
-import requests
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from pg_recommender import recommend_pg
-from datetime import datetime, timezone
-from uuid import UUID
-import os
-from dotenv import load_dotenv
-
-load_dotenv()  # Load from .env file
-
-app = Flask(__name__)
-CORS(app, supports_credentials=True, methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"], origins=["https://chaiaurchhat.vercel.app"])
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_API_KEY = os.getenv("SUPABASE_API_KEY")
-
-
-HEADERS = {
-    "apikey": SUPABASE_API_KEY,
-    "Authorization": f"Bearer {SUPABASE_API_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation"
-}
-
-@app.route("/pg", methods=["GET"])
-def get_pg_by_name():
-    name = request.args.get("name")
-
-    view_resp = requests.get(
-        f"{SUPABASE_URL}/rest/v1/pg_whole_info?name=eq.{name}",
-        headers=HEADERS
-    )
-    if not view_resp.ok or not view_resp.json():
-        return jsonify({"error": "PG not found"}), 404
-    pg = view_resp.json()[0]
-
-    reviews_res = requests.get(
-        f"{SUPABASE_URL}/rest/v1/reviews?pg_id=eq.{pg['id']}&order=date.desc",
-        headers=HEADERS
-    )
-    pg["reviewList"] = reviews_res.json() if reviews_res.ok else []
-
-    return jsonify(pg)
-
-
-@app.route("/colleges", methods=["GET"])
-def get_all_colleges():
-    try:
-        resp = requests.get(
-            f"{SUPABASE_URL}/rest/v1/colleges?select=*",
-            headers=HEADERS
-        )
-        resp.raise_for_status()
-        return jsonify(resp.json())
-    except Exception as e:
-        print(f"Error fetching colleges: {e}")
-        return jsonify({"error": "Failed to fetch colleges"}), 500
-
-
-@app.route("/trending-pgs", methods=["GET"])
-def trending_pgs():
-    try:
-        response = requests.get(
-            f"{SUPABASE_URL}/rest/v1/pg_whole_info?select=*&order=avg_rating.desc.nullslast&limit=6",
-            headers=HEADERS
-        )
-        if not response.ok:
-            print("Supabase error:", response.text)
-            return jsonify({"error": "Failed to fetch PGs"}), 500
-
-        data = response.json()
-        # Backward compatibility: also return `rating`
-        for pg in data:
-            if "avg_rating" in pg:
-                pg["rating"] = pg["avg_rating"]
-
-        return jsonify(data)
-    except Exception as e:
-        print("Error fetching trending PGs:", e)
-        return jsonify({"error": "Server error"}), 500
-
-
-@app.route("/college/<college_name>", methods=["GET"])
-def get_college(college_name):
-    try:
-        print(f"Fetching college: {college_name}")
-        
-        # Ask Supabase for all needed columns, including image
-        resp = requests.get(
-            f"{SUPABASE_URL}/rest/v1/colleges"
-            f"?name=eq.{college_name}"
-            f"&select=id,name,short_name,city,image",
-            headers=HEADERS
-        )
-
-        data = resp.json()
-        
-        if not resp.ok or not data:
-            return jsonify({"error": "College not found"}), 404
-
-        return jsonify(data[0])
-    
-    except Exception as e:
-        print("Error fetching college:", e)
-        return jsonify({'error': 'Internal error'}), 500
-
-@app.route("/search", methods=["GET"])
-def search_entities():
-    query = request.args.get("q", "").lower()
-
-    if not query:
-        return jsonify({"colleges": [], "pgs": []})
-
-    # Search in colleges
-    college_resp = requests.get(
-        f"{SUPABASE_URL}/rest/v1/colleges?or=(name.ilike.*{query}*,city.ilike.*{query}*,short_name.ilike.*{query}*)&select=name,city,short_name",
-        headers=HEADERS
-    )
-
-    # Search in PGs
-    pg_resp = requests.get(
-        f"{SUPABASE_URL}/rest/v1/pg_whole_info?or=(name.ilike.*{query}*,location.ilike.*{query}*,college_city.ilike.*{query}*,college_name.ilike.*{query}*,college_short_name.ilike.*{query}*)&select=name,location,college_city,college_name,college_short_name",
-        headers=HEADERS
-    )
-
-    return jsonify({
-        "colleges": college_resp.json() if college_resp.ok else [],
-        "pgs": pg_resp.json() if pg_resp.ok else []
-    })
-
-@app.route("/pgs/add", methods=["POST"])
-def add_pg():
-    data = request.get_json()
-
-    required_fields = ["name", "college_id", "gender_type"]
-    for field in required_fields:
-        if field not in data or not data[field]:
-            return jsonify({"error": f"{field} is required"}), 400
-
-    # Fetch college info from Supabase
-    college_resp = requests.get(
-        f"{SUPABASE_URL}/rest/v1/colleges?id=eq.{data['college_id']}&select=short_name,city",
-        headers=HEADERS
-    )
-
-    if not college_resp.ok or not college_resp.json():
-        return jsonify({"error": "College not found"}), 400
-
-    college_info = college_resp.json()[0]
-    college_short = college_info.get("short_name", "")
-    college_city = college_info.get("city", "")
-    location_str = f"{college_short}, {college_city}".strip(", ")
-
-    pg_data = {
-        "name": data["name"],
-        "college_id": data["college_id"],
-        "gender_type": data["gender_type"],
-        "has_food": data.get("has_food", "Yes") == "Yes",
-        "description": data.get("description", ""),
-        "image": data.get("image", ""),
-        "location": location_str,
-        "inside_campus": data.get("inside_campus"),
-        "latitude": data.get("latitude"),
-        "longitude": data.get("longitude")
-    }
-
-    resp = requests.post(
-        f"{SUPABASE_URL}/rest/v1/pgs",
-        headers=HEADERS,
-        json=pg_data
-    )
-
-    if not resp.ok:
-        return jsonify({"error": "Failed to add hostel", "details": resp.text}), 500
-
-    return jsonify(resp.json()[0]), 201
-
-
-
-@app.route("/pgs", methods=["GET"])
-def get_all_pgs():
-    college_id = request.args.get("college_id")
-    query = f"{SUPABASE_URL}/rest/v1/pg_whole_info"
-    if college_id:
-        query += f"?college_id=eq.{college_id}"
-    res = requests.get(query, headers=HEADERS)
-
-    if not res.ok:
-        return jsonify({"error": "Failed to fetch PGs"}), 500
-
-    return jsonify(res.json())
-
-@app.route('/recommend', methods=['GET'])
-def recommend():
-    pg_name = request.args.get("pg")
-
-    if not pg_name:
-        return jsonify([])
-
-    try:
-        # Get target PG info
-        pg_resp = requests.get(
-            f"{SUPABASE_URL}/rest/v1/pg_whole_info?name=eq.{pg_name}",
-            headers=HEADERS
-        )
-        if not pg_resp.ok or not pg_resp.json():
-            return jsonify([])
-
-        pg_info = pg_resp.json()[0]
-        college_id = pg_info.get("college_id")
-        location = pg_info.get("college_city")
-        rating = pg_info.get("avg_rating", 0)
-        tags = pg_info.get("tags") or []
-        pg_id = pg_info.get("id")
-        gender_type = pg_info.get("gender_type")
-
-        if rating is None:
-            rating = 0
-
-        # Build filter
-        query = (
-            f"{SUPABASE_URL}/rest/v1/pg_whole_info"
-            f"?and=(id.neq.{pg_id},avg_rating.gte.{rating - 0.5},avg_rating.lte.{rating + 0.5})"
-        )
-
-        if college_id:
-            query += f"&college_id=eq.{college_id}"
-        elif location:
-            query += f"&college_city=eq.{location}"
-
-        query += "&select=name,tags,image,location,avg_rating"
-        
-        if gender_type:
-            query += f"&gender_type=eq.{gender_type}"
-
-        # inside_campus = pg_info.get("inside_campus")
-        # if inside_campus is not None:
-        #     query += f"&inside_campus=eq.{str(inside_campus).lower()}"
-
-        all_resp = requests.get(query, headers=HEADERS)
-        if not all_resp.ok:
-            print("Error in fetching similar PGs:", all_resp.text)
-            return jsonify([])
-
-        similar_pgs = all_resp.json()
-
-        # Optional: filter by overlapping tags
-        # def tag_overlap(pg):
-        #     if not tags or not pg.get("tags"):
-        #         return False
-        #     return any(tag in pg["tags"] for tag in tags)
-
-        # similar_filtered = [pg for pg in similar_pgs if tag_overlap(pg)]
-        # return jsonify(similar_filtered[:6])
-        def tag_overlap_score(pg):
-            return len(set(tags) & set(pg.get("tags", [])))
-
-        similar_filtered = sorted(
-            similar_pgs,
-            key=tag_overlap_score,
-            reverse=True
-        )
-        return jsonify(similar_filtered[:6])
-
-    except Exception as e:
-        print("Error in /recommend:", e)
-        return jsonify([])
-
-
-
-@app.route("/review/helpful", methods=["POST"])
-def mark_review_helpful():
-    data = request.get_json()
-    review_id = data.get("review_id")
-    user_email = data.get("user_email")
-
-    if not review_id or not user_email:
-        return jsonify({"error": "review_id and user_email required"}), 400
-
-    # Call the RPC function
-    resp = requests.post(
-        f"{SUPABASE_URL}/rest/v1/rpc/toggle_helpful_vote",
-        headers=HEADERS,
-        json={"p_review_id": review_id, "p_user_email": user_email},
-    )
-    if not resp.ok:
-        return jsonify({"error": "toggle_helpful_vote failed", "details": resp.text}), 500
-
-    new_count = resp.json()  # returns integer helpful_count
-    return jsonify({"review_id": review_id, "helpful_count": new_count})
-
-
-
-@app.route("/user-reviews", methods=["GET"])
-def get_user_reviews():
-    email = request.args.get("email")
-    if not email:
-        return jsonify({"error": "Missing email"}), 400
-
-    # Join reviews with pg info to get pg_name and college_name
-    query = (
-        f"{SUPABASE_URL}/rest/v1/reviews_with_pg_info?"
-        f"user_email=eq.{email}&order=date.desc"
-    )
-
-    resp = requests.get(query, headers=HEADERS)
-
-    if not resp.ok:
-        return jsonify({"error": "Failed to fetch user reviews"}), 500
-
-    return jsonify(resp.json())
-
-@app.route("/reviews/<review_id>", methods=["DELETE"])
-def delete_review(review_id):
-    if request.method == "OPTIONS":
-        return '', 204
-
-    url = f"{SUPABASE_URL}/rest/v1/reviews?id=eq.{review_id}"
-    resp = requests.delete(url, headers=HEADERS)
-    print(f"DELETE status: {resp.status_code}, response: {resp.text}")
-
-    if resp.status_code in (200, 204):
-        return jsonify({"message": "Deleted"}), 200
-    else:
-        return jsonify({
-            "error": "Failed to delete",
-            "details": resp.text,
-            "status_code": resp.status_code
-        }), 500
-
-
-@app.route('/review/submit', methods=['POST'])
-def submit_review():
-    data = request.get_json()
-
-    pg_name = data.get('pgName')
-    pg_resp = requests.get(
-        f"{SUPABASE_URL}/rest/v1/pgs?name=eq.{pg_name}",
-        headers=HEADERS
-    )
-    if not pg_resp.ok or not pg_resp.json():
-        return jsonify({'success': False, 'error': 'PG not found'}), 404
-
-    pg_id = pg_resp.json()[0]['id']
-
-    # Only include valid ratings and skip food rating if not applicable
-    ratings = {}
-    for field in [
-        "rating_room", "rating_cleanliness", "rating_safety",
-        "rating_location", "rating_warden", "rating_food"
-    ]:
-        value = data.get(field)
-        if field == "rating_food" and not data.get("hasFood", False):
-            continue
-        if isinstance(value, int):
-            ratings[field] = value
-
-    avg_rating = round(sum(ratings.values()) / len(ratings), 1) if ratings else 0
-    user_email = data.get('userEmail', '')
-    verified = user_email.endswith('.edu') or user_email.endswith('.ac.in')
-
-    review_data = {
-        "pg_id": pg_id,
-        "name": "Anonymous",
-        "user_email": data.get('userEmail'),
-        "rating": avg_rating,
-        "comment": data.get('comment', ''),
-        "sentiment": data.get('sentiment', 'Neutral'),
-        "tags": data.get('tags') or [],
-        "class_years": data.get('classYears') or [],
-        "room_type": data.get('roomType'),
-        "gender_type": data.get('genderType'),
-        "rent_opinion": data.get('rentOpinion'),
-        "happiness_level": data.get('happinessLevel'),
-        "images": [
-            {
-                "url": img.get("url"),
-                "fileId": img.get("fileId"),
-                "caption": img.get("caption"),
-                "originalName": img.get("originalName"),
-                "originalSize": img.get("originalSize"),
-                "imageTags": img.get("imageTags")
-            }
-            for img in data.get("images", [])
-        ],
-        "date": datetime.now(timezone.utc).date().isoformat(),
-        "helpful_count": 0,
-        "verified": verified
-    }
-
-    review_data.update(ratings)
-
-    resp = requests.post(
-        f"{SUPABASE_URL}/rest/v1/reviews",
-        headers=HEADERS,
-        json=review_data
-    )
-
-    if not resp.ok:
-        print("Review data payload:", review_data)
-        print("Supabase response:", resp.text)
-        return jsonify({'success': False, 'error': 'Could not store review'}), 500
-
-    return jsonify({'success': True, 'review': resp.json()[0]}), 200
-
-@app.route('/review/update', methods=['PUT'])
-def update_review():
-    data = request.get_json()
-    review_id = data.get('review_id')
-
-    if not review_id:
-        return jsonify({'success': False, 'error': 'Missing review ID'}), 400
-
-    # Ratings logic
-    ratings = {}
-    for field in [
-        "rating_room", "rating_cleanliness", "rating_safety",
-        "rating_location", "rating_warden", "rating_food"
-    ]:
-        value = data.get(field)
-        if field == "rating_food" and not data.get("hasFood", False):
-            continue
-        if isinstance(value, int):
-            ratings[field] = value
-
-    avg_rating = round(sum(ratings.values()) / len(ratings), 1) if ratings else 0
-
-    update_payload = {
-        "rating": avg_rating,
-        "comment": data.get('comment', ''),
-        "sentiment": data.get('sentiment', 'Neutral'),
-        "tags": data.get('tags') or [],
-        "class_years": data.get('classYears') or [],
-        "room_type": data.get('roomType'),
-        "rent_opinion": data.get('rentOpinion'),
-        "happiness_level": data.get('happinessLevel'),
-        "images": [
-            {
-                "url": img.get("url"),
-                "fileId": img.get("fileId"),
-                "caption": img.get("caption"),
-                "originalName": img.get("originalName"),
-                "originalSize": img.get("originalSize"),
-                "imageTags": img.get("imageTags")
-            }
-            for img in data.get("images", [])
-        ],
-        "date": datetime.now(timezone.utc).isoformat(),  # full ISO datetime
-        "helpful_count": 0
-    }
-
-    # Remove nulls explicitly
-    update_payload = {k: v for k, v in update_payload.items() if v is not None}
-
-    # Add ratings explicitly if int
-    for field in [
-        "rating_room", "rating_cleanliness", "rating_safety",
-        "rating_location", "rating_warden"
-    ]:
-        value = data.get(field)
-        if isinstance(value, int):
-            update_payload[field] = value
-
-    if data.get("hasFood", False):
-        rating_food = data.get("rating_food")
-        if isinstance(rating_food, int):
-            update_payload["rating_food"] = rating_food
-
-    update_payload.update(ratings)
-
-    url = f"{SUPABASE_URL}/rest/v1/reviews?id=eq.{review_id}"
-
-    custom_headers = HEADERS.copy()
-    custom_headers["Prefer"] = "return=representation"
-
-    patch_resp = requests.patch(url, headers=custom_headers, json=update_payload)
-
-    if patch_resp.status_code in (200, 201):
-        result = patch_resp.json()
-        return jsonify({'success': True, 'updatedId': result[0]['id']}), 200
-    else:
-        print("Update failed:", patch_resp.text)
-        return jsonify({'success': False, 'error': 'Update failed'}), 500
-
-@app.route("/wishlist/add", methods=["POST"])
-def add_to_wishlist():
-    data = request.get_json()
-    email = data.get("email")
-    pg_id = data.get("pg_id")
-    
-    if not email or not pg_id:
-        return jsonify({"error": "Missing email or pg_id"}), 400
-
-    payload = {
-        "user_email": email,
-        "pg_id": pg_id
-    }
-
-    resp = requests.post(
-        f"{SUPABASE_URL}/rest/v1/wishlist",
-        headers=HEADERS,
-        json=payload
-    )
-
-    if not resp.ok:
-        return jsonify({"error": "Failed to add to wishlist"}), 500
-
-    return jsonify({"success": True}), 201
-
-
-@app.route("/wishlist", methods=["GET"])
-def get_wishlist():
-    email = request.args.get("email")
-    if not email:
-        return jsonify({"error": "Missing email"}), 400
-
-    query = (
-        f"{SUPABASE_URL}/rest/v1/wishlist_with_pg_info?user_email=eq.{email}&select=pg_id,added_at,pgs(*),pg_whole_info(college_name)"
-    )
-
-    resp = requests.get(query, headers=HEADERS)
-    if not resp.ok:
-        return jsonify({"error": "Failed to fetch wishlist"}), 500
-
-    data = resp.json()
-    transformed = [{
-        "pg_id": item["pg_id"],
-        "added_at": item["added_at"],
-        "name": item["pgs"]["name"],
-        "collegeName": item["pgs"]["location"],
-        "rating": item["pgs"]["avg_rating"],
-        "image": item["pgs"]["image"],
-        "location": item["pg_whole_info"]["college_name"],
-    } for item in data]
-
-    return jsonify(transformed)
-
-@app.route("/wishlist/remove", methods=["DELETE"])
-def remove_from_wishlist():
-    data = request.get_json()
-    email = data.get("email")
-    pg_id = data.get("pg_id")
-
-    if not email or not pg_id:
-        return jsonify({"error": "Missing email or pg_id"}), 400
-
-    url = f"{SUPABASE_URL}/rest/v1/wishlist?user_email=eq.{email}&pg_id=eq.{pg_id}"
-
-    resp = requests.delete(url, headers=HEADERS)
-
-    if resp.status_code in (200, 204):
-        return jsonify({"success": True}), 200
-    else:
-        return jsonify({"error": "Failed to remove from wishlist"}), 500
-
-
-
-if __name__ == "__main__":
-    app.run(debug=True, port=5000)
+from flask import Flask, request, jsonify
+from flask_cors import CORS
+import requests
+from pg_recommender import recommend_pg
+from datetime import datetime, timezone
+from uuid import UUID
+from supabase_client import db, HEADERS
+from cache import cache
+from search_index import search_service
+from recommend_index import recommend_service
+from pagination import Keyset, page_args, fetch_page, stream_response, quote_value
+from conditional import rendered, send, add_validators
+from image_cleanup import image_cleanup, image_files
+from metrics import instrument
+
+app = Flask(__name__)
+CORS(app, supports_credentials=True, methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"], origins=["https://chaiaurchhat.vercel.app"], expose_headers=["ETag", "Last-Modified"])
+instrument(app)
+# Cached reads store the serialized body with its ETag (see conditional.py); every
+# other JSON GET gets a content-hash ETag here, so unchanged data is a bodyless 304
+app.after_request(add_validators)
+
+
+# Cached catalog entries are tagged with what they were built from:
+#   pg:<id>           PG detail and summary, every /pgs list and trending list containing it
+#   review:<id>       the PG detail embedding that review
+#   college_pgs:<id>  /pgs?college_id=<id> (college_pgs:* for the unfiltered list)
+#   colleges          /colleges and /college/<name>
+#   trending          /trending-pgs
+search_service.build_in_background()
+recommend_service.build_in_background()
+image_cleanup.start_in_background()
+
+
+def invalidate_pg(pg_id, college_id=None):
+    tags = [f"pg:{pg_id}", "trending"]
+    if college_id is not None:
+        tags += [f"college_pgs:{college_id}", "college_pgs:*"]
+    cache.invalidate_tags(*tags)
+    recommend_service.refresh_in_background(pg_id)
+
+
+# List endpoints keep returning the full array unless the caller asks for a page
+# (?limit= and/or ?after=<next_cursor>) or a stream (?stream=ndjson|json)
+PGS_ORDER = Keyset(("id", "asc"))
+REVIEWS_ORDER = Keyset(("date", "desc"), ("id", "asc"))
+WISHLIST_ORDER = Keyset(("added_at", "desc"), ("pg_id", "asc"))
+MAX_BATCH = 200  # items per bulk write request
+
+
+def multi_status(done_key, done, failed):
+    """Per-item outcome of a batch write: 200 all done, 400/500 none done, else 207 Multi-Status."""
+    if not failed:
+        return jsonify({"success": True, done_key: done, "failed": []}), 200
+    if not done:
+        status = 400 if all(item["status"] == 400 for item in failed) else 500
+        return jsonify({"success": False, "error": "All operations failed.", done_key: [], "failed": failed}), status
+    return jsonify({
+        "success": False,
+        "partial": True,
+        "message": "Some operations failed.",
+        done_key: done,
+        "failed": failed
+    }), 207
+
+
+def batch_ids(data, key):
+    """(valid, invalid) de-duplicated, order-preserving ids from data[key], or None if it isn't a non-empty list.
+
+    Valid ids are UUIDs in canonical form. PostgREST rejects a whole in.(...) filter or
+    uuid[] argument over one bad id, so the invalid ones are kept out of the query and
+    reported per item (see invalid_items).
+    """
+    ids = data.get(key) if isinstance(data, dict) else None
+    if not ids or not isinstance(ids, list) or len(ids) > MAX_BATCH:
+        return None
+    if not all(isinstance(i, (str, int)) for i in ids):
+        return None
+    valid, invalid = {}, {}
+    for i in ids:
+        try:
+            valid[str(UUID(str(i)))] = None
+        except ValueError:
+            invalid[i] = None
+    return list(valid), list(invalid)
+
+
+def json_object():
+    """The request's JSON body if it is an object, else {} so the route answers its usual 400."""
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else {}
+
+
+def invalid_items(id_key, ids):
+    return [{id_key: i, "status": 400, "error": "Invalid id"} for i in ids]
+
+
+def in_list(ids):
+    # Quoted and escaped like cursor values, so client ids can't break the in.(...) grammar
+    return "(" + ",".join(quote_value(i) for i in ids) + ")"
+
+
+def list_response(path, keyset, error, transform=None):
+    """Paged or streamed response for `path`, or None when the caller wants the legacy full list."""
+    try:
+        page = page_args(request.args, keyset)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    transform = transform or (lambda row: row)
+    fmt = request.args.get("stream")
+    if fmt in ("ndjson", "json") and "limit" in request.args:
+        # A stream is every row after the cursor; page with limit/next_cursor instead
+        return jsonify({"error": "limit can't be combined with stream"}), 400
+    try:
+        if fmt in ("ndjson", "json"):
+            return stream_response(path, keyset, fmt, transform, after=page and page[1])
+        if page is None:
+            return None
+        rows, next_cursor = fetch_page(path, keyset, *page)
+    except requests.RequestException as e:
+        print(error, e)
+        return jsonify({"error": error}), 500
+    return jsonify({"items": [transform(row) for row in rows], "next_cursor": next_cursor})
+
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify(cache.stats())
+
+
+@app.route("/pg", methods=["GET"])
+def get_pg_by_name():
+    name = request.args.get("name")
+    # reviewList is paged only when asked; the default stays the full list
+    try:
+        reviews_page = page_args(request.args, REVIEWS_ORDER, prefix="reviews_")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    cache_key = f"pg:{name}"
+    if reviews_page is not None:
+        cache_key += f":{request.args.get('reviews_limit')}:{request.args.get('reviews_after')}"
+    entry = cache.get(cache_key)
+    if entry is not None:
+        return send(entry)
+
+    pg, reviews_ok = fetch_pg_with_reviews(name, reviews_page)
+    if pg is None:
+        return jsonify({"error": "PG not found"}), 404
+
+    entry = rendered(pg)
+    # Don't pin a PG with a missing review list in the cache
+    if reviews_ok:
+        tags = [f"pg:{pg['id']}"] + [f"review:{r['id']}" for r in pg["reviewList"]]
+        cache.set(cache_key, entry, tags=tags)
+
+    return send(entry)
+
+
+def fetch_pg_with_reviews(name, reviews_page=None):
+    # PG row and its reviews in one round-trip via an embedded select
+    query = f"pg_whole_info?name=eq.{name}&select=*,reviewList:reviews(*)"
+    if reviews_page is None:
+        view_resp = db.get(f"{query}&reviewList.order=date.desc")
+    else:
+        limit, after = reviews_page
+        view_resp = db.get(REVIEWS_ORDER.query(query, limit + 1, after, prefix="reviewList."))
+    if view_resp.status_code == 400:
+        # PostgREST couldn't resolve the view -> reviews relationship; fall back to two calls
+        print("Embedded reviews select failed:", view_resp.text)
+        return fetch_pg_then_reviews(name, reviews_page)
+    if not view_resp.ok or not view_resp.json():
+        return None, False
+    pg = view_resp.json()[0]
+    if reviews_page is not None:
+        reviews = pg["reviewList"]
+        limit = reviews_page[0]
+        pg["reviewList"] = reviews[:limit]
+        pg["reviewListNextCursor"] = REVIEWS_ORDER.cursor_for(reviews[limit - 1]) if len(reviews) > limit else None
+    return pg, True
+
+
+def fetch_pg_then_reviews(name, reviews_page=None):
+    view_resp = db.get(f"pg_whole_info?name=eq.{name}")
+    if not view_resp.ok or not view_resp.json():
+        return None, False
+    pg = view_resp.json()[0]
+
+    path = f"reviews?pg_id=eq.{pg['id']}"
+    if reviews_page is None:
+        reviews_res = db.get(f"{path}&order=date.desc")
+        pg["reviewList"] = reviews_res.json() if reviews_res.ok else []
+        return pg, reviews_res.ok
+
+    try:
+        pg["reviewList"], pg["reviewListNextCursor"] = fetch_page(path, REVIEWS_ORDER, *reviews_page)
+    except requests.RequestException as e:
+        print("Failed to fetch reviews:", e)
+        pg["reviewList"], pg["reviewListNextCursor"] = [], None
+        return pg, False
+    return pg, True
+
+
+@app.route("/pg/<pg_id>/summary", methods=["GET"])
+def get_pg_summary(pg_id):
+    # Written ahead of time by precompute_summaries.py; no model on this path
+    try:
+        cache_key = f"pg_summary:{pg_id}"
+        entry = cache.get(cache_key)
+        if entry is not None:
+            return send(entry)
+
+        resp = db.get(f"pg_summaries?pg_id=eq.{pg_id}&select=pg_id,summary,review_count,updated_at")
+        data = resp.json()
+
+        if not resp.ok or not data:
+            return jsonify({"error": "No summary for this PG yet"}), 404
+
+        entry = rendered(data[0])
+        cache.set(cache_key, entry, tags=[f"pg:{pg_id}"])
+        return send(entry)
+
+    except Exception as e:
+        print("Error fetching PG summary:", e)
+        return jsonify({"error": "Internal error"}), 500
+
+
+@app.route("/colleges", methods=["GET"])
+def get_all_colleges():
+    try:
+        entry = cache.get("colleges")
+        if entry is None:
+            resp = db.get("colleges?select=*")
+            resp.raise_for_status()
+            entry = rendered(resp.json())
+            cache.set("colleges", entry, tags=["colleges"])
+        return send(entry)
+    except Exception as e:
+        print(f"Error fetching colleges: {e}")
+        return jsonify({"error": "Failed to fetch colleges"}), 500
+
+
+@app.route("/trending-pgs", methods=["GET"])
+def trending_pgs():
+    try:
+        entry = cache.get("trending-pgs")
+        if entry is not None:
+            return send(entry)
+
+        response = db.get("pg_whole_info?select=*&order=avg_rating.desc.nullslast&limit=6")
+        if not response.ok:
+            print("Supabase error:", response.text)
+            return jsonify({"error": "Failed to fetch PGs"}), 500
+
+        data = response.json()
+        # Backward compatibility: also return `rating`
+        for pg in data:
+            if "avg_rating" in pg:
+                pg["rating"] = pg["avg_rating"]
+
+        entry = rendered(data)
+        cache.set("trending-pgs", entry, tags=["trending"] + [f"pg:{pg['id']}" for pg in data])
+        return send(entry)
+    except Exception as e:
+        print("Error fetching trending PGs:", e)
+        return jsonify({"error": "Server error"}), 500
+
+
+@app.route("/college/<college_name>", methods=["GET"])
+def get_college(college_name):
+    try:
+        print(f"Fetching college: {college_name}")
+
+        cache_key = f"college:{college_name}"
+        entry = cache.get(cache_key)
+        if entry is not None:
+            return send(entry)
+
+        # Ask Supabase for all needed columns, including image
+        resp = db.get(
+            f"colleges"
+            f"?name=eq.{college_name}"
+            f"&select=id,name,short_name,city,image"
+        )
+
+        data = resp.json()
+        
+        if not resp.ok or not data:
+            return jsonify({"error": "College not found"}), 404
+
+        entry = rendered(data[0])
+        cache.set(cache_key, entry, tags=["colleges"])
+        return send(entry)
+    
+    except Exception as e:
+        print("Error fetching college:", e)
+        return jsonify({'error': 'Internal error'}), 500
+
+@app.route("/search", methods=["GET"])
+def search_entities():
+    query = request.args.get("q", "").lower()
+
+    if not query:
+        return jsonify({"colleges": [], "pgs": []})
+
+    limit = max(1, min(request.args.get("limit", 20, type=int), 50))
+    if search_service.ready:
+        return jsonify(search_service.search(query, limit))
+    search_service.build_in_background()
+
+    # Index still warming up: search colleges and PGs concurrently
+    college_resp, pg_resp = db.get_many(
+        f"colleges?or=(name.ilike.*{query}*,city.ilike.*{query}*,short_name.ilike.*{query}*)&select=name,city,short_name",
+        f"pg_whole_info?or=(name.ilike.*{query}*,location.ilike.*{query}*,college_city.ilike.*{query}*,college_name.ilike.*{query}*,college_short_name.ilike.*{query}*)&select=name,location,college_city,college_name,college_short_name",
+    )
+
+    return jsonify({
+        "colleges": college_resp.json() if college_resp.ok else [],
+        "pgs": pg_resp.json() if pg_resp.ok else []
+    })
+
+@app.route("/pgs/add", methods=["POST"])
+def add_pg():
+    data = request.get_json()
+
+    required_fields = ["name", "college_id", "gender_type"]
+    for field in required_fields:
+        if field not in data or not data[field]:
+            return jsonify({"error": f"{field} is required"}), 400
+
+    # Fetch college info from Supabase
+    college_resp = db.get(f"colleges?id=eq.{data['college_id']}&select=name,short_name,city")
+
+    if not college_resp.ok or not college_resp.json():
+        return jsonify({"error": "College not found"}), 400
+
+    college_info = college_resp.json()[0]
+    college_short = college_info.get("short_name", "")
+    college_city = college_info.get("city", "")
+    location_str = f"{college_short}, {college_city}".strip(", ")
+
+    pg_data = {
+        "name": data["name"],
+        "college_id": data["college_id"],
+        "gender_type": data["gender_type"],
+        "has_food": data.get("has_food", "Yes") == "Yes",
+        "description": data.get("description", ""),
+        "image": data.get("image", ""),
+        "location": location_str,
+        "inside_campus": data.get("inside_campus"),
+        "latitude": data.get("latitude"),
+        "longitude": data.get("longitude")
+    }
+
+    resp = db.post("pgs", json=pg_data)
+
+    if not resp.ok:
+        return jsonify({"error": "Failed to add hostel", "details": resp.text}), 500
+
+    new_pg = resp.json()[0]
+    invalidate_pg(new_pg["id"], new_pg.get("college_id"))
+    search_service.add_pg({
+        **new_pg,
+        "college_name": college_info.get("name", ""),
+        "college_short_name": college_short,
+        "college_city": college_city,
+    })
+    return jsonify(new_pg), 201
+
+
+
+@app.route("/pgs", methods=["GET"])
+def get_all_pgs():
+    college_id = request.args.get("college_id")
+
+    query = "pg_whole_info"
+    if college_id:
+        query += f"?college_id=eq.{college_id}"
+    paged = list_response(query, PGS_ORDER, "Failed to fetch PGs")
+    if paged is not None:
+        return paged
+
+    cache_key = f"pgs:{college_id or '*'}"
+    entry = cache.get(cache_key)
+    if entry is not None:
+        return send(entry)
+
+    res = db.get(query)
+
+    if not res.ok:
+        return jsonify({"error": "Failed to fetch PGs"}), 500
+
+    data = res.json()
+    entry = rendered(data)
+    cache.set(cache_key, entry, tags=[f"college_pgs:{college_id or '*'}"] + [f"pg:{pg['id']}" for pg in data])
+    return send(entry)
+
+@app.route('/recommend', methods=['GET'])
+def recommend():
+    pg_name = request.args.get("pg")
+
+    if not pg_name:
+        return jsonify([])
+
+    try:
+        # Answered in memory once the index is built; unknown PGs fall through to Supabase
+        if recommend_service.ready:
+            similar = recommend_service.recommend(pg_name)
+            if similar is not None:
+                return jsonify(similar)
+        else:
+            recommend_service.build_in_background()
+
+        # Get target PG info
+        pg_resp = db.get(f"pg_whole_info?name=eq.{pg_name}")
+        if not pg_resp.ok or not pg_resp.json():
+            return jsonify([])
+
+        pg_info = pg_resp.json()[0]
+        college_id = pg_info.get("college_id")
+        location = pg_info.get("college_city")
+        rating = pg_info.get("avg_rating", 0)
+        tags = pg_info.get("tags") or []
+        pg_id = pg_info.get("id")
+        gender_type = pg_info.get("gender_type")
+
+        if rating is None:
+            rating = 0
+
+        # Build filter
+        query = (
+            "pg_whole_info"
+            f"?and=(id.neq.{pg_id},avg_rating.gte.{rating - 0.5},avg_rating.lte.{rating + 0.5})"
+        )
+
+        if college_id:
+            query += f"&college_id=eq.{college_id}"
+        elif location:
+            query += f"&college_city=eq.{location}"
+
+        query += "&select=name,tags,image,location,avg_rating"
+        
+        if gender_type:
+            query += f"&gender_type=eq.{gender_type}"
+
+        # inside_campus = pg_info.get("inside_campus")
+        # if inside_campus is not None:
+        #     query += f"&inside_campus=eq.{str(inside_campus).lower()}"
+
+        all_resp = db.get(query)
+        if not all_resp.ok:
+            print("Error in fetching similar PGs:", all_resp.text)
+            return jsonify([])
+
+        similar_pgs = all_resp.json()
+
+        # Optional: filter by overlapping tags
+        # def tag_overlap(pg):
+        #     if not tags or not pg.get("tags"):
+        #         return False
+        #     return any(tag in pg["tags"] for tag in tags)
+
+        # similar_filtered = [pg for pg in similar_pgs if tag_overlap(pg)]
+        # return jsonify(similar_filtered[:6])
+        def tag_overlap_score(pg):
+            return len(set(tags) & set(pg.get("tags", [])))
+
+        similar_filtered = sorted(
+            similar_pgs,
+            key=tag_overlap_score,
+            reverse=True
+        )
+        return jsonify(similar_filtered[:6])
+
+    except Exception as e:
+        print("Error in /recommend:", e)
+        return jsonify([])
+
+
+
+@app.route("/review/helpful", methods=["POST"])
+def mark_review_helpful():
+    data = request.get_json()
+    review_id = data.get("review_id")
+    user_email = data.get("user_email")
+
+    if not review_id or not user_email:
+        return jsonify({"error": "review_id and user_email required"}), 400
+
+    # Call the RPC function
+    resp = db.post(
+        "rpc/toggle_helpful_vote",
+        json={"p_review_id": review_id, "p_user_email": user_email},
+    )
+    if not resp.ok:
+        return jsonify({"error": "toggle_helpful_vote failed", "details": resp.text}), 500
+
+    new_count = resp.json()  # returns integer helpful_count
+    cache.invalidate_tags(f"review:{review_id}")
+    return jsonify({"review_id": review_id, "helpful_count": new_count})
+
+
+@app.route("/review/helpful/batch", methods=["POST"])
+def mark_reviews_helpful():
+    data = json_object()
+    user_email = data.get("user_email")
+    batch = batch_ids(data, "review_ids")
+
+    if not batch or not user_email:
+        return jsonify({"error": f"review_ids (1-{MAX_BATCH}) and user_email required"}), 400
+    review_ids, invalid = batch
+    if not review_ids:
+        return multi_status("toggled", [], invalid_items("review_id", invalid))
+
+    # One RPC toggles the whole set (sql/bulk_writes.sql)
+    resp = db.post(
+        "rpc/toggle_helpful_votes",
+        json={"p_review_ids": review_ids, "p_user_email": user_email},
+    )
+    if resp.status_code == 404:
+        # Function not deployed yet; toggle each vote concurrently instead
+        toggled, failed = toggle_helpful_votes_each(review_ids, user_email)
+    elif not resp.ok:
+        toggled = []
+        failed = [{"review_id": rid, "status": resp.status_code, "error": resp.text} for rid in review_ids]
+    else:
+        counts = {str(row["review_id"]): row["helpful_count"] for row in resp.json()}
+        toggled = [{"review_id": rid, "helpful_count": counts[str(rid)]}
+                   for rid in review_ids if str(rid) in counts]
+        failed = [{"review_id": rid, "status": 404, "error": "Review not found"}
+                  for rid in review_ids if str(rid) not in counts]
+
+    cache.invalidate_tags(*[f"review:{item['review_id']}" for item in toggled])
+    return multi_status("toggled", toggled, failed + invalid_items("review_id", invalid))
+
+
+def toggle_helpful_votes_each(review_ids, user_email):
+    def toggle(review_id):
+        return db.post(
+            "rpc/toggle_helpful_vote",
+            json={"p_review_id": review_id, "p_user_email": user_email},
+        )
+
+    toggled, failed = [], []
+    for review_id, resp in zip(review_ids, db.executor.map(toggle, review_ids)):
+        if resp.ok:
+            toggled.append({"review_id": review_id, "helpful_count": resp.json()})
+        else:
+            failed.append({"review_id": review_id, "status": resp.status_code, "error": resp.text})
+    return toggled, failed
+
+
+
+@app.route("/user-reviews", methods=["GET"])
+def get_user_reviews():
+    email = request.args.get("email")
+    if not email:
+        return jsonify({"error": "Missing email"}), 400
+
+    # Join reviews with pg info to get pg_name and college_name
+    paged = list_response(
+        f"reviews_with_pg_info?user_email=eq.{email}", REVIEWS_ORDER, "Failed to fetch user reviews"
+    )
+    if paged is not None:
+        return paged
+
+    query = (
+        "reviews_with_pg_info?"
+        f"user_email=eq.{email}&order=date.desc"
+    )
+
+    resp = db.get(query)
+
+    if not resp.ok:
+        return jsonify({"error": "Failed to fetch user reviews"}), 500
+
+    return jsonify(resp.json())
+
+@app.route("/reviews/<review_id>", methods=["DELETE"])
+def delete_review(review_id):
+    if request.method == "OPTIONS":
+        return '', 204
+
+    url = f"reviews?id=eq.{review_id}"
+    resp = db.delete(url)
+    print(f"DELETE status: {resp.status_code}, response: {resp.text}")
+
+    if resp.status_code in (200, 204):
+        # return=representation hands back the deleted rows, so we know which PGs to refresh
+        for row in (resp.json() if resp.status_code == 200 else []):
+            invalidate_pg(row["pg_id"])
+            image_cleanup.enqueue(image_files(row.get("images")))
+        return jsonify({"message": "Deleted"}), 200
+    else:
+        return jsonify({
+            "error": "Failed to delete",
+            "details": resp.text,
+            "status_code": resp.status_code
+        }), 500
+
+
+@app.route("/reviews/batch", methods=["DELETE"])
+def delete_reviews():
+    batch = batch_ids(json_object(), "review_ids")
+    if not batch:
+        return jsonify({"error": f"review_ids (1-{MAX_BATCH}) required"}), 400
+    review_ids, invalid = batch
+    if not review_ids:
+        return multi_status("deleted", [], invalid_items("review_id", invalid))
+
+    # One bulk delete; return=representation tells us which rows existed
+    resp = db.delete(f"reviews?id=in.{in_list(review_ids)}")
+    if not resp.ok:
+        failed = [{"review_id": rid, "status": resp.status_code, "error": resp.text} for rid in review_ids]
+        return multi_status("deleted", [], failed + invalid_items("review_id", invalid))
+
+    rows = resp.json()
+    for pg_id in {row["pg_id"] for row in rows}:
+        invalidate_pg(pg_id)
+    for row in rows:
+        image_cleanup.enqueue(image_files(row.get("images")))
+    removed = {str(row["id"]) for row in rows}
+    deleted = [rid for rid in review_ids if str(rid) in removed]
+    failed = [{"review_id": rid, "status": 404, "error": "Review not found"}
+              for rid in review_ids if str(rid) not in removed]
+    return multi_status("deleted", deleted, failed + invalid_items("review_id", invalid))
+
+
+@app.route('/review/submit', methods=['POST'])
+def submit_review():
+    data = request.get_json()
+
+    pg_name = data.get('pgName')
+    pg_resp = db.get(f"pgs?name=eq.{pg_name}")
+    if not pg_resp.ok or not pg_resp.json():
+        return jsonify({'success': False, 'error': 'PG not found'}), 404
+
+    pg_id = pg_resp.json()[0]['id']
+
+    # Only include valid ratings and skip food rating if not applicable
+    ratings = {}
+    for field in [
+        "rating_room", "rating_cleanliness", "rating_safety",
+        "rating_location", "rating_warden", "rating_food"
+    ]:
+        value = data.get(field)
+        if field == "rating_food" and not data.get("hasFood", False):
+            continue
+        if isinstance(value, int):
+            ratings[field] = value
+
+    avg_rating = round(sum(ratings.values()) / len(ratings), 1) if ratings else 0
+    user_email = data.get('userEmail', '')
+    verified = user_email.endswith('.edu') or user_email.endswith('.ac.in')
+
+    review_data = {
+        "pg_id": pg_id,
+        "name": "Anonymous",
+        "user_email": data.get('userEmail'),
+        "rating": avg_rating,
+        "comment": data.get('comment', ''),
+        "sentiment": data.get('sentiment', 'Neutral'),
+        "tags": data.get('tags') or [],
+        "class_years": data.get('classYears') or [],
+        "room_type": data.get('roomType'),
+        "gender_type": data.get('genderType'),
+        "rent_opinion": data.get('rentOpinion'),
+        "happiness_level": data.get('happinessLevel'),
+        "images": [
+            {
+                "url": img.get("url"),
+                "fileId": img.get("fileId"),
+                "caption": img.get("caption"),
+                "originalName": img.get("originalName"),
+                "originalSize": img.get("originalSize"),
+                "imageTags": img.get("imageTags")
+            }
+            for img in data.get("images", [])
+        ],
+        "date": datetime.now(timezone.utc).date().isoformat(),
+        "helpful_count": 0,
+        "verified": verified
+    }
+
+    review_data.update(ratings)
+
+    resp = db.post("reviews", json=review_data)
+
+    if not resp.ok:
+        print("Review data payload:", review_data)
+        print("Supabase response:", resp.text)
+        return jsonify({'success': False, 'error': 'Could not store review'}), 500
+
+    invalidate_pg(pg_id)
+    return jsonify({'success': True, 'review': resp.json()[0]}), 200
+
+@app.route('/review/update', methods=['PUT'])
+def update_review():
+    data = request.get_json()
+    review_id = data.get('review_id')
+
+    if not review_id:
+        return jsonify({'success': False, 'error': 'Missing review ID'}), 400
+
+    # Ratings logic
+    ratings = {}
+    for field in [
+        "rating_room", "rating_cleanliness", "rating_safety",
+        "rating_location", "rating_warden", "rating_food"
+    ]:
+        value = data.get(field)
+        if field == "rating_food" and not data.get("hasFood", False):
+            continue
+        if isinstance(value, int):
+            ratings[field] = value
+
+    avg_rating = round(sum(ratings.values()) / len(ratings), 1) if ratings else 0
+
+    update_payload = {
+        "rating": avg_rating,
+        "comment": data.get('comment', ''),
+        "sentiment": data.get('sentiment', 'Neutral'),
+        "tags": data.get('tags') or [],
+        "class_years": data.get('classYears') or [],
+        "room_type": data.get('roomType'),
+        "rent_opinion": data.get('rentOpinion'),
+        "happiness_level": data.get('happinessLevel'),
+        "images": [
+            {
+                "url": img.get("url"),
+                "fileId": img.get("fileId"),
+                "caption": img.get("caption"),
+                "originalName": img.get("originalName"),
+                "originalSize": img.get("originalSize"),
+                "imageTags": img.get("imageTags")
+            }
+            for img in data.get("images", [])
+        ],
+        "date": datetime.now(timezone.utc).isoformat(),  # full ISO datetime
+        "helpful_count": 0
+    }
+
+    # Remove nulls explicitly
+    update_payload = {k: v for k, v in update_payload.items() if v is not None}
+
+    # Add ratings explicitly if int
+    for field in [
+        "rating_room", "rating_cleanliness", "rating_safety",
+        "rating_location", "rating_warden"
+    ]:
+        value = data.get(field)
+        if isinstance(value, int):
+            update_payload[field] = value
+
+    if data.get("hasFood", False):
+        rating_food = data.get("rating_food")
+        if isinstance(rating_food, int):
+            update_payload["rating_food"] = rating_food
+
+    update_payload.update(ratings)
+
+    url = f"reviews?id=eq.{review_id}"
+
+    # The patch replaces the images array; remember the old one so dropped files get deleted.
+    # If this read fails the reconciliation pass picks the orphans up later.
+    before_resp = db.get(f"{url}&select=images")
+    before = before_resp.json() if before_resp.ok else []
+
+    custom_headers = HEADERS.copy()
+    custom_headers["Prefer"] = "return=representation"
+
+    patch_resp = db.patch(url, headers=custom_headers, json=update_payload)
+
+    if patch_resp.status_code in (200, 201):
+        result = patch_resp.json()
+        invalidate_pg(result[0]['pg_id'])
+        if before:
+            image_cleanup.enqueue_removed(before[0].get("images"), result[0].get("images"))
+        return jsonify({'success': True, 'updatedId': result[0]['id']}), 200
+    else:
+        print("Update failed:", patch_resp.text)
+        return jsonify({'success': False, 'error': 'Update failed'}), 500
+
+@app.route("/wishlist/add", methods=["POST"])
+def add_to_wishlist():
+    data = request.get_json()
+    email = data.get("email")
+    pg_id = data.get("pg_id")
+    
+    if not email or not pg_id:
+        return jsonify({"error": "Missing email or pg_id"}), 400
+
+    payload = {
+        "user_email": email,
+        "pg_id": pg_id
+    }
+
+    resp = db.post("wishlist", json=payload)
+
+    if not resp.ok:
+        return jsonify({"error": "Failed to add to wishlist"}), 500
+
+    return jsonify({"success": True}), 201
+
+
+@app.route("/wishlist/add/batch", methods=["POST"])
+def add_many_to_wishlist():
+    data = json_object()
+    email = data.get("email")
+    batch = batch_ids(data, "pg_ids")
+
+    if not email or not batch:
+        return jsonify({"error": f"Missing email or pg_ids (1-{MAX_BATCH})"}), 400
+    pg_ids, invalid = batch
+    if not pg_ids:
+        return multi_status("added", [], invalid_items("pg_id", invalid))
+
+    # One bulk insert; PGs already in the wishlist are skipped rather than failing the batch
+    # (needs the unique key from sql/bulk_writes.sql)
+    resp = db.post(
+        "wishlist?on_conflict=user_email,pg_id",
+        json=[{"user_email": email, "pg_id": pg_id} for pg_id in pg_ids],
+        headers={"Prefer": "return=representation,resolution=ignore-duplicates"},
+    )
+    if not resp.ok:
+        failed = [{"pg_id": pg_id, "status": resp.status_code, "error": resp.text} for pg_id in pg_ids]
+        return multi_status("added", [], failed + invalid_items("pg_id", invalid))
+
+    # ignore-duplicates returns only the rows it inserted; the others were already there
+    inserted = {str(row["pg_id"]) for row in resp.json()}
+    failed = invalid_items("pg_id", invalid)
+    return jsonify({
+        "success": not failed,
+        **({"partial": True, "message": "Some operations failed."} if failed else {}),
+        "added": [pg_id for pg_id in pg_ids if str(pg_id) in inserted],
+        "present": [pg_id for pg_id in pg_ids if str(pg_id) not in inserted],
+        "failed": failed,
+    }), 207 if failed else 200
+
+
+@app.route("/wishlist", methods=["GET"])
+def get_wishlist():
+    email = request.args.get("email")
+    if not email:
+        return jsonify({"error": "Missing email"}), 400
+
+    query = (
+        f"wishlist_with_pg_info?user_email=eq.{email}&select=pg_id,added_at,pgs(*),pg_whole_info(college_name)"
+    )
+    paged = list_response(query, WISHLIST_ORDER, "Failed to fetch wishlist", wishlist_item)
+    if paged is not None:
+        return paged
+
+    resp = db.get(query)
+    if not resp.ok:
+        return jsonify({"error": "Failed to fetch wishlist"}), 500
+
+    data = resp.json()
+    transformed = [wishlist_item(item) for item in data]
+
+    return jsonify(transformed)
+
+
+def wishlist_item(item):
+    return {
+        "pg_id": item["pg_id"],
+        "added_at": item["added_at"],
+        "name": item["pgs"]["name"],
+        "collegeName": item["pgs"]["location"],
+        "rating": item["pgs"]["avg_rating"],
+        "image": item["pgs"]["image"],
+        "location": item["pg_whole_info"]["college_name"],
+    }
+
+@app.route("/wishlist/remove", methods=["DELETE"])
+def remove_from_wishlist():
+    data = request.get_json()
+    email = data.get("email")
+    pg_id = data.get("pg_id")
+
+    if not email or not pg_id:
+        return jsonify({"error": "Missing email or pg_id"}), 400
+
+    url = f"wishlist?user_email=eq.{email}&pg_id=eq.{pg_id}"
+
+    resp = db.delete(url)
+
+    if resp.status_code in (200, 204):
+        return jsonify({"success": True}), 200
+    else:
+        return jsonify({"error": "Failed to remove from wishlist"}), 500
+
+
+@app.route("/wishlist/remove/batch", methods=["DELETE"])
+def remove_many_from_wishlist():
+    data = json_object()
+    email = data.get("email")
+    batch = batch_ids(data, "pg_ids")
+
+    if not email or not batch:
+        return jsonify({"error": f"Missing email or pg_ids (1-{MAX_BATCH})"}), 400
+    pg_ids, invalid = batch
+    if not pg_ids:
+        return multi_status("removed", [], invalid_items("pg_id", invalid))
+
+    resp = db.delete(f"wishlist?user_email=eq.{email}&pg_id=in.{in_list(pg_ids)}")
+    if not resp.ok:
+        failed = [{"pg_id": pg_id, "status": resp.status_code, "error": resp.text} for pg_id in pg_ids]
+        return multi_status("removed", [], failed + invalid_items("pg_id", invalid))
+
+    removed = {str(row["pg_id"]) for row in resp.json()}
+    failed = [{"pg_id": pg_id, "status": 404, "error": "Not in wishlist"}
+              for pg_id in pg_ids if str(pg_id) not in removed] + invalid_items("pg_id", invalid)
+    return multi_status("removed", [pg_id for pg_id in pg_ids if str(pg_id) in removed], failed)
+
+
+
+if __name__ == "__main__":
+    app.run(debug=True, port=5000)
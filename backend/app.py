@@ -1,109 +1,383 @@
-from flask import Flask, request, jsonify
-from transformers import pipeline, BartTokenizer
-import nltk
-from nltk.tokenize.punkt import PunktSentenceTokenizer
+import json
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import as_completed
+from contextlib import closing
+
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+from metrics import Counter, Gauge, Histogram, instrument, timed
+from microbatch import MicroBatcher
+from inference_backends import generate_ids, load_seq2seq
+from model_pool import ModelPool, available_cores
+from model_server import ModelClient
+from summary_cache import summary_cache, summary_key
+from summary_jobs import JobQueue, QueueFull
+
+# Sentence-splitter data is fetched at build time (build.sh) instead of on every boot:
+#   python -m nltk.downloader -d backend/nltk_data punkt_tab
+NLTK_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nltk_data")
 
-nltk.download('punkt')
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-CORS(app, resources={r"/summarize": {"origins": [
+# /summarize and everything under it: the stream, job submission and job polling.
+# Retry-After is exposed so the browser can honour 429/503 backoff
+CORS(app, resources={r"/summarize.*": {"origins": [
     "http://localhost:5173",
     "https://chaiaurchhat.vercel.app"
-]}}, methods=["POST", "OPTIONS"])
+]}}, methods=["GET", "POST", "OPTIONS"], expose_headers=["Retry-After"])
+instrument(app)
 
+# Stages overlap: reduce covers the tokenize and generate calls of its level
+STAGE_SECONDS = Histogram("summarizer_stage_duration_seconds",
+                          "Summarizer time per stage: sentence_split, tokenize, generate, decode, reduce",
+                          ("stage",))
+CHUNKS = Counter("summarizer_chunks_total", "Chunks summarized, by where the summary came from: "
+                 "cache, model, or fallback (the chunk's own text after a failure)", ("source",))
 
-model_name = "sshleifer/distilbart-cnn-12-6"
-#summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
 
-tokenizer = BartTokenizer.from_pretrained(model_name)
-summarizer = pipeline("summarization", model=model_name)
+model_name = os.getenv("SUMMARIZER_MODEL", "sshleifer/distilbart-cnn-12-6")
+# torch | int8 | onnx | onnx-int8, see inference_backends.py
+backend_name = os.getenv("SUMMARIZER_BACKEND", "torch")
+# Cached summaries are only reused for the exact model + backend that produced them
+model_id = f"{model_name}@{backend_name}"
+#summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
 
-sentence_tokenizer = PunktSentenceTokenizer()
+# nltk, torch, the tokenizer and the model load in the background so the port binds at
+# once; /ready turns 200 only after a warm-up generation has run
+sentence_tokenizer = None
+tokenizer = None
+model = None
+model_pool = None
+model_client = None
+model_ready = threading.Event()
+# Set once loading has ended either way; check model_error after waiting on it
+model_loaded = threading.Event()
+model_error = None
 
 MAX_TOKENS = 1024  # BART-large-CNN max tokens per input
+MAX_BATCH = int(os.getenv("SUMMARIZER_MAX_BATCH", "8"))  # chunks per forward pass
+# How long the micro-batcher holds a chunk waiting for concurrent requests' chunks; 0 disables it.
+# Unused with SUMMARIZER_SERVER, where the server batches (it reads the same variable)
+BATCH_WAIT_MS = float(os.getenv("SUMMARIZER_BATCH_WAIT_MS", "15"))
+# Model processes for the map stage, one model copy each. The default 1 keeps inference in
+# this process; 0 means one per core. Opt-in, since under gunicorn -w N every web worker
+# would start its own pool: N x workers copies of the model (see model_server.py to share one).
+WORKERS = int(os.getenv("SUMMARIZER_WORKERS", "1")) or available_cores()
+# Chunks handed to inference at once: a full batch for every worker
+BATCH_CHUNKS = MAX_BATCH * WORKERS
+# Address of a shared model_server.py; when set this process loads no model at all
+MODEL_SERVER = os.getenv("SUMMARIZER_SERVER")
+if MODEL_SERVER:
+    # Tokenizer only: keeps transformers from importing torch, ~450MB of private memory per process
+    os.environ.setdefault("USE_TORCH", "0")
+
+def pack_chunks(text, max_tokens=MAX_TOKENS):
+    """[(chunk text, token ids)] packed greedily by sentence from one batched encode."""
+    with timed(STAGE_SECONDS.labels("sentence_split")):
+        sentences = sentence_tokenizer.tokenize(text)
+    return pack_segments(sentences, max_tokens)
+
+
+def pack_segments(segments, max_tokens=MAX_TOKENS):
+    """[(chunk text, token ids)] of consecutive segments joined with spaces, each within max_tokens.
+
+    Every segment after the first is encoded with its leading space, so the ids of
+    a chunk are exactly the ids of its joined text and never need re-tokenizing.
+    """
+    if not segments:
+        return []
+    budget = max_tokens - tokenizer.num_special_tokens_to_add()
+    with timed(STAGE_SECONDS.labels("tokenize")):
+        encoded = tokenizer(
+            [s if i == 0 else " " + s for i, s in enumerate(segments)],
+            add_special_tokens=False,
+        )["input_ids"]
 
-def chunk_text(text, max_tokens=MAX_TOKENS):
-    sentences = sentence_tokenizer.tokenize(text)
     chunks = []
     current_chunk = []
-    current_len = 0
-
-    for sentence in sentences:
-        sentence_len = len(tokenizer.tokenize(sentence))
-        if current_len + sentence_len > max_tokens:
-            chunks.append(" ".join(current_chunk))
-            current_chunk = [sentence]
-            current_len = sentence_len
+    current_ids = []
+
+    for segment, ids in zip(segments, encoded):
+        if current_chunk and len(current_ids) + len(ids) > budget:
+            chunks.append((" ".join(current_chunk), current_ids))
+            current_chunk = [segment]
+            current_ids = tokenizer(segment, add_special_tokens=False)["input_ids"]
         else:
-            current_chunk.append(sentence)
-            current_len += sentence_len
+            current_chunk.append(segment)
+            current_ids = current_ids + ids
 
     if current_chunk:
-        chunks.append(" ".join(current_chunk))
+        chunks.append((" ".join(current_chunk), current_ids))
 
     return chunks
 
-def dynamic_summary_length(chunk_text):
-    length = len(tokenizer.tokenize(chunk_text))
+
+def chunk_text(text, max_tokens=MAX_TOKENS):
+    return [chunk for chunk, _ in pack_chunks(text, max_tokens)]
+
+
+def summary_length_bounds(length):
     max_length = min(140, max(100, length // 3))
     min_length = min(80, max(50, length // 6))
     return min_length, max_length
 
-@app.route("/summarize", methods=["POST", "OPTIONS"])
-def summarize():
-    if request.method == "OPTIONS":
-        return jsonify({"message": "CORS preflight"}), 200
 
+def dynamic_summary_length(chunk_text):
+    return summary_length_bounds(len(tokenizer(chunk_text, add_special_tokens=False)["input_ids"]))
+
+
+def run_summary_batch(lengths, id_lists):
+    # Padded forward passes for every chunk sharing these length bounds, straight from ids;
+    # split across the worker processes when there are several
+    min_len, max_len = lengths
+    budget = MAX_TOKENS - tokenizer.num_special_tokens_to_add()
+    sequences = [tokenizer.build_inputs_with_special_tokens(ids[:budget]) for ids in id_lists]
+    with timed(STAGE_SECONDS.labels("generate")):
+        if model_client is not None:
+            output = model_client.generate(sequences, tokenizer.pad_token_id, min_len, max_len)
+        elif model_pool is not None:
+            output = model_pool.generate(sequences, tokenizer.pad_token_id, min_len, max_len)
+        else:
+            output = generate_ids(model, sequences, tokenizer.pad_token_id, min_len, max_len)
+    with timed(STAGE_SECONDS.labels("decode")):
+        return tokenizer.batch_decode(output, skip_special_tokens=True, clean_up_tokenization_spaces=True)
+
+
+def load_sentence_tokenizer():
+    import nltk
+    from nltk.tokenize.punkt import PunktSentenceTokenizer, PunktTokenizer
+
+    nltk.data.path.insert(0, NLTK_DATA_DIR)
     try:
-        data = request.get_json(force=True)
-        reviews = data.get("reviews", [])
+        return PunktTokenizer("english")
+    except LookupError:
+        # No punkt_tab: the untrained splitter still breaks on sentence punctuation, but
+        # splits after abbreviations like "approx." and so packs chunks worse
+        logger.warning("punkt_tab not found in %s or the default NLTK paths; using the untrained "
+                       "sentence tokenizer. Run backend/build.sh to fetch it.", NLTK_DATA_DIR)
+        return PunktSentenceTokenizer()
 
-        if not reviews:
-            return jsonify({"summary": "No reviews provided."}), 400
 
-        comments = [r.get("comment", "").strip() for r in reviews if r.get("comment")]
-        if not comments:
-            return jsonify({"summary": "No valid review comments found."}), 400
+def load_model():
+    global sentence_tokenizer, tokenizer, model, model_pool, model_client, model_error
+    try:
+        start = time.perf_counter()
+        sentence_tokenizer = load_sentence_tokenizer()
+        from transformers import AutoTokenizer
 
-        full_text = " ".join(comments)
-        chunks = chunk_text(full_text)
+        # Fast (Rust) tokenizer: batched encodes, and text is tokenized once per request
+        tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+        # First generate() pays for lazy init and allocator warm-up; do it before taking traffic
+        warmup_ids = tokenizer.build_inputs_with_special_tokens(
+            tokenizer("The rooms are clean and the food is good.", add_special_tokens=False)["input_ids"])
+        warmup = ([warmup_ids], tokenizer.pad_token_id, 5, 20)
+        if MODEL_SERVER:
+            # The server warms up before it listens; connecting is the readiness check
+            model_client = ModelClient(MODEL_SERVER)
+            model_client.wait_ready()
+            loaded = time.perf_counter()
+        elif WORKERS > 1:
+            # Each worker loads and warms up its own copy; this process only tokenizes
+            model_pool = ModelPool(model_name, backend_name, WORKERS, warmup=warmup)
+            model_pool.wait_ready()
+            loaded = time.perf_counter()
+        else:
+            model = load_seq2seq(model_name, backend_name)
+            loaded = time.perf_counter()
+            generate_ids(model, *warmup)
+        model_ready.set()
+        where = f"server {MODEL_SERVER}" if MODEL_SERVER else f"{backend_name}, {WORKERS} worker(s)"
+        print(f"Summarizer ready ({where}): load {loaded - start:.1f}s, "
+              f"warm-up {time.perf_counter() - loaded:.1f}s")
+    except Exception as e:
+        model_error = str(e)
+        print("Summarizer failed to load:", e)
+    finally:
+        model_loaded.set()
 
-        summaries = []
-        for i, chunk in enumerate(chunks):
-            min_len, max_len = dynamic_summary_length(chunk)
 
-            try:
-                result = summarizer(
-                    chunk,
-                    max_length=max_len,
-                    min_length=min_len,
-                    do_sample=False,
-                    truncation=True
-                )
-                summaries.append(result[0]['summary_text'])
-            except Exception as e:
-                print(f"❌ Error summarizing chunk {i+1}: {e}")
-                summaries.append(chunk)
+# Model pool workers are spawned and re-import the parent's __main__ (and this module with
+# it); they load their own copy. The process name is set before that import, parent_process() isn't.
+if multiprocessing.current_process().name == "MainProcess":
+    threading.Thread(target=load_model, name="model-loader", daemon=True).start()
+
+# With a model server the server's own micro-batcher already merges chunks from every web
+# worker; batching here as well would only add a second wait in front of it
+batcher = (MicroBatcher(run_summary_batch, BATCH_CHUNKS, BATCH_WAIT_MS / 1000)
+           if BATCH_WAIT_MS > 0 and not MODEL_SERVER else None)
+
+
+def not_ready():
+    if model_error:
+        # Loading is over and won't be retried in this process; waiting won't help
+        return jsonify({"summary": "Summarizer failed to load.", "error": model_error}), 503
+    resp = jsonify({"summary": "Summarizer is starting up, try again shortly.", "error": model_error})
+    resp.headers["Retry-After"] = "5"
+    return resp, 503
 
-        if len(summaries) > 1:
-            combined_summary_text = " ".join(summaries)
-            min_len, max_len = dynamic_summary_length(combined_summary_text)
 
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    # Liveness: the process is up and serving, model or not
+    return jsonify({"status": "ok"})
+
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    # Readiness: only route traffic here once inference is warm
+    if model_ready.is_set():
+        return jsonify({"ready": True})
+    return jsonify({"ready": False, "error": model_error}), 503
+
+
+def iter_chunk_summaries(chunks):
+    """(index, summary) per (text, ids) chunk as each finishes; a chunk that fails falls back to its own text.
+
+    Summaries are cached by content, so only chunks never seen before reach the model.
+    Closing the iterator early cancels the chunks the batcher hasn't started yet.
+    """
+    keys = [summary_key(model_id, text) for text, _ in chunks]
+    groups = {}
+    for i, (_, ids) in enumerate(chunks):
+        cached = summary_cache.get(keys[i])
+        if cached is not None:
+            CHUNKS.labels("cache").inc()
+            yield i, cached
+        else:
+            groups.setdefault(summary_length_bounds(len(ids)), []).append(i)
+
+    if batcher is not None:
+        # Shares forward passes with chunks from concurrent requests
+        futures = {batcher.submit(lengths, chunks[i][1]): i for lengths, indexes in groups.items() for i in indexes}
+        try:
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    print(f"❌ Error summarizing chunk {i + 1}: {e}")
+                    CHUNKS.labels("fallback").inc()
+                    yield i, chunks[i][0]
+                    continue
+                CHUNKS.labels("model").inc()
+                summary_cache.set(keys[i], summary)
+                yield i, summary
+        finally:
+            for future in futures:
+                future.cancel()
+        return
+
+    for lengths, indexes in groups.items():
+        for start in range(0, len(indexes), BATCH_CHUNKS):
+            batch = indexes[start:start + BATCH_CHUNKS]
             try:
-                final_result = summarizer(
-                    combined_summary_text,
-                    max_length=max_len,
-                    min_length=min_len,
-                    do_sample=False,
-                    truncation=True
-                )
-                final_summary = final_result[0]['summary_text']
+                results = run_summary_batch(lengths, [chunks[i][1] for i in batch])
             except Exception as e:
-                print(f"❌ Error in final summary step: {e}")
-                final_summary = combined_summary_text
-        else:
-            final_summary = summaries[0]
+                print(f"❌ Error summarizing chunks {[i + 1 for i in batch]}: {e}")
+                CHUNKS.labels("fallback").inc(len(batch))
+                for i in batch:
+                    yield i, chunks[i][0]
+                continue
+            CHUNKS.labels("model").inc(len(batch))
+            for i, summary in zip(batch, results):
+                summary_cache.set(keys[i], summary)
+                yield i, summary
+
+
+def summarize_chunks(chunks):
+    summaries = [None] * len(chunks)
+    for i, summary in iter_chunk_summaries(chunks):
+        summaries[i] = summary
+    return summaries
+
+
+def reduce_levels(summaries):
+    """Summarize the partial summaries level by level, yielding what is left after each, until one remains.
+
+    Each level packs consecutive summaries into windows that fit the model, so
+    nothing is truncated away; every window goes through summarize_chunks and is
+    batched and cached like a first-level chunk.
+    """
+    while len(summaries) > 1:
+        with timed(STAGE_SECONDS.labels("reduce")):
+            summaries = summarize_chunks(reduce_windows(summaries))
+        yield summaries
+
+
+def reduce_windows(summaries):
+    """One reduce level's inputs: consecutive summaries packed into windows that fit the model."""
+    windows = pack_segments(summaries)
+    if len(windows) == len(summaries):
+        # No two summaries fit in one window; reduce them all at once, truncated
+        windows = pack_segments(summaries, max_tokens=float("inf"))
+    return windows
+
+
+def reduce_summaries(summaries):
+    for summaries in reduce_levels(summaries):
+        pass
+    return summaries[0]
+
+def review_comments(reviews):
+    # Oldest first, so a new review only changes the tail chunk and the rest stay cached
+    reviews = sorted(reviews, key=lambda r: str(r.get("date") or ""))
+    return [r["comment"].strip() for r in reviews if isinstance(r.get("comment"), str) and r["comment"].strip()]
+
+
+def review_text(data):
+    """(text to summarize, None) for a /summarize body, or (None, 400 response)."""
+    if data is not None and not isinstance(data, dict):
+        return None, (jsonify({"summary": "Request body must be a JSON object."}), 400)
+    reviews = (data or {}).get("reviews", [])
+    if not reviews:
+        return None, (jsonify({"summary": "No reviews provided."}), 400)
+    if not isinstance(reviews, list) or not all(isinstance(r, dict) for r in reviews):
+        return None, (jsonify({"summary": "reviews must be a list of review objects."}), 400)
+
+    comments = review_comments(reviews)
+    if not comments:
+        return None, (jsonify({"summary": "No valid review comments found."}), 400)
+    return " ".join(comments), None
+
+
+def summarize_text(full_text):
+    summaries = summarize_chunks(pack_chunks(full_text))
+    return reduce_summaries(summaries)
+
+
+# Jobs for /summarize/jobs; the workers share forward passes with synchronous requests.
+# Job status lives in the summary cache too, so any web worker can answer a poll.
+jobs = JobQueue(
+    summarize_text,
+    workers=int(os.getenv("SUMMARY_JOB_WORKERS", "2")),
+    max_queued=int(os.getenv("SUMMARY_JOB_QUEUE", "32")),
+    keep=int(os.getenv("SUMMARY_JOB_KEEP_SECONDS", "600")),
+    store=summary_cache,
+)
+MAX_JOB_WAIT = 60  # longest long-poll a client can ask for, in seconds
+Gauge("summarizer_jobs", "Summary jobs waiting in the queue and not yet finished", ("state",),
+      function=lambda: {(state,): jobs.stats()[state] for state in ("queued", "in_flight")})
+
+@app.route("/summarize", methods=["POST", "OPTIONS"])
+def summarize():
+    if request.method == "OPTIONS":
+        return jsonify({"message": "CORS preflight"}), 200
+
+    if not model_ready.is_set():
+        return not_ready()
+
+    try:
+        full_text, error = review_text(request.get_json(force=True, silent=True))
+        if error:
+            return error
+
+        final_summary = summarize_text(full_text)
 
         return jsonify({"summary": final_summary})
 
@@ -111,5 +385,86 @@ def summarize():
         print("Error during summarization:", e)
         return jsonify({"summary": "An error occurred", "error": str(e)}), 500
 
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.route("/summarize/stream", methods=["POST", "OPTIONS"])
+def summarize_stream():
+    """/summarize as server-sent events: a `chunk` event per chunk summary as it
+    finishes, a `reduce` event per reduce level, then the `summary` event."""
+    if request.method == "OPTIONS":
+        return jsonify({"message": "CORS preflight"}), 200
+
+    if not model_ready.is_set():
+        return not_ready()
+
+    full_text, error = review_text(request.get_json(force=True, silent=True))
+    if error:
+        return error
+    chunks = pack_chunks(full_text)
+
+    def events():
+        # The server closes this generator when a write to a gone client fails;
+        # closing iter_chunk_summaries then cancels the chunks not yet started
+        try:
+            summaries = [None] * len(chunks)
+            with closing(iter_chunk_summaries(chunks)) as results:
+                for done, (i, summary) in enumerate(results, 1):
+                    summaries[i] = summary
+                    yield sse("chunk", {"index": i, "done": done, "total": len(chunks), "summary": summary})
+            for level, summaries in enumerate(reduce_levels(summaries), 1):
+                yield sse("reduce", {"level": level, "remaining": len(summaries)})
+            yield sse("summary", {"summary": summaries[0]})
+        except Exception as e:
+            print("Error during summarization:", e)
+            yield sse("error", {"summary": "An error occurred", "error": str(e)})
+
+    return Response(events(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route("/summarize/jobs", methods=["POST", "OPTIONS"])
+def submit_summary_job():
+    # Same body as /summarize; answers at once with a job id to poll
+    if request.method == "OPTIONS":
+        return jsonify({"message": "CORS preflight"}), 200
+
+    if not model_ready.is_set():
+        return not_ready()
+
+    full_text, error = review_text(request.get_json(force=True, silent=True))
+    if error:
+        return error
+
+    try:
+        # Identical review sets already queued or running share one job
+        job, created = jobs.submit(summary_key(model_id, full_text), full_text)
+    except QueueFull as e:
+        resp = jsonify({"summary": "Too many summaries in progress, try again shortly."})
+        resp.headers["Retry-After"] = str(e.retry_after)
+        return resp, 429
+
+    resp = jsonify(job.to_dict())
+    resp.headers["Location"] = f"/summarize/jobs/{job.id}"
+    return resp, 202 if created else 200
+
+
+@app.route("/summarize/jobs/<job_id>", methods=["GET"])
+def summary_job(job_id):
+    # ?wait=N long-polls up to N seconds for the job to finish
+    wait = request.args.get("wait", 0, type=float)
+    if not math.isfinite(wait):
+        return jsonify({"error": "wait must be a number of seconds"}), 400
+    wait = min(max(wait, 0), MAX_JOB_WAIT)
+    job = jobs.get(job_id, wait)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    resp = jsonify(job.to_dict())
+    if not job.done.is_set():
+        resp.headers["Retry-After"] = "2"
+    return resp
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
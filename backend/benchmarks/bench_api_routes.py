@@ -0,0 +1,263 @@
+# Per-route throughput and latency for every route in api.py and imag.py, under
+# gunicorn, against a seeded fake Supabase and a fake ImageKit.
+#
+#   cd backend && python -m benchmarks.bench_api_routes --scale 1 --concurrency 16 64 --output before.json
+#   cd backend && python -m benchmarks.bench_api_routes --scale 1 --concurrency 16 64 --baseline before.json
+#
+# The load is a fixed, seeded mix of reads and writes, so two commits see the same
+# request sequence. The JSON report keys runs by app and concurrency and routes by
+# "METHOD /rule", so reports diff cleanly; --baseline prints the p50/p99 change per route.
+# The fakes and the load generator share this process, so on small machines they
+# compete with the servers for CPU; compare reports from the same machine only.
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+from urllib.parse import quote
+
+from benchmarks.bench_async_api import free_port, wait_for
+from benchmarks.fake_supabase import FakeSupabase, seed_catalog
+from benchmarks.imagekit_stub import ImageKitStub
+from benchmarks.loadgen import run_load
+from benchmarks.reviews import synthetic_sentence
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEARCH_TERMS = ["sunrise", "royal", "pg 1", "delhi", "pune", "c00", "college of", "elite", "xyz"]
+
+
+def as_body(payload):
+    return json.dumps(payload).encode()
+
+
+class Catalog:
+    """Seeded ids and names the workload picks from, snapshotted before any writes.
+
+    Reviews are split so the ones being deleted are never the ones being edited or voted on,
+    and wishlist removals walk the seeded wishlist so each removes something that is there.
+    """
+
+    def __init__(self, tables, rng):
+        self.pgs = [(pg["id"], pg["name"]) for pg in tables["pgs"]]
+        self.colleges = [(c["id"], c["name"]) for c in tables["colleges"]]
+        self.emails = sorted({r["user_email"] for r in tables["reviews"]})
+        review_ids = [r["id"] for r in tables["reviews"]]
+        rng.shuffle(review_ids)
+        half = len(review_ids) // 2
+        self.doomed = iter(review_ids[:half])
+        self.kept = review_ids[half:]
+        wishlists = {}
+        for row in tables["wishlist"]:
+            wishlists.setdefault(row["user_email"], []).append(row["pg_id"])
+        self.wishlists = iter(sorted(wishlists.items()))
+
+
+def review_payload(rng, pg_name, email):
+    ratings = {f"rating_{k}": rng.randint(1, 5) for k in ("room", "cleanliness", "safety", "location", "warden", "food")}
+    return {"pgName": pg_name, "userEmail": email, "comment": " ".join(synthetic_sentence(rng) for _ in range(3)),
+            "sentiment": "Positive", "tags": ["wifi"], "hasFood": True, "roomType": "Double",
+            "images": [], **ratings}
+
+
+def api_routes(catalog, rng):
+    """(route label, weight, fn() -> (method, path, body)) for every api.py route."""
+    pg = lambda: rng.choice(catalog.pgs)
+    email = lambda: rng.choice(catalog.emails)
+    kept = lambda n=1: rng.sample(catalog.kept, n)
+    doomed = lambda n=1: list(itertools.islice(catalog.doomed, n))
+    counter = itertools.count()
+
+    def wishlisted(n):
+        email, pg_ids = next(catalog.wishlists, (rng.choice(catalog.emails), [pg()[0]]))
+        return {"email": email, "pg_ids": pg_ids[:n]}
+    return [
+        ("GET /pg", 10, lambda: ("GET", f"/pg?name={quote(pg()[1])}", b"")),
+        ("GET /pg (paged)", 3, lambda: ("GET", f"/pg?name={quote(pg()[1])}&reviews_limit=20", b"")),
+        ("GET /pg/<pg_id>/summary", 5, lambda: ("GET", f"/pg/{pg()[0]}/summary", b"")),
+        ("GET /colleges", 3, lambda: ("GET", "/colleges", b"")),
+        ("GET /trending-pgs", 3, lambda: ("GET", "/trending-pgs", b"")),
+        ("GET /college/<college_name>", 2, lambda: ("GET", f"/college/{quote(rng.choice(catalog.colleges)[1])}", b"")),
+        ("GET /search", 6, lambda: ("GET", f"/search?q={quote(rng.choice(SEARCH_TERMS))}", b"")),
+        ("GET /pgs", 2, lambda: ("GET", f"/pgs?college_id={rng.choice(catalog.colleges)[0]}", b"")),
+        ("GET /pgs (paged)", 4, lambda: ("GET", f"/pgs?college_id={rng.choice(catalog.colleges)[0]}&limit=20", b"")),
+        ("GET /recommend", 5, lambda: ("GET", f"/recommend?pg={quote(pg()[1])}", b"")),
+        ("GET /user-reviews", 4, lambda: ("GET", f"/user-reviews?email={quote(email())}", b"")),
+        ("GET /wishlist", 4, lambda: ("GET", f"/wishlist?email={quote(email())}", b"")),
+        ("GET /cache/stats", 1, lambda: ("GET", "/cache/stats", b"")),
+        ("POST /review/submit", 2, lambda: ("POST", "/review/submit", as_body(review_payload(rng, pg()[1], email())))),
+        ("PUT /review/update", 1, lambda: ("PUT", "/review/update",
+                                           as_body({**review_payload(rng, None, None), "review_id": kept()[0]}))),
+        ("DELETE /reviews/<review_id>", 1, lambda: ("DELETE", f"/reviews/{(doomed() or ['gone'])[0]}", b"")),
+        ("DELETE /reviews/batch", 0.5, lambda: ("DELETE", "/reviews/batch",
+                                                as_body({"review_ids": doomed(5) or ["gone"]}))),
+        ("POST /review/helpful", 2, lambda: ("POST", "/review/helpful",
+                                             as_body({"review_id": kept()[0], "user_email": email()}))),
+        ("POST /review/helpful/batch", 1, lambda: ("POST", "/review/helpful/batch",
+                                                   as_body({"review_ids": kept(5), "user_email": email()}))),
+        ("POST /pgs/add", 0.5, lambda: ("POST", "/pgs/add", as_body({
+            "name": f"Bench PG {next(counter)}", "college_id": rng.choice(catalog.colleges)[0],
+            "gender_type": "Co-ed", "has_food": "Yes"}))),
+        ("POST /wishlist/add", 1, lambda: ("POST", "/wishlist/add", as_body({"email": email(), "pg_id": pg()[0]}))),
+        ("POST /wishlist/add/batch", 0.5, lambda: ("POST", "/wishlist/add/batch", as_body(
+            {"email": email(), "pg_ids": [p[0] for p in rng.sample(catalog.pgs, 5)]}))),
+        ("DELETE /wishlist/remove", 1, lambda: ("DELETE", "/wishlist/remove", as_body(
+            (lambda w: {"email": w["email"], "pg_id": w["pg_ids"][0]})(wishlisted(1))))),
+        ("DELETE /wishlist/remove/batch", 0.5, lambda: ("DELETE", "/wishlist/remove/batch", as_body(wishlisted(5)))),
+    ]
+
+
+def imag_routes(imagekit, rng):
+    """Deletes always target fresh files on the fake, so every one succeeds."""
+    def files(n, with_urls):
+        ids = imagekit.add_files(n)
+        urls = {i: imagekit.files[i]["url"] for i in ids} if with_urls else {}
+        return ids, urls
+
+    def delete_one():
+        ids, urls = files(1, True)
+        return "POST", "/imagekit-delete", as_body({"fileId": ids[0], "url": urls[ids[0]]})
+
+    def delete_batch():
+        ids, urls = files(10, rng.random() < 0.5)
+        return "POST", "/imagekit-batch-delete", as_body({"fileIds": ids, "urls": urls})
+
+    return [
+        ("GET /imagekit-auth", 5, lambda: ("GET", "/imagekit-auth", b"")),
+        ("POST /imagekit-delete", 3, delete_one),
+        ("POST /imagekit-batch-delete", 1, delete_batch),
+    ]
+
+
+def workload(routes, rng):
+    labels, weights, makers = zip(*routes)
+    for i in itertools.count():
+        k = rng.choices(range(len(routes)), weights)[0]
+        method, path, body = makers[k]()
+        yield method, path, body, labels[k]
+
+
+def start_app(module, args, env):
+    port = free_port()
+    cmd = [sys.executable, "-m", "gunicorn", "-w", str(args.workers), "-k", "gthread", "--threads",
+           str(args.threads), "-b", f"127.0.0.1:{port}", "--backlog", "4096", "--log-level", "warning",
+           f"{module}:app"]
+    # Route output (the apps print on every error) would drown the report
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+                            stderr=None if args.verbose else subprocess.DEVNULL)
+    wait_for(port)
+    return proc, port
+
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def rounded(value):
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, dict):
+        return {k: rounded(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [rounded(v) for v in value]
+    return value
+
+
+def compare(baseline, report):
+    """Per-route p50/p99/throughput change against an earlier report, on stderr."""
+    old_runs = {(r["app"], r["concurrency"]): r for r in baseline["runs"]}
+    for run in report["runs"]:
+        old = old_runs.get((run["app"], run["concurrency"]))
+        if old is None:
+            continue
+        print(f"-- {run['app']} c={run['concurrency']} vs {baseline.get('commit') or 'baseline'}", file=sys.stderr)
+        for route, now in run["routes"].items():
+            before = old["routes"].get(route)
+            if not before or not before["count"] or not now["count"]:
+                continue
+            change = lambda key: (now[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            print(f"   {route:<32} p50 {before['p50_ms']:8.1f} -> {now['p50_ms']:8.1f}ms ({change('p50_ms'):+6.1f}%)  "
+                  f"p99 {before['p99_ms']:8.1f} -> {now['p99_ms']:8.1f}ms ({change('p99_ms'):+6.1f}%)  "
+                  f"{change('throughput_rps'):+6.1f}% req/s", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--apps", nargs="+", default=["api", "imag"], choices=["api", "imag"])
+    parser.add_argument("--scale", type=float, default=1.0, help="seed data size, 1 = 400 PGs / 8000 reviews")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per run")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of load before measuring")
+    parser.add_argument("--supabase-latency-ms", type=float, default=20.0)
+    parser.add_argument("--imagekit-latency-ms", type=float, default=60.0)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--output", help="write the JSON report here as well")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--verbose", action="store_true", help="show the servers' stderr")
+    args = parser.parse_args()
+
+    tables = seed_catalog(args.scale, args.seed)
+    rng = random.Random(args.seed)
+    catalog = Catalog(tables, rng)
+    supabase = FakeSupabase(tables, latency=args.supabase_latency_ms / 1000).start()
+    imagekit = ImageKitStub(latency=args.imagekit_latency_ms / 1000).start()
+    tmp = tempfile.mkdtemp(prefix="bench_api_routes")
+    env = {**os.environ, "SUPABASE_URL": supabase.url, "SUPABASE_API_KEY": "bench",
+           "IMAGEKIT_API_URL": imagekit.url, "IMAGEKIT_PRIVATE_API_KEY": "bench", "IMAGEKIT_PUBLIC_API_KEY": "bench",
+           "IMAGE_CLEANUP_PATH": os.path.join(tmp, "image_cleanup.sqlite3"), "IMAGE_RECONCILE_INTERVAL": "0",
+           "CACHE_PATH": os.path.join(tmp, "catalog_cache.sqlite3")}
+    routes = {"api": api_routes(catalog, rng), "imag": imag_routes(imagekit, rng)}
+
+    report = {"commit": commit(), "python": platform.python_version(),
+              "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "verbose")},
+              "rows": {name: len(rows) for name, rows in tables.items()}, "runs": []}
+    try:
+        for app in args.apps:
+            proc, port = start_app(app, args, {**env, "METRICS_DIR": os.path.join(tmp, f"metrics-{app}")})
+            try:
+                # Warm-up also lets the search and recommend indexes finish building
+                asyncio.run(run_load("127.0.0.1", port, workload(routes[app], rng), 4, args.warmup))
+                for concurrency in args.concurrency:
+                    supabase.calls.clear()
+                    imagekit.calls.clear()
+                    result = asyncio.run(run_load("127.0.0.1", port, workload(routes[app], rng),
+                                                  concurrency, args.duration))
+                    result = {"app": app, **result, "upstream_calls": {
+                        "supabase": dict(sorted(supabase.calls.items())), "imagekit": dict(imagekit.calls)}}
+                    report["runs"].append(rounded(result))
+                    print(f"{app:<5} c={concurrency:<4} {result['throughput_rps']:8.1f} req/s "
+                          f"p50={result['p50_ms']:8.1f}ms p95={result['p95_ms']:8.1f}ms "
+                          f"p99={result['p99_ms']:8.1f}ms errors={result['errors']}", file=sys.stderr)
+                    for route, stats in result["routes"].items():
+                        print(f"   {route:<32} n={stats['count']:<6} p50={stats['p50_ms']:8.1f}ms "
+                              f"p95={stats['p95_ms']:8.1f}ms p99={stats['p99_ms']:8.1f}ms errors={stats['errors']}",
+                              file=sys.stderr)
+            finally:
+                proc.terminate()
+                proc.wait()
+    finally:
+        supabase.stop()
+        imagekit.stop()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(json.load(f), report)
+    out = json.dumps(report, indent=2)
+    print(out)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out)
+
+
+if __name__ == "__main__":
+    main()
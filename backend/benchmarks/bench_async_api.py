@@ -0,0 +1,141 @@
+# Threaded vs async (gevent) serving of api.py under many concurrent clients.
+#
+#   cd backend && python -m benchmarks.bench_async_api --clients 100 500 1000
+#
+# Both modes run under gunicorn against a local PostgREST stub that sleeps
+# --latency-ms per call, standing in for a slow Supabase. The "upstream"
+# workload drives uncached routes, so its numbers reflect how many requests can
+# wait on Supabase at once. The "cached" workload mixes in catalog routes served
+# from the sqlite catalog cache, the path where each worker's sqlite calls run.
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+from benchmarks.loadgen import run_load
+from benchmarks.fake_supabase import FakeSupabase, seed_catalog
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def upstream_workload(tables):
+    emails = sorted({r["user_email"] for r in tables["reviews"]})
+    college_ids = [c["id"] for c in tables["colleges"]]
+    for i in itertools.count():
+        email = emails[i % len(emails)]
+        yield from [
+            ("GET", f"/user-reviews?email={email}", b""),
+            ("GET", f"/wishlist?email={email}", b""),
+            ("GET", f"/pgs?college_id={college_ids[i % len(college_ids)]}&limit=20", b""),
+        ]
+
+
+def cached_workload(tables):
+    # A small hot set, so after the first pass nearly every request is a cache hit
+    pg_names = [pg["name"] for pg in tables["pgs"][:50]]
+    college_ids = [c["id"] for c in tables["colleges"]]
+    upstream = upstream_workload(tables)
+    for i in itertools.count():
+        yield from [
+            ("GET", "/colleges", b""),
+            ("GET", "/trending-pgs", b""),
+            ("GET", f"/pg?name={quote(pg_names[i % len(pg_names)])}", b""),
+            ("GET", f"/pgs?college_id={college_ids[i % len(college_ids)]}", b""),
+            next(upstream),
+        ]
+
+
+WORKLOADS = {"upstream": upstream_workload, "cached": cached_workload}
+
+
+MODES = {
+    # What the app is deployed as today: gthread workers, one request per thread
+    "threaded": lambda args: ["-k", "gthread", "--threads", str(args.threads), "api:app"],
+    "async": lambda args: ["-k", "gevent", "--worker-connections", str(args.worker_connections),
+                           "serve_async:app"],
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on :{port} did not start")
+
+
+def start_server(mode, args, stub_url):
+    port = free_port()
+    env = {**os.environ, "SUPABASE_URL": stub_url, "SUPABASE_API_KEY": "bench",
+           "SUPABASE_POOL_SIZE": str(args.pool_size),
+           "CACHE_PATH": os.path.join(tempfile.mkdtemp(), "catalog_cache.sqlite3")}
+    cmd = [sys.executable, "-m", "gunicorn", "-w", str(args.workers), "-b", f"127.0.0.1:{port}",
+           "--backlog", "4096", "--log-level", "warning", *MODES[mode](args)]
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env)
+    wait_for(port)
+    return proc, port
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per run")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="simulated Supabase latency")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=16, help="threads per worker (threaded mode)")
+    parser.add_argument("--worker-connections", type=int, default=1000, help="per worker (async mode)")
+    parser.add_argument("--pool-size", type=int, default=200, help="upstream connections per worker")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--workloads", nargs="+", default=list(WORKLOADS), choices=list(WORKLOADS))
+    parser.add_argument("--output", help="write the JSON report here as well")
+    args = parser.parse_args()
+
+    tables = seed_catalog(scale=0.25)
+    stub = FakeSupabase(tables, latency=args.latency_ms / 1000).start()
+    report = {"latency_ms": args.latency_ms, "workers": args.workers, "runs": []}
+    try:
+        for mode in args.modes:
+            proc, port = start_server(mode, args, stub.url)
+            try:
+                for name in args.workloads:
+                    workload = WORKLOADS[name]
+                    asyncio.run(run_load("127.0.0.1", port, workload(tables), 10, 2))  # warm-up
+                    for clients in args.clients:
+                        result = asyncio.run(run_load("127.0.0.1", port, workload(tables), clients, args.duration))
+                        result["mode"] = mode
+                        result["workload"] = name
+                        report["runs"].append(result)
+                        print(f"{mode:<9} {name:<9} clients={clients:<5} {result['throughput_rps']:8.1f} req/s "
+                              f"p50={result['p50_ms']:8.1f}ms p95={result['p95_ms']:8.1f}ms "
+                              f"p99={result['p99_ms']:8.1f}ms errors={result['errors']}", file=sys.stderr)
+            finally:
+                proc.terminate()
+                proc.wait()
+    finally:
+        stub.stop()
+
+    out = json.dumps(report, indent=2)
+    print(out)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# Summarizer inference backends on a fixed review corpus: load time, per-chunk
+# latency, resident memory, and ROUGE of each backend's summaries against fp32.
+#
+#   cd backend && python -m benchmarks.bench_backends --chunks 8
+#
+# Each backend runs in its own process so memory numbers don't bleed into each
+# other. Uses SUMMARIZER_MODEL like app.py; offline, build a stand-in with
+# `python -m benchmarks.tiny_bart /tmp/bart --d-model 512 --layers 6`.
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.reviews import synthetic_reviews
+from benchmarks.rouge import mean_rouge
+from benchmarks.stats import summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def worker(backend, args):
+    os.environ.update(SUMMARIZER_BACKEND=backend, SUMMARIZER_BATCH_WAIT_MS="0",
+                      SUMMARY_CACHE_PATH=os.path.join(tempfile.mkdtemp(), "summary.sqlite3"))
+    # Runtime libraries first, so the baseline leaves only the model's own memory
+    import torch  # noqa: F401
+    if backend.startswith("onnx"):
+        import optimum.onnxruntime  # noqa: F401
+    baseline = rss_mb()
+    start = time.perf_counter()
+    import app as app_module
+    app_module.model_loaded.wait()
+    load_s = time.perf_counter() - start
+    if app_module.model_error:
+        raise SystemExit(app_module.model_error)
+    loaded_rss = rss_mb()
+
+    text = " ".join(r["comment"] for r in synthetic_reviews(args.reviews, seed=args.seed))
+    chunks = app_module.pack_chunks(text)[:args.chunks]
+    samples, summaries = [], []
+    for _, ids in chunks:
+        t = time.perf_counter()
+        summaries.append(app_module.run_summary_batch(app_module.summary_length_bounds(len(ids)), [ids])[0])
+        samples.append(time.perf_counter() - t)
+
+    return {
+        "backend": backend,
+        "load_s": round(load_s, 2),
+        "model_rss_mb": round(loaded_rss - baseline, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "chunk_latency": summarize(samples),
+        "summaries": summaries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx", "onnx-int8"])
+    parser.add_argument("--chunks", type=int, default=8, help="chunks summarized per backend")
+    parser.add_argument("--reviews", type=int, default=600, help="size of the fixed corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args)))
+        return
+
+    results = {}
+    for backend in args.backends:
+        cmd = [sys.executable, "-m", "benchmarks.bench_backends", "--worker", backend,
+               "--chunks", str(args.chunks), "--reviews", str(args.reviews), "--seed", str(args.seed)]
+        out = subprocess.run(cmd, cwd=BACKEND_DIR, capture_output=True, text=True)
+        if out.returncode:
+            print(f"{backend} failed:\n{out.stderr[-2000:]}", file=sys.stderr)
+            continue
+        results[backend] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    reference = results.get("torch")
+    report = {"corpus": {"reviews": args.reviews, "seed": args.seed, "chunks": args.chunks}, "backends": {}}
+    for backend, r in results.items():
+        entry = {k: v for k, v in r.items() if k != "summaries"}
+        if reference:
+            entry["rouge_vs_fp32"] = mean_rouge(r["summaries"], reference["summaries"])
+            entry["speedup_p50"] = round(reference["chunk_latency"]["p50_ms"] / r["chunk_latency"]["p50_ms"], 2)
+            entry["model_memory_ratio"] = round(r["model_rss_mb"] / reference["model_rss_mb"], 2)
+        report["backends"][backend] = entry
+        print(f"{backend:<6} load={r['load_s']:6.1f}s p50={r['chunk_latency']['p50_ms']:8.1f}ms "
+              f"model_rss={r['model_rss_mb']:7.1f}MB peak={r['peak_rss_mb']:7.1f}MB "
+              f"rouge={entry.get('rouge_vs_fp32')}", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# /imagekit-batch-delete wall time against batch size: the old serial, un-pooled
+# delete loop vs. concurrent deletes over a pooled session plus the CDN purge.
+#
+#   cd backend && python -m benchmarks.bench_imagekit_delete --sizes 1 10 50 100 --latency-ms 80
+#
+# Runs against a local ImageKit stub; --rate-limit makes it answer 429s so the
+# retry path is exercised too.
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+import requests
+
+from benchmarks.imagekit_stub import ImageKitStub
+
+
+def serial_delete(base_url, file_ids):
+    # The loop imagekit_batch_delete ran before: one fresh connection per file, no purge
+    auth_header = base64.b64encode(b"bench:").decode()
+    deleted = []
+    for file_id in file_ids:
+        resp = requests.delete(f"{base_url}/files/{file_id}", headers={"Authorization": f"Basic {auth_header}"})
+        if resp.status_code == 204:
+            deleted.append(file_id)
+    return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10, 25, 50, 100])
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="simulated ImageKit latency")
+    parser.add_argument("--rate-limit", type=int, help="stub requests per second before 429s")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    stub = ImageKitStub(latency=args.latency_ms / 1000, rate_limit=args.rate_limit).start()
+    os.environ["IMAGEKIT_API_URL"] = stub.url
+    os.environ.setdefault("IMAGEKIT_PRIVATE_API_KEY", "bench")
+    import imag
+    client = imag.app.test_client()
+
+    def with_urls(ids):
+        return {"fileIds": ids, "urls": {i: stub.files[i]["url"] for i in ids}}
+
+    modes = [
+        ("serial, no purge (before)", lambda ids: len(serial_delete(stub.url, ids))),
+        ("concurrent + purge, urls given",
+         lambda ids: len(client.post("/imagekit-batch-delete", json=with_urls(ids)).json["deleted"])),
+        ("concurrent + purge, urls looked up",
+         lambda ids: len(client.post("/imagekit-batch-delete", json={"fileIds": ids}).json["deleted"])),
+    ]
+    report = {"latency_ms": args.latency_ms, "rate_limit": args.rate_limit, "runs": []}
+    try:
+        for size in args.sizes:
+            for name, run in modes:
+                best = None
+                for _ in range(args.repeats):
+                    ids = stub.add_files(size)
+                    stub.calls.clear()
+                    start = time.perf_counter()
+                    deleted = run(ids)
+                    elapsed = time.perf_counter() - start
+                    assert deleted == size, f"{name}: deleted {deleted} of {size}"
+                    best = elapsed if best is None else min(best, elapsed)
+                report["runs"].append({"mode": name, "batch": size, "wall_ms": round(best * 1000, 1),
+                                       "upstream_calls": dict(stub.calls)})
+                print(f"batch={size:<4} {name:<36} {best * 1000:9.1f}ms  calls={dict(stub.calls)}",
+                      file=sys.stderr)
+    finally:
+        stub.stop()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# /summarize wall time against the number of model worker processes, and what the
+# hierarchical reduce keeps that the old single truncated reduce dropped.
+#
+#   cd backend && python -m benchmarks.bench_map_reduce --workers 1 2 4 --reviews 1000
+#
+# Each worker count runs in its own process with an empty summary cache. Uses
+# SUMMARIZER_MODEL like app.py; offline, build a stand-in with benchmarks.tiny_bart.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.reviews import synthetic_reviews
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def worker(workers, args):
+    os.environ.update(SUMMARIZER_WORKERS=str(workers), SUMMARIZER_BATCH_WAIT_MS="0",
+                      SUMMARY_CACHE_PATH=os.path.join(tempfile.mkdtemp(), "summary.sqlite3"))
+    import app as app_module
+    app_module.model_loaded.wait()
+    if app_module.model_error:
+        raise SystemExit(app_module.model_error)
+
+    levels = []
+    summarize_chunks = app_module.summarize_chunks
+
+    def recording(chunks):
+        levels.append({"chunks": len(chunks), "tokens": sum(len(ids) for _, ids in chunks)})
+        return summarize_chunks(chunks)
+
+    app_module.summarize_chunks = recording
+    client = app_module.app.test_client()
+    start = time.perf_counter()
+    resp = client.post("/summarize", json={"reviews": synthetic_reviews(args.reviews, seed=args.seed)})
+    wall = time.perf_counter() - start
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+
+    budget = app_module.MAX_TOKENS - app_module.tokenizer.num_special_tokens_to_add()
+    # The old reduce fed every first-level summary to one call truncated at the budget
+    reduce_input = levels[1]["tokens"] if len(levels) > 1 else 0
+    return {
+        "workers": workers,
+        "threads_per_worker": app_module.model_pool.threads if app_module.model_pool else None,
+        "wall_s": round(wall, 2),
+        "levels": levels,
+        "single_pass_dropped_tokens": max(0, reduce_input - budget),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--reviews", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args)))
+        return
+
+    report = {"reviews": args.reviews, "seed": args.seed, "cores": os.cpu_count(), "runs": []}
+    for workers in dict.fromkeys(args.workers):
+        cmd = [sys.executable, "-m", "benchmarks.bench_map_reduce", "--worker", str(workers),
+               "--reviews", str(args.reviews), "--seed", str(args.seed)]
+        out = subprocess.run(cmd, cwd=BACKEND_DIR, capture_output=True, text=True)
+        if out.returncode:
+            print(f"{workers} workers failed:\n{out.stderr[-2000:]}", file=sys.stderr)
+            continue
+        run = json.loads(out.stdout.strip().splitlines()[-1])
+        report["runs"].append(run)
+        print(f"workers={workers:<3} wall={run['wall_s']:7.2f}s levels={[l['chunks'] for l in run['levels']]} "
+              f"single-pass dropped={run['single_pass_dropped_tokens']} tokens", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
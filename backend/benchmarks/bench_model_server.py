@@ -0,0 +1,113 @@
+# Memory of N gunicorn workers for app.py: one model copy per worker vs. one shared
+# model_server.py process, idle and under /summarize load.
+#
+#   cd backend && python -m benchmarks.bench_model_server --workers 1 2 4
+#
+# Memory is PSS summed over every process in the deployment, so shared library
+# pages count once and the model weights count once per copy. Uses SUMMARIZER_MODEL
+# like app.py; offline, build a stand-in with benchmarks.tiny_bart.
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.bench_async_api import free_port, wait_for
+from benchmarks.loadgen import run_load
+from benchmarks.reviews import synthetic_reviews
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def tree(pid):
+    pids = [pid]
+    for child in open(f"/proc/{pid}/task/{pid}/children").read().split():
+        pids += tree(int(child))
+    return pids
+
+
+def pss_mb(*roots):
+    total = 0
+    for pid in (p for root in roots for p in tree(root.pid)):
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+        except (FileNotFoundError, ProcessLookupError):
+            pass
+    return round(total / 1024, 1)
+
+
+def wait_ready(port, workers, timeout=600):
+    # Requests land on arbitrary workers; enough 200s in a row means all have loaded
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while streak < 4 * workers:
+        if time.monotonic() > deadline:
+            raise RuntimeError("workers did not become ready")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=5)
+            streak += 1
+        except OSError:
+            streak = 0
+            time.sleep(0.5)
+
+
+def workload(reviews):
+    for seed in itertools.count():
+        yield "POST", "/summarize", json.dumps({"reviews": synthetic_reviews(reviews, seed=seed)}).encode()
+
+
+def run(mode, workers, args, env):
+    procs = []
+    if mode == "shared":
+        tmp = tempfile.mkdtemp()
+        env = {**env, "SUMMARIZER_SERVER": os.path.join(tmp, "summarizer.sock"),
+               "SUMMARIZER_SERVER_KEY_FILE": os.path.join(tmp, "summarizer.key")}
+        procs.append(subprocess.Popen([sys.executable, "model_server.py"], cwd=BACKEND_DIR, env=env))
+    port = free_port()
+    procs.append(subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-w", str(workers), "-k", "gthread", "--threads", "4",
+         "-b", f"127.0.0.1:{port}", "--timeout", "600", "--log-level", "warning", "app:app"],
+        cwd=BACKEND_DIR, env=env))
+    try:
+        wait_for(port)
+        wait_ready(port, workers)
+        idle = pss_mb(*procs)
+        load = asyncio.run(run_load("127.0.0.1", port, workload(args.reviews), args.concurrency, args.duration))
+        return {"mode": mode, "workers": workers, "idle_pss_mb": idle, "loaded_pss_mb": pss_mb(*procs),
+                "throughput_rps": load["throughput_rps"], "p50_ms": load["p50_ms"], "errors": load["errors"]}
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+            proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="gunicorn workers")
+    parser.add_argument("--modes", nargs="+", default=["per-worker", "shared"], choices=["per-worker", "shared"])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--reviews", type=int, default=40, help="reviews per /summarize request")
+    args = parser.parse_args()
+
+    env = {**os.environ, "SUMMARIZER_WORKERS": "1",
+           "SUMMARY_CACHE_PATH": os.path.join(tempfile.mkdtemp(), "summary.sqlite3")}
+    report = {"runs": []}
+    for workers in args.workers:
+        for mode in args.modes:
+            result = run(mode, workers, args, env)
+            report["runs"].append(result)
+            print(f"{mode:<10} workers={workers:<2} idle={result['idle_pss_mb']:8.1f}MB "
+                  f"loaded={result['loaded_pss_mb']:8.1f}MB {result['throughput_rps']:6.2f} req/s "
+                  f"errors={result['errors']}", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
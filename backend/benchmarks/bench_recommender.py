@@ -0,0 +1,91 @@
+# Fit / top-k / query / fold-in cost of pg_recommender.RecommenderEngine on synthetic PGs.
+#
+#   cd backend && python -m benchmarks.bench_recommender --sizes 10000 100000 1000000
+#
+# Peak RSS is process-wide (ru_maxrss), so run one size per process for clean
+# memory numbers: --sizes 1000000
+import argparse
+import random
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import pg_recommender
+from pg_recommender import RecommenderEngine
+
+TAGS = ["wifi", "food", "ac", "laundry", "gym", "parking", "security", "hot water", "power backup"]
+
+
+def synthetic_pgs(n, vocab_size, words_per_pg, seed):
+    rng = np.random.default_rng(seed)
+    random.seed(seed)
+    vocab = np.array([f"term{i}" for i in range(vocab_size)])
+    # Zipf-ish word frequencies, like real review text
+    weights = 1.0 / np.arange(1, vocab_size + 1)
+    weights /= weights.sum()
+    words = rng.choice(vocab, size=(n, words_per_pg), p=weights)
+    return pd.DataFrame({
+        "id": np.arange(n),
+        "name": [f"PG {i}" for i in range(n)],
+        "college_id": rng.integers(0, max(1, n // 200), size=n),
+        "avg_rating": np.round(rng.uniform(1, 5, size=n), 1),
+        "gender_type": rng.choice(["Boys", "Girls", "Co-ed"], size=n),
+        "tags": [random.sample(TAGS, 3) for _ in range(n)],
+        "description": "",
+        "comment": [" ".join(row) for row in words],
+    })
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run(n, args):
+    df = synthetic_pgs(n, args.vocab, args.words, args.seed)
+    engine = RecommenderEngine(top_k=args.top_k)
+
+    start = time.perf_counter()
+    engine.fit(df)
+    fit_s = time.perf_counter() - start
+
+    names = df["name"].sample(min(200, n), random_state=args.seed).tolist()
+    start = time.perf_counter()
+    for name in names:
+        engine.recommend(name)
+    query_ms = (time.perf_counter() - start) / len(names) * 1000
+
+    edits = df.sample(args.fold_in, random_state=args.seed).to_dict("records")
+    for row in edits:
+        row["comment"] += " freshly added review text"
+    start = time.perf_counter()
+    engine.fold_in(edits)
+    fold_ms = (time.perf_counter() - start) * 1000
+
+    matrix = engine.matrix
+    print(f"n={n:>8}  fit+topk={fit_s:8.2f}s  query={query_ms:7.3f}ms  "
+          f"fold_in({args.fold_in})={fold_ms:8.1f}ms  nnz={matrix.nnz:>10}  "
+          f"neighbours={(engine.neighbours.nbytes + engine.scores.nbytes) / 2**20:7.1f}MB  "
+          f"peak_rss={peak_rss_mb():8.1f}MB  dense_NxN_would_be={n * n * 8 / 2**30:9.1f}GB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--vocab", type=int, default=20_000)
+    parser.add_argument("--words", type=int, default=40)
+    parser.add_argument("--top-k", type=int, default=pg_recommender.TOP_K)
+    parser.add_argument("--fold-in", type=int, default=5)
+    parser.add_argument("--chunk-budget-mb", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    pg_recommender.CHUNK_BUDGET_BYTES = args.chunk_budget_mb * 1024 * 1024
+    for n in args.sizes:
+        run(n, args)
+
+
+if __name__ == "__main__":
+    main()
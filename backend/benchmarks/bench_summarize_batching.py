@@ -0,0 +1,83 @@
+# /summarize throughput and latency: one chunk per forward pass vs. one batch
+# per request vs. micro-batching chunks across concurrent requests.
+#
+#   cd backend && python -m benchmarks.bench_summarize_batching --requests 24 --concurrency 4
+#
+# Uses SUMMARIZER_MODEL (default: the production distilbart checkpoint). Offline,
+# build a stand-in first with `python -m benchmarks.tiny_bart /tmp/tiny-bart`.
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.reviews import synthetic_reviews
+from benchmarks.stats import summarize, format_row
+
+
+def payloads(n, reviews_per_request, seed):
+    return [{"reviews": synthetic_reviews(reviews_per_request, seed=seed + i)} for i in range(n)]
+
+
+def run(app_module, bodies, concurrency):
+    client = app_module.app.test_client()
+    samples = []
+
+    def one(body):
+        start = time.perf_counter()
+        resp = client.post("/summarize", json=body)
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+        samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, bodies))
+    return summarize(samples, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=24)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--reviews", type=int, default=120, help="reviews per request")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--wait-ms", type=float, default=15.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ["SUMMARIZER_BATCH_WAIT_MS"] = "0"  # modes below install their own batcher
+    import app as app_module
+    app_module.model_loaded.wait()
+    if app_module.model_error:
+        raise SystemExit(app_module.model_error)
+    from microbatch import MicroBatcher
+
+    bodies = payloads(args.requests, args.reviews, args.seed)
+    chunks = len(app_module.chunk_text(" ".join(r["comment"] for r in bodies[0]["reviews"])))
+    print(f"{chunks} chunks per request, {args.requests} requests, concurrency {args.concurrency}",
+          file=sys.stderr)
+
+    modes = [
+        ("per-chunk (before)", 1, None),
+        ("batched per request", args.max_batch, None),
+        ("micro-batched", args.max_batch, args.wait_ms),
+    ]
+    report = {"chunks_per_request": chunks, "requests": args.requests,
+              "concurrency": args.concurrency, "modes": {}}
+    run(app_module, bodies[:1], 1)  # warm-up
+    for name, max_batch, wait_ms in modes:
+        app_module.MAX_BATCH = max_batch
+        app_module.BATCH_CHUNKS = max_batch * app_module.WORKERS
+        app_module.batcher = (MicroBatcher(app_module.run_summary_batch, app_module.BATCH_CHUNKS, wait_ms / 1000)
+                              if wait_ms else None)
+        result = run(app_module, bodies, args.concurrency)
+        if app_module.batcher is not None:
+            result["batcher"] = app_module.batcher.stats()
+        report["modes"][name] = result
+        print(format_row(name, result), file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# Summarizer cost against review volume: chunk_text, dynamic_summary_length and
+# summarize_text called directly, then the same corpus through /summarize.
+#
+#   cd backend && python -m benchmarks.bench_summarizer --sizes 10 100 1000 10000 --threads 1
+#   cd backend && python -m benchmarks.bench_summarizer --corpus reviews.json --output after.json --baseline before.json
+#
+# Each corpus size runs in its own process with an empty summary cache, so model
+# load time and peak RSS are measured per size and don't bleed into each other.
+# The process uses --threads torch threads and --workers model processes. Peak RSS is
+# this process only; with --workers > 1 the pool's copies of the model aren't counted.
+# Per-stage times come from app.STAGE_SECONDS. The stages overlap: reduce includes
+# the tokenize and generate time of its levels.
+# Uses SUMMARIZER_MODEL and SUMMARIZER_BACKEND like app.py. Offline, build a
+# stand-in with `python -m benchmarks.tiny_bart /tmp/tiny-bart`.
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.reviews import synthetic_reviews
+from benchmarks.stats import format_row, summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def proc_status(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def reset_peak_rss():
+    """Restart VmHWM from the current RSS, so the peak excludes model loading; False if unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def load_corpus(args, size):
+    """`size` reviews: a slice of --corpus (repeated if it's short), or synthetic ones from --seed."""
+    if not args.corpus:
+        return synthetic_reviews(size, seed=args.seed)
+    with open(args.corpus) as f:
+        if args.corpus.endswith(".jsonl"):
+            reviews = [json.loads(line) for line in f if line.strip()]
+        else:
+            reviews = json.load(f)
+    if isinstance(reviews, dict):
+        reviews = reviews["reviews"]  # a saved /summarize body
+    reviews = [r if isinstance(r, dict) else {"comment": r} for r in reviews]
+    if not reviews:
+        raise SystemExit(f"{args.corpus} has no reviews")
+    if len(reviews) < size:
+        print(f"{args.corpus} has {len(reviews)} reviews, repeating them to {size}", file=sys.stderr)
+    return [dict(reviews[i % len(reviews)], id=i) for i in range(size)]
+
+
+def stage_totals(histogram):
+    return {values[0]: (sum(counts), total) for values, (counts, total) in histogram.samples().items()}
+
+
+def counter_totals(counter):
+    return {values[0]: value for values, value in counter.samples().items()}
+
+
+class Recorder:
+    """Counts what reaches the model: chunks and tokens in, per level, and the summaries out."""
+
+    def __init__(self, app_module):
+        self.app = app_module
+        self.original = app_module.summarize_chunks
+        self.levels = []
+        self.outputs = []
+        app_module.summarize_chunks = self.summarize_chunks
+
+    def summarize_chunks(self, chunks):
+        summaries = self.original(chunks)
+        self.levels.append({"chunks": len(chunks), "tokens": sum(len(ids) for _, ids in chunks)})
+        self.outputs.extend(summaries)
+        return summaries
+
+    def measure(self, call):
+        """Run `call` on a cold cache; its wall time plus the stage, chunk and token counts it caused."""
+        app_module = self.app
+        app_module.summary_cache.clear()
+        self.levels, self.outputs = [], []
+        stages, chunks = stage_totals(app_module.STAGE_SECONDS), counter_totals(app_module.CHUNKS)
+        start = time.perf_counter()
+        call()
+        wall = time.perf_counter() - start
+        stages_after, chunks_after = stage_totals(app_module.STAGE_SECONDS), counter_totals(app_module.CHUNKS)
+        generated = app_module.tokenizer(self.outputs, add_special_tokens=False)["input_ids"] if self.outputs else []
+        return {
+            "wall_s": wall,
+            "stages_ms": {stage: (total - stages.get(stage, (0, 0.0))[1]) * 1000
+                          for stage, (_, total) in stages_after.items()},
+            "chunks": {source: n - chunks.get(source, 0) for source, n in chunks_after.items()},
+            "levels": self.levels,
+            "input_tokens": sum(level["tokens"] for level in self.levels),
+            "output_tokens": sum(len(ids) for ids in generated),
+        }
+
+
+def aggregate(runs):
+    """Per-stage mean ms, token throughput and the level shape over repeated runs of one mode."""
+    walls = [r["wall_s"] for r in runs]
+    total = sum(walls)
+    stages = sorted({stage for r in runs for stage in r["stages_ms"]})
+    first = runs[0]
+    return {
+        "latency": summarize(walls),
+        "stages_ms": {stage: sum(r["stages_ms"].get(stage, 0.0) for r in runs) / len(runs) for stage in stages},
+        "chunks": first["chunks"],
+        "levels": first["levels"],
+        "input_tokens": first["input_tokens"],
+        "output_tokens": first["output_tokens"],
+        "input_tokens_per_s": sum(r["input_tokens"] for r in runs) / total if total else 0.0,
+        "output_tokens_per_s": sum(r["output_tokens"] for r in runs) / total if total else 0.0,
+    }
+
+
+def worker(size, args):
+    threads = str(args.threads)
+    os.environ.update(SUMMARIZER_WORKERS=str(args.workers), SUMMARIZER_BATCH_WAIT_MS=str(args.wait_ms),
+                      SUMMARIZER_MAX_BATCH=str(args.max_batch), OMP_NUM_THREADS=threads, MKL_NUM_THREADS=threads,
+                      TOKENIZERS_PARALLELISM="false",
+                      SUMMARY_CACHE_PATH=os.path.join(tempfile.mkdtemp(), "summary.sqlite3"))
+    random.seed(args.seed)
+    # Before app.py imports it, so the baseline leaves only the model's own memory and load time
+    import torch
+    torch.set_num_threads(args.threads)
+    torch.manual_seed(args.seed)
+    baseline_rss = proc_status("VmRSS")
+    start = time.perf_counter()
+    import app as app_module
+    app_module.model_loaded.wait()
+    load_s = time.perf_counter() - start
+    if app_module.model_error:
+        raise SystemExit(app_module.model_error)
+    loaded_rss = proc_status("VmRSS")
+    peak_reset = reset_peak_rss()
+
+    reviews = load_corpus(args, size)
+    text = " ".join(app_module.review_comments(reviews))
+    packed = app_module.pack_chunks(text)
+    recorder = Recorder(app_module)
+    client = app_module.app.test_client()
+
+    chunk_samples, length_samples = [], []
+    for _ in range(args.repeats):
+        t = time.perf_counter()
+        chunks = app_module.chunk_text(text)
+        chunk_samples.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        for chunk in chunks:
+            app_module.dynamic_summary_length(chunk)
+        length_samples.append(time.perf_counter() - t)
+
+    def post():
+        resp = client.post("/summarize", json={"reviews": reviews})
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+
+    direct = aggregate([recorder.measure(lambda: app_module.summarize_text(text)) for _ in range(args.repeats)])
+    route = aggregate([recorder.measure(post) for _ in range(args.repeats)])
+
+    if peak_reset:
+        peak_rss = proc_status("VmHWM")
+    else:
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {
+        "comments": size,
+        "characters": len(text),
+        "chunks": len(packed),
+        "tokens": sum(len(ids) for _, ids in packed),
+        "load_s": load_s,
+        "model_rss_mb": loaded_rss - baseline_rss,
+        "peak_rss_mb": peak_rss,
+        "peak_rss_includes_load": not peak_reset,
+        "chunk_text": summarize(chunk_samples),
+        "dynamic_summary_length": summarize(length_samples),
+        "summarize_text": direct,
+        "route": route,
+    }
+
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def rounded(value):
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, dict):
+        return {k: rounded(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [rounded(v) for v in value]
+    return value
+
+
+def compare(baseline, report):
+    """Per-size latency, throughput, load time and memory change against an earlier report, on stderr."""
+    old_sizes = {r["comments"]: r for r in baseline["sizes"]}
+    print(f"-- vs {baseline.get('commit') or 'baseline'}", file=sys.stderr)
+    for now in report["sizes"]:
+        before = old_sizes.get(now["comments"])
+        if before is None:
+            continue
+        change = lambda old, new: (new - old) / old * 100 if old else 0.0
+        for mode in ("summarize_text", "route"):
+            old_p50, new_p50 = before[mode]["latency"]["p50_ms"], now[mode]["latency"]["p50_ms"]
+            old_tps, new_tps = before[mode]["output_tokens_per_s"], now[mode]["output_tokens_per_s"]
+            print(f"   {now['comments']:>6} {mode:<15} p50 {old_p50:9.1f} -> {new_p50:9.1f}ms "
+                  f"({change(old_p50, new_p50):+6.1f}%)  out tok/s {old_tps:8.1f} -> {new_tps:8.1f} "
+                  f"({change(old_tps, new_tps):+6.1f}%)", file=sys.stderr)
+        print(f"   {now['comments']:>6} load {before['load_s']:.1f} -> {now['load_s']:.1f}s  "
+              f"peak rss {before['peak_rss_mb']:.0f} -> {now['peak_rss_mb']:.0f}MB", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000], help="comments per corpus")
+    parser.add_argument("--corpus", help="JSON list of reviews (or a /summarize body), or JSONL, "
+                                         "instead of synthetic reviews")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3, help="cold-cache runs per size and mode")
+    parser.add_argument("--threads", type=int, default=1, help="torch threads in the summarizing process")
+    parser.add_argument("--workers", type=int, default=1, help="SUMMARIZER_WORKERS")
+    parser.add_argument("--max-batch", type=int, default=8, help="SUMMARIZER_MAX_BATCH")
+    parser.add_argument("--wait-ms", type=float, default=0.0, help="SUMMARIZER_BATCH_WAIT_MS; 0 runs inline")
+    parser.add_argument("--output", help="write the JSON report here as well")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args)))
+        return
+
+    passthrough = ["--seed", str(args.seed), "--repeats", str(args.repeats), "--threads", str(args.threads),
+                   "--workers", str(args.workers), "--max-batch", str(args.max_batch), "--wait-ms", str(args.wait_ms)]
+    if args.corpus:
+        passthrough += ["--corpus", os.path.abspath(args.corpus)]
+    sizes = []
+    for size in args.sizes:
+        cmd = [sys.executable, "-m", "benchmarks.bench_summarizer", "--worker", str(size)] + passthrough
+        out = subprocess.run(cmd, cwd=BACKEND_DIR, capture_output=True, text=True)
+        if out.returncode:
+            print(f"{size} comments failed:\n{out.stderr[-2000:]}", file=sys.stderr)
+            continue
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        sizes.append(result)
+        direct, route = result["summarize_text"], result["route"]
+        print(f"{size} comments: {result['chunks']} chunks, {result['tokens']} tokens, "
+              f"levels {[level['chunks'] for level in direct['levels']]}, load {result['load_s']:.1f}s, "
+              f"peak rss {result['peak_rss_mb']:.0f}MB", file=sys.stderr)
+        print("  " + format_row("chunk_text", result["chunk_text"]), file=sys.stderr)
+        print("  " + format_row("dynamic_summary_length", result["dynamic_summary_length"]), file=sys.stderr)
+        for name, mode in (("summarize_text", direct), ("/summarize", route)):
+            print("  " + format_row(name, mode["latency"]) + f" {mode['output_tokens_per_s']:8.1f} out tok/s",
+                  file=sys.stderr)
+        print("  stages " + "  ".join(f"{stage}={ms:.1f}ms" for stage, ms in direct["stages_ms"].items()),
+              file=sys.stderr)
+
+    report = rounded({
+        "commit": commit(),
+        "config": {
+            "model": os.getenv("SUMMARIZER_MODEL", "sshleifer/distilbart-cnn-12-6"),
+            "backend": os.getenv("SUMMARIZER_BACKEND", "torch"),
+            "corpus": os.path.abspath(args.corpus) if args.corpus else "synthetic",
+            "seed": args.seed, "repeats": args.repeats, "threads": args.threads, "workers": args.workers,
+            "max_batch": args.max_batch, "wait_ms": args.wait_ms, "cpu_count": os.cpu_count(),
+        },
+        "sizes": sizes,
+    })
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Compare un-pooled requests.get against the shared SupabaseClient.
+#
+#   cd backend && python -m benchmarks.bench_supabase_client --requests 500 --tls
+#
+# --tls generates a throwaway self-signed certificate with the openssl CLI so the
+# handshake cost the pool avoids is actually part of the measurement.
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from supabase_client import SupabaseClient
+from benchmarks.postgrest_stub import PostgrestStub
+from benchmarks.stats import summarize, format_row
+
+ROWS = [{"id": i, "name": f"PG {i}", "avg_rating": 4.0} for i in range(20)]
+
+
+def make_cert(tmpdir):
+    cert = os.path.join(tmpdir, "cert.pem")
+    key = os.path.join(tmpdir, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+         "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+def timed(call, n, concurrency):
+    samples = []
+
+    def one(_):
+        start = time.perf_counter()
+        resp = call()
+        resp.json()
+        samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(n)))
+    return summarize(samples, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--tls", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cert = key = None
+        if args.tls:
+            cert, key = make_cert(tmpdir)
+        stub = PostgrestStub(latency=args.latency_ms / 1000, tables={"pg_whole_info": ROWS},
+                             certfile=cert, keyfile=key).start()
+        verify = cert if cert else True
+        if cert:
+            # requests prefers REQUESTS_CA_BUNDLE over Session.verify, so point both at the stub
+            os.environ["REQUESTS_CA_BUNDLE"] = cert
+        headers = {"apikey": "bench", "Authorization": "Bearer bench"}
+        url = f"{stub.url}/rest/v1/pg_whole_info?select=*"
+
+        client = SupabaseClient(stub.url, headers, pool_size=max(args.concurrency))
+        client.session.verify = verify
+
+        try:
+            for concurrency in args.concurrency:
+                bare = timed(lambda: requests.get(url, headers=headers, verify=verify),
+                             args.requests, concurrency)
+                pooled = timed(lambda: client.get("pg_whole_info?select=*"),
+                               args.requests, concurrency)
+                print(f"-- {stub.scheme}, concurrency={concurrency}")
+                print(format_row("requests.get (no pool)", bare))
+                print(format_row("SupabaseClient (pooled)", pooled))
+                print(f"   p50 speedup: {bare['p50_ms'] / max(pooled['p50_ms'], 1e-9):.1f}x")
+        finally:
+            stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Profile /summarize and report how much of the request time goes to tokenization.
+#
+#   cd backend && python -m benchmarks.bench_tokenization --requests 5 --reviews 200
+#
+# Inference runs inline (no micro-batcher thread) and the summary cache is cleared
+# before every request, so each one pays the full tokenize + generate cost.
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import sys
+import tempfile
+import time
+
+from benchmarks.reviews import synthetic_reviews
+
+
+def is_tokenizer(path, func):
+    # Python-side tokenizer code plus the Rust `tokenizers` calls it makes
+    return "tokenization_" in path or "tokenizers" in path or "tokenizers." in func
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--reviews", type=int, default=200, help="reviews per request")
+    parser.add_argument("--top", type=int, default=8, help="tokenizer functions to list")
+    args = parser.parse_args()
+
+    os.environ["SUMMARIZER_BATCH_WAIT_MS"] = "0"
+    os.environ.setdefault("SUMMARY_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "summary.sqlite3"))
+    import app as app_module
+    app_module.model_loaded.wait()
+    if app_module.model_error:
+        raise SystemExit(app_module.model_error)
+
+    client = app_module.app.test_client()
+    bodies = [{"reviews": synthetic_reviews(args.reviews, seed=i)} for i in range(args.requests)]
+    client.post("/summarize", json=bodies[0])  # warm-up
+
+    profiler = cProfile.Profile()
+    wall = 0.0
+    for body in bodies:
+        app_module.summary_cache.clear()
+        start = time.perf_counter()
+        profiler.enable()
+        resp = client.post("/summarize", json=body)
+        profiler.disable()
+        wall += time.perf_counter() - start
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+
+    stats = pstats.Stats(profiler).stats
+    tokenizer_rows = [(tottime, f"{os.path.basename(path)}:{func}")
+                      for (path, _, func), (_, _, tottime, _, _) in stats.items()
+                      if is_tokenizer(path, func)]
+    tokenizer_time = sum(t for t, _ in tokenizer_rows)
+    report = {
+        "requests": args.requests,
+        "reviews_per_request": args.reviews,
+        "request_ms": round(wall / args.requests * 1000, 1),
+        "tokenizer_ms": round(tokenizer_time / args.requests * 1000, 1),
+        "tokenizer_share": round(tokenizer_time / wall, 4),
+        "top_tokenizer_functions": [
+            {"function": name, "ms_per_request": round(t / args.requests * 1000, 2)}
+            for t, name in sorted(tokenizer_rows, reverse=True)[:args.top]
+        ],
+    }
+    print(json.dumps(report, indent=2))
+    print(f"tokenizer: {report['tokenizer_ms']}ms of {report['request_ms']}ms per request "
+          f"({report['tokenizer_share']:.1%})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# Local stand-in for the Supabase REST API behind api.py: the colleges, pgs,
+# reviews, wishlist and pg_summaries tables, the pg_whole_info /
+# reviews_with_pg_info / wishlist_with_pg_info views over them, and the
+# toggle_helpful_vote(s) RPCs, seeded with deterministic synthetic data.
+#
+#   stub = FakeSupabase(seed_catalog(scale=2), latency=0.02).start()
+#   os.environ["SUPABASE_URL"] = stub.url
+import random
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from benchmarks.postgrest_stub import PostgrestStub
+from benchmarks.reviews import synthetic_sentence
+
+# Rows per unit of --scale
+BASE_SIZES = {"colleges": 20, "pgs": 400, "reviews": 8000, "users": 1000, "wishlist": 3000}
+
+CITIES = ["Delhi", "Mumbai", "Bengaluru", "Pune", "Hyderabad", "Chennai", "Kolkata", "Jaipur"]
+PG_WORDS = ["Sunrise", "Green", "Royal", "Comfort", "Elite", "Galaxy", "Shanti", "Krishna", "Silver", "Urban"]
+TAGS = ["wifi", "ac", "laundry", "gym", "food", "power backup", "cctv", "housekeeping", "study room", "parking"]
+RATINGS = ["rating_room", "rating_cleanliness", "rating_safety", "rating_location", "rating_warden", "rating_food"]
+
+
+def seeded_uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def seed_catalog(scale=1.0, seed=0):
+    """Base tables for FakeSupabase; the same scale and seed give the same rows."""
+    rng = random.Random(seed)
+    sizes = {name: max(1, int(n * scale)) for name, n in BASE_SIZES.items()}
+
+    colleges = []
+    for i in range(sizes["colleges"]):
+        short = f"C{i:03d}"
+        colleges.append({"id": seeded_uuid(rng), "name": f"College of Studies {i}", "short_name": short,
+                         "city": CITIES[i % len(CITIES)], "image": f"https://img.example.com/colleges/{i}.jpg"})
+
+    pgs = []
+    for i in range(sizes["pgs"]):
+        college = colleges[i % len(colleges)]
+        pgs.append({
+            "id": seeded_uuid(rng),
+            "name": f"{rng.choice(PG_WORDS)} PG {i}",
+            "college_id": college["id"],
+            "gender_type": rng.choice(["Boys", "Girls", "Co-ed"]),
+            "has_food": rng.random() < 0.7,
+            "description": " ".join(synthetic_sentence(rng) for _ in range(2)),
+            "image": f"https://img.example.com/pgs/{i}.jpg",
+            "location": f"{college['short_name']}, {college['city']}",
+            "inside_campus": rng.random() < 0.1,
+            "latitude": round(rng.uniform(12, 29), 5),
+            "longitude": round(rng.uniform(72, 89), 5),
+            "tags": rng.sample(TAGS, rng.randint(1, 4)),
+            "avg_rating": None,
+        })
+
+    # Each PG has a typical rating its reviews scatter around
+    quality = {pg["id"]: rng.uniform(1.5, 4.8) for pg in pgs}
+    users = [f"user{i}@example.{'edu' if i % 5 == 0 else 'com'}" for i in range(sizes["users"])]
+    start = date(2024, 1, 1)
+    reviews = []
+    for i in range(sizes["reviews"]):
+        # Skewed towards popular PGs, like the real catalogue
+        pg = pgs[int(len(pgs) * rng.random() ** 2)]
+        ratings = {field: min(5, max(1, round(rng.gauss(quality[pg["id"]], 0.8)))) for field in RATINGS}
+        images = [{"url": f"https://ik.imagekit.io/demo/reviews/{i}-{n}.jpg", "fileId": f"seed-{i}-{n}",
+                   "caption": None, "originalName": f"{n}.jpg", "originalSize": 200_000, "imageTags": []}
+                  for n in range(rng.choice([0, 0, 0, 1, 2]))]
+        reviews.append({
+            "id": seeded_uuid(rng),
+            "pg_id": pg["id"],
+            "name": "Anonymous",
+            "user_email": rng.choice(users),
+            "rating": round(sum(ratings.values()) / len(ratings), 1),
+            "comment": " ".join(synthetic_sentence(rng) for _ in range(rng.randint(1, 5))),
+            "sentiment": rng.choice(["Positive", "Neutral", "Negative"]),
+            "tags": rng.sample(TAGS, rng.randint(0, 3)),
+            "class_years": [],
+            "room_type": rng.choice(["Single", "Double", "Triple"]),
+            "gender_type": pg["gender_type"],
+            "rent_opinion": rng.choice(["Cheap", "Fair", "Expensive"]),
+            "happiness_level": rng.randint(1, 5),
+            "images": images,
+            "date": (start + timedelta(days=rng.randrange(600))).isoformat(),
+            "helpful_count": 0,
+            "verified": rng.random() < 0.2,
+            **ratings,
+        })
+
+    by_pg = {}
+    for review in reviews:
+        by_pg.setdefault(review["pg_id"], []).append(review["rating"])
+    for pg in pgs:
+        ratings = by_pg.get(pg["id"])
+        pg["avg_rating"] = round(sum(ratings) / len(ratings), 1) if ratings else None
+
+    wishlist = {}
+    for _ in range(sizes["wishlist"]):
+        email, pg = rng.choice(users), rng.choice(pgs)
+        wishlist[(email, pg["id"])] = {"user_email": email, "pg_id": pg["id"],
+                                       "added_at": f"{start + timedelta(days=rng.randrange(600))}T12:00:00+00:00"}
+
+    # Summaries for every reviewed PG, as a full precompute_summaries.py run would leave them
+    pg_summaries = [{"pg_id": pg["id"], "summary": pg["description"], "review_hash": seeded_uuid(rng),
+                     "review_count": len(by_pg[pg["id"]]), "model": "fake", "updated_at": "2025-01-01T00:00:00+00:00"}
+                    for pg in pgs if pg["id"] in by_pg]
+
+    return {"colleges": colleges, "pgs": pgs, "reviews": reviews, "wishlist": list(wishlist.values()),
+            "pg_summaries": pg_summaries, "helpful_votes": []}
+
+
+def pg_whole_info(stub):
+    colleges = {c["id"]: c for c in stub.tables["colleges"]}
+    rows = []
+    for pg in stub.tables["pgs"]:
+        college = colleges.get(pg.get("college_id"), {})
+        rows.append({**pg, "college_name": college.get("name"), "college_short_name": college.get("short_name"),
+                     "college_city": college.get("city")})
+    return rows
+
+
+def reviews_with_pg_info(stub):
+    pgs = {pg["id"]: pg for pg in stub.rows("pg_whole_info")}
+    return [{**r, "pg_name": pgs.get(r["pg_id"], {}).get("name"),
+             "college_name": pgs.get(r["pg_id"], {}).get("college_name")} for r in stub.tables["reviews"]]
+
+
+def wishlist_with_pg_info(stub):
+    return [dict(row) for row in stub.tables["wishlist"]]
+
+
+def toggle(stub, review_id, email):
+    review = stub.index("reviews", "id").get(review_id)
+    if not review:
+        return None
+    review = review[0]
+    votes = stub.tables["helpful_votes"]
+    vote = next((v for v in votes if v["review_id"] == review_id and v["user_email"] == email), None)
+    if vote is None:
+        votes.append({"review_id": review_id, "user_email": email})
+        review["helpful_count"] += 1
+    else:
+        votes.remove(vote)
+        review["helpful_count"] -= 1
+    stub.touched("reviews")
+    return review["helpful_count"]
+
+
+def toggle_helpful_vote(stub, body):
+    count = toggle(stub, body.get("p_review_id"), body.get("p_user_email"))
+    return (200, count) if count is not None else (400, {"code": "P0001", "message": "Review not found"})
+
+
+def toggle_helpful_votes(stub, body):
+    results = []
+    for review_id in body.get("p_review_ids") or []:
+        count = toggle(stub, review_id, body.get("p_user_email"))
+        if count is not None:
+            results.append({"review_id": review_id, "helpful_count": count})
+    return 200, results
+
+
+def now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FakeSupabase(PostgrestStub):
+    """PostgrestStub with the app's schema: views, embeddable relations, RPCs and unique keys."""
+
+    def __init__(self, tables, **kwargs):
+        super().__init__(
+            tables=tables,
+            views={"pg_whole_info": pg_whole_info, "reviews_with_pg_info": reviews_with_pg_info,
+                   "wishlist_with_pg_info": wishlist_with_pg_info},
+            relations={
+                ("pg_whole_info", "reviews"): ("id", "pg_id", True),
+                ("pgs", "reviews"): ("id", "pg_id", True),
+                ("reviews", "pgs"): ("pg_id", "id", False),
+                ("wishlist", "pgs"): ("pg_id", "id", False),
+                ("wishlist_with_pg_info", "pgs"): ("pg_id", "id", False),
+                ("wishlist_with_pg_info", "pg_whole_info"): ("pg_id", "id", False),
+            },
+            rpc={"toggle_helpful_vote": toggle_helpful_vote, "toggle_helpful_votes": toggle_helpful_votes},
+            keys={"wishlist": ("user_email", "pg_id"), "pg_summaries": ("pg_id",),
+                  "helpful_votes": ("review_id", "user_email")},
+            defaults={"wishlist": lambda: {"added_at": now()}, "pg_summaries": lambda: {"updated_at": now()},
+                      "reviews": lambda: {"helpful_count": 0}, "pgs": lambda: {"avg_rating": None, "tags": []}},
+            **kwargs,
+        )
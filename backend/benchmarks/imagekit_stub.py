@@ -0,0 +1,143 @@
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FILE = re.compile(r"^/v1/files/([^/]+)$")
+DETAILS = re.compile(r"^/v1/files/([^/]+)/details$")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload=None, headers=None):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def _handle(self):
+        server = self.server
+        body = self._read_body()
+        if server.latency:
+            time.sleep(server.latency)
+        wait = server.throttle()
+        if wait:
+            server.count("429")
+            return self._reply(429, {"message": "Too many requests"},
+                               {"Retry-After": f"{wait:.3f}", "X-RateLimit-Reset": str(int(wait * 1000))})
+        url = urlsplit(self.path)
+        path = url.path
+
+        if self.command == "DELETE" and FILE.match(path):
+            server.count("delete")
+            with server.lock:
+                found = server.files.pop(FILE.match(path).group(1), None)
+            return self._reply(204) if found else self._reply(404, {"message": "The requested file does not exist."})
+        if self.command == "GET" and DETAILS.match(path):
+            server.count("details")
+            file = server.files.get(DETAILS.match(path).group(1))
+            return self._reply(200, file) if file else self._reply(404, {"message": "The requested file does not exist."})
+        if self.command == "POST" and path == "/v1/files/purge":
+            server.count("purge")
+            with server.lock:
+                server.purged.append((body or {}).get("url"))
+            return self._reply(201, {"requestId": uuid.uuid4().hex})
+        if self.command == "GET" and path == "/v1/files":
+            # List API: ?path=/folder/ &skip= &limit=, oldest first
+            server.count("list")
+            query = parse_qs(url.query)
+            folder = query.get("path", ["/"])[0].rstrip("/") + "/"
+            skip = int(query.get("skip", ["0"])[0])
+            limit = int(query.get("limit", ["1000"])[0])
+            with server.lock:
+                files = [f for f in server.files.values() if f["filePath"].startswith(folder)]
+            files.sort(key=lambda f: (f["createdAt"], f["fileId"]))
+            return self._reply(200, files[skip:skip + limit])
+        return self._reply(404, {"message": "not found"})
+
+    do_GET = do_POST = do_DELETE = _handle
+
+
+class ImageKitStub(ThreadingHTTPServer):
+    """In-process look-alike of the ImageKit media API (/v1/files...).
+
+    `rate_limit` caps requests per second across all clients; the excess gets a
+    429 with ImageKit's X-RateLimit-Reset header, like the real API.
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, rate_limit=None):
+        super().__init__((host, port), StubHandler)
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.files = {}
+        self.purged = []
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.window_count = 0
+
+    def add_files(self, n, folder="/reviews", created_at="2024-01-01T00:00:00.000Z"):
+        ids = []
+        with self.lock:
+            for _ in range(n):
+                file_id = uuid.uuid4().hex
+                self.files[file_id] = {
+                    "fileId": file_id,
+                    "name": f"{file_id}.jpg",
+                    "filePath": f"{folder.rstrip('/')}/{file_id}.jpg",
+                    "url": f"https://ik.imagekit.io/demo{folder.rstrip('/')}/{file_id}.jpg",
+                    "createdAt": created_at,
+                }
+                ids.append(file_id)
+        return ids
+
+    def count(self, kind):
+        with self.lock:
+            self.calls[kind] += 1
+
+    def throttle(self):
+        """Seconds until the current one-second window resets, or 0 if this request is allowed."""
+        if not self.rate_limit:
+            return 0
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= 1:
+                self.window_start, self.window_count = now, 0
+            self.window_count += 1
+            if self.window_count > self.rate_limit:
+                return 1 - (now - self.window_start)
+            return 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
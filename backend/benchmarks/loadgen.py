@@ -0,0 +1,113 @@
+# Closed-loop HTTP load generator on asyncio: each simulated client keeps one
+# keep-alive connection and sends its next request as soon as the last returns.
+import asyncio
+import itertools
+import time
+
+from benchmarks.stats import summarize
+
+JSON = {"Content-Type": "application/json"}
+
+
+class Connection:
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=b"", headers=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                 f"Content-Length: {len(body)}"]
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        try:
+            return await self._response()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            self.close()
+            raise
+
+    async def _response(self):
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding") == "chunked":
+            body = bytearray()
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+                body += chunk[:-2]
+            body = bytes(body)
+        elif "content-length" in headers:
+            body = await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await self.reader.read()
+            headers["connection"] = "close"
+
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, headers, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def _client(host, port, requests, deadline, results):
+    conn = Connection(host, port)
+    try:
+        for method, path, body, *label in requests:
+            if time.perf_counter() >= deadline:
+                return
+            # Requests may carry a route label so /reviews/<id> is one series, not one per id
+            route = label[0] if label else path.split("?")[0]
+            start = time.perf_counter()
+            try:
+                status, _, _ = await conn.request(method, path, body, JSON if body else None)
+            except (OSError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+                count_error(results, route, type(e).__name__)
+                await asyncio.sleep(0.05)
+                continue
+            results["latency"].setdefault(route, []).append(time.perf_counter() - start)
+            if status >= 400:
+                count_error(results, route, str(status))
+    finally:
+        conn.close()
+
+
+def count_error(results, route, kind):
+    results["errors"][kind] = results["errors"].get(kind, 0) + 1
+    errors = results["route_errors"].setdefault(route, {})
+    errors[kind] = errors.get(kind, 0) + 1
+
+
+async def run_load(host, port, requests, concurrency, duration):
+    """Drive `requests` (iterable of (method, path, body[, route label])) from `concurrency` clients for `duration` s.
+
+    Returns the overall latency summary plus one per route (label, else path) with its errors.
+    """
+    results = {"latency": {}, "errors": {}, "route_errors": {}}
+    shared = iter(requests)
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(_client(host, port, shared, deadline, results) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    every = list(itertools.chain.from_iterable(results["latency"].values()))
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        **summarize(every, elapsed),
+        "errors": results["errors"],
+        "routes": {route: {**summarize(results["latency"].get(route, []), elapsed),
+                           "errors": results["route_errors"].get(route, {})}
+                   for route in sorted(set(results["latency"]) | set(results["route_errors"]))},
+    }
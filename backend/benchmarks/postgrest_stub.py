@@ -0,0 +1,465 @@
+import json
+import re
+import ssl
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# Query parameters that are not column filters
+RESERVED = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+COMPARE = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+
+class QueryError(Exception):
+    """Bad request in PostgREST terms; answered with 400 and a PGRST-style body."""
+
+    def __init__(self, message, code="PGRST100"):
+        super().__init__(message)
+        self.code = code
+
+
+def index_key(value):
+    # Numbers are keyed as floats so an eq.4 lookup finds 4 and 4.0 alike
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+
+
+def split_top(text, sep=","):
+    """Split on `sep` outside parentheses and double quotes."""
+    parts, depth, quoted, start = [], 0, False, 0
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quoted:
+            if ch == "\\":
+                i += 1
+            elif ch == '"':
+                quoted = False
+        elif ch == '"':
+            quoted = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == sep and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+        i += 1
+    parts.append(text[start:])
+    return [p for p in parts if p != ""]
+
+
+def literal(text):
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", text[1:-1])
+    return text
+
+
+def coerce(value, text):
+    """The filter literal `text` as the type of the row's `value`, for comparison."""
+    if isinstance(value, bool):
+        return text.lower() == "true"
+    if isinstance(value, (int, float)):
+        try:
+            return float(text)
+        except ValueError:
+            return text
+    return text
+
+
+def comparable(value, other):
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and isinstance(other, float):
+        return float(value)
+    if isinstance(other, str) and not isinstance(value, str):
+        return json.dumps(value) if isinstance(value, (list, dict)) else str(value)
+    return value
+
+
+def condition(column, expr):
+    """Row predicate for `column=<expr>`, e.g. eq.5, not.is.null, in.(1,2), ilike.*x*."""
+    negate = expr.startswith("not.")
+    if negate:
+        expr = expr[4:]
+    op, _, raw = expr.partition(".")
+    if op in COMPARE:
+        target = literal(raw)
+        compare = COMPARE[op]
+
+        def test(row):
+            value = row.get(column)
+            if value is None:
+                return False
+            other = coerce(value, target)
+            return compare(comparable(value, other), other)
+    elif op == "in":
+        if not (raw.startswith("(") and raw.endswith(")")):
+            raise QueryError(f"in. needs a list: {expr}")
+        targets = [literal(t) for t in split_top(raw[1:-1])]
+
+        def test(row):
+            value = row.get(column)
+            return value is not None and any(comparable(value, coerce(value, t)) == coerce(value, t)
+                                             for t in targets)
+    elif op == "is":
+        target = {"null": None, "true": True, "false": False}.get(raw.lower(), ...)
+        if target is ...:
+            raise QueryError(f"is. takes null, true or false: {expr}")
+
+        def test(row):
+            return row.get(column) is target
+    elif op in ("like", "ilike"):
+        pattern = re.escape(literal(raw)).replace(r"\*", ".*").replace("%", ".*")
+        regex = re.compile(pattern, (re.IGNORECASE if op == "ilike" else 0) | re.DOTALL)
+
+        def test(row):
+            value = row.get(column)
+            return value is not None and regex.fullmatch(str(value)) is not None
+    elif op == "cs":
+        wanted = set(literal(t) for t in split_top(raw.strip("{}")))
+
+        def test(row):
+            return wanted <= {str(v) for v in row.get(column) or []}
+    else:
+        raise QueryError(f"Unsupported operator: {op}")
+    return (lambda row: not test(row)) if negate else test
+
+
+def logic(op, body):
+    """Predicate for or=(...)/and=(...) bodies, nested and()/or() included."""
+    if not (body.startswith("(") and body.endswith(")")):
+        raise QueryError(f"{op} needs a parenthesised list")
+    tests = []
+    for term in split_top(body[1:-1]):
+        negate = term.startswith("not.")
+        if negate:
+            term = term[4:]
+        for nested in ("and", "or"):
+            if term.startswith(nested + "("):
+                test = logic(nested, term[len(nested):])
+                break
+        else:
+            column, _, expr = term.partition(".")
+            test = condition(column, expr)
+        tests.append((lambda t: lambda row: not t(row))(test) if negate else test)
+    combine = any if op == "or" else all
+    return lambda row: combine(t(row) for t in tests)
+
+
+def sort_rows(rows, order):
+    """Rows ordered by PostgREST's `col.desc.nullslast,col2` syntax (nulls last on asc, first on desc)."""
+    for term in reversed(split_top(order)):
+        column, *modifiers = term.split(".")
+        desc = "desc" in modifiers
+        nulls_first = "nullsfirst" in modifiers or (desc and "nullslast" not in modifiers)
+        present = [r for r in rows if r.get(column) is not None]
+        missing = [r for r in rows if r.get(column) is None]
+        present.sort(key=lambda r: r[column], reverse=desc)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+def parse_select(text):
+    """[(output name, column or None, embedded resource, sub-select)] for a select= value."""
+    items = []
+    for item in split_top(text or "*"):
+        alias, _, rest = item.partition(":") if ":" in item.split("(")[0] else ("", "", item)
+        if "(" in rest and rest.endswith(")"):
+            resource, _, inner = rest[:-1].partition("(")
+            resource = resource.split("!")[0]
+            items.append((alias or resource, None, resource, inner))
+        else:
+            column = rest.split("::")[0]
+            items.append((alias or column, column, None, None))
+    return items
+
+
+class Query:
+    """One resource's filters, order and window, parsed from the query string.
+
+    Parameters prefixed with an embedded resource's name (`reviewList.order=...`)
+    go to that resource's sub-query instead.
+    """
+
+    def __init__(self, params, prefix=""):
+        self.tests = []
+        self.eq = []  # (column, value) pairs usable for an index lookup
+        self.order = self.limit = None
+        self.offset = 0
+        self.nested = {}
+        for key, value in params:
+            if not key.startswith(prefix):
+                continue
+            key = key[len(prefix):]
+            if "." in key and key.split(".", 1)[0] not in ("or", "and", "not"):
+                self.nested.setdefault(key.split(".", 1)[0], []).append((key, value))
+                continue
+            if key == "order":
+                self.order = value
+            elif key == "limit":
+                self.limit = int(value)
+            elif key == "offset":
+                self.offset = int(value)
+            elif key in ("or", "and"):
+                self.tests.append(logic(key, value))
+            elif key in ("not.or", "not.and"):
+                test = logic(key[4:], value)
+                self.tests.append(lambda row, t=test: not t(row))
+            elif key not in RESERVED:
+                self.tests.append(condition(key, value))
+                if value.startswith("eq."):
+                    self.eq.append((key, literal(value[3:])))
+
+    def sub(self, name):
+        return Query(self.nested.get(name, []), prefix=name + ".")
+
+    def apply(self, rows):
+        rows = [r for r in rows if all(test(r) for test in self.tests)]
+        if self.order:
+            rows = sort_rows(rows, self.order)
+        end = None if self.limit is None else self.offset + self.limit
+        return rows[self.offset:end]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep the connection alive between calls
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this, Nagle + delayed ACK
+    # adds ~40ms to every response on a reused connection
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload=None):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null") if length else None
+
+    def _handle(self):
+        server = self.server
+        body = self._read_body()
+        if server.latency:
+            time.sleep(server.latency)
+        url = urlsplit(self.path)
+        if not url.path.startswith("/rest/v1/"):
+            return self._reply(404, {"message": "not found"})
+        resource = url.path[len("/rest/v1/"):]
+        params = parse_qsl(url.query, keep_blank_values=True)
+        prefer = self.headers.get("Prefer", "")
+        server.count(self.command, resource)
+        try:
+            with server.lock:
+                status, payload = server.execute(self.command, resource, params, body, prefer)
+        except QueryError as e:
+            status, payload = 400, {"code": e.code, "message": str(e), "details": None, "hint": None}
+        self._reply(status, payload)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _handle
+
+
+class PostgrestStub(ThreadingHTTPServer):
+    """In-process PostgREST look-alike over in-memory tables.
+
+    Serves ``/rest/v1/<table>`` with PostgREST's filter grammar (eq/neq/gt/gte/lt/
+    lte/in/is/like/ilike/cs, or=/and= trees, not.), select= with embedded
+    resources, order=, limit=/offset= (also per embedded resource), and writes:
+    POST with on_conflict upserts, PATCH and DELETE, honouring
+    ``Prefer: return=representation``. ``views`` are read-only resources computed
+    from the tables and rebuilt after writes; ``relations`` map (resource,
+    embedded resource) to (local column, foreign column, to_many); ``rpc`` maps a
+    function name to ``fn(stub, body) -> (status, payload)``.
+    """
+
+    daemon_threads = True
+    # Load tests open hundreds of connections at once; the default backlog of 5 drops SYNs
+    request_queue_size = 1024
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, tables=None, views=None,
+                 relations=None, rpc=None, keys=None, defaults=None, certfile=None, keyfile=None):
+        super().__init__((host, port), StubHandler)
+        self.latency = latency
+        self.tables = tables or {}
+        self.views = views or {}
+        self.relations = relations or {}
+        self.rpc = rpc or {}
+        self.keys = keys or {}  # table -> unique columns for conflicts; default ("id",)
+        self.defaults = defaults or {}  # table -> fn() giving column defaults for inserts
+        self.lock = threading.RLock()
+        self.versions = {}
+        self.materialized = {}
+        self.indexes = {}
+        self.calls = {}
+        self.scheme = "http"
+        if certfile:
+            ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            ctx.load_cert_chain(certfile, keyfile)
+            self.socket = ctx.wrap_socket(self.socket, server_side=True)
+            self.scheme = "https"
+
+    def count(self, method, resource):
+        key = f"{method} {resource}"
+        with self.lock:
+            self.calls[key] = self.calls.get(key, 0) + 1
+
+    def touched(self, table):
+        self.versions[table] = self.versions.get(table, 0) + 1
+
+    def rows(self, resource):
+        if resource in self.tables:
+            return self.tables[resource]
+        if resource in self.views:
+            version = tuple(sorted(self.versions.items()))
+            cached = self.materialized.get(resource)
+            if cached is None or cached[0] != version:
+                cached = (version, self.views[resource](self))
+                self.materialized[resource] = cached
+            return cached[1]
+        raise QueryError(f'relation "{resource}" does not exist', "42P01")
+
+    def index(self, resource, column):
+        """{value: rows} for eq lookups and embedding, rebuilt after writes to the resource."""
+        rows = self.rows(resource)
+        cached = self.indexes.get((resource, column))
+        if cached is None or cached[0] is not rows or cached[1] != self.versions.get(resource):
+            groups = {}
+            for row in rows:
+                key = index_key(row.get(column))
+                if not isinstance(key, (list, dict)):
+                    groups.setdefault(key, []).append(row)
+            cached = (rows, self.versions.get(resource), groups)
+            self.indexes[(resource, column)] = cached
+        return cached[2]
+
+    def candidates(self, resource, query):
+        if not query.eq:
+            return self.rows(resource)
+        column, value = query.eq[0]
+        groups = self.index(resource, column)
+        found = list(groups.get(value, []))
+        try:
+            found += groups.get(float(value), [])
+        except ValueError:
+            pass
+        return found
+
+    def select(self, resource, query, select, rows=None):
+        items = parse_select(select)
+        if rows is None:
+            rows = self.candidates(resource, query)
+        rows = query.apply(rows)
+        return [self.project(resource, row, items, query) for row in rows]
+
+    def project(self, resource, row, items, query):
+        out = {}
+        for name, column, embedded, inner in items:
+            if column == "*":
+                out.update(row)
+            elif column is not None:
+                out[name] = row.get(column)
+            else:
+                relation = self.relations.get((resource, embedded))
+                if relation is None:
+                    raise QueryError(
+                        f"Could not find a relationship between '{resource}' and '{embedded}' in the schema cache",
+                        "PGRST200")
+                local, foreign, to_many = relation
+                sub = query.sub(name)
+                matches = self.index(embedded, foreign).get(index_key(row.get(local)), [])
+                related = self.select(embedded, sub, inner, rows=list(matches))
+                out[name] = related if to_many else (related[0] if related else None)
+        return out
+
+    def execute(self, method, resource, params, body, prefer):
+        if resource.startswith("rpc/"):
+            fn = self.rpc.get(resource[4:])
+            if fn is None or method != "POST":
+                return 404, {"code": "PGRST202", "message": f"Could not find the function {resource[4:]}"}
+            return fn(self, body or {})
+
+        query = Query(params)
+        select = dict(params).get("select", "*")
+        representation = "return=representation" in prefer
+        if method == "GET":
+            return 200, self.select(resource, query, select)
+        if resource not in self.tables:
+            if resource in self.views:
+                raise QueryError(f'cannot modify view "{resource}"', "42809")
+            raise QueryError(f'relation "{resource}" does not exist', "42P01")
+        table = self.tables[resource]
+
+        if method == "POST":
+            rows = body if isinstance(body, list) else [body]
+            on_conflict = dict(params).get("on_conflict")
+            keys = tuple(on_conflict.split(",")) if on_conflict else self.keys.get(resource, ("id",))
+            written = self.insert(resource, table, rows, keys, prefer)
+            if written is None:
+                return 409, {"code": "23505", "message": "duplicate key value violates unique constraint"}
+            return 201, [self.project(resource, r, parse_select(select), query) for r in written] if representation else None
+
+        matched = [r for r in self.candidates(resource, query) if all(t(r) for t in query.tests)]
+        if method == "PATCH":
+            for row in matched:
+                row.update(body or {})
+        elif method == "DELETE":
+            gone = {id(r) for r in matched}
+            table[:] = [r for r in table if id(r) not in gone]
+        else:
+            return 405, {"message": f"{method} not supported"}
+        if matched:
+            self.touched(resource)
+        if representation:
+            return 200, [self.project(resource, r, parse_select(select), query) for r in matched]
+        return 204, None
+
+    def insert(self, resource, table, rows, keys, prefer):
+        """Inserted (or merged) rows, or None on a conflict nobody asked to resolve."""
+        existing = {tuple(str(r.get(k)) for k in keys): r for r in table}
+        written = []
+        for row in rows:
+            defaults = self.defaults.get(resource)
+            row = {**(defaults() if defaults else {}), **row}
+            if self.keys.get(resource, ("id",)) == ("id",):
+                row.setdefault("id", str(uuid.uuid4()))
+            key = tuple(str(row.get(k)) for k in keys)
+            if key in existing:
+                if "resolution=merge-duplicates" in prefer:
+                    existing[key].update(row)
+                    written.append(existing[key])
+                elif "resolution=ignore-duplicates" not in prefer:
+                    return None
+                continue
+            table.append(row)
+            existing[key] = row
+            written.append(row)
+        self.touched(resource)
+        return written
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"{self.scheme}://{host}:{port}"
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
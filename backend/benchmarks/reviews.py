@@ -0,0 +1,45 @@
+# Deterministic synthetic PG reviews for the summarizer benchmarks: same seed,
+# same corpus, so runs are comparable across machines and commits.
+import random
+
+ASPECTS = {
+    "room": ["rooms", "beds", "bathrooms", "cupboards", "windows", "balconies"],
+    "food": ["food", "breakfast", "dinner", "mess", "tea", "weekend special"],
+    "staff": ["owner", "warden", "caretaker", "cleaning staff", "cook", "security guard"],
+    "amenities": ["wifi", "laundry", "power backup", "water supply", "gym", "study room"],
+    "location": ["metro station", "college gate", "market", "bus stop", "hospital", "cafes"],
+}
+POSITIVE = ["clean", "spacious", "great", "reliable", "friendly", "decent", "well maintained", "tasty"]
+NEGATIVE = ["dirty", "cramped", "slow", "unreliable", "rude", "overpriced", "noisy", "bland"]
+TEMPLATES = [
+    "The {thing} {verb} {adj}.",
+    "I found the {thing} quite {adj} during my stay.",
+    "Honestly the {thing} {verb} {adj} most of the time.",
+    "Compared to other PGs nearby, the {thing} {verb} {adj}.",
+    "My roommate and I thought the {thing} {verb} {adj}, especially in exam season.",
+    "It is a short walk to the {place}, and the {thing} {verb} {adj}.",
+]
+
+
+def synthetic_sentence(rng):
+    aspect = rng.choice(list(ASPECTS))
+    thing = rng.choice(ASPECTS[aspect])
+    adj = rng.choice(POSITIVE if rng.random() < 0.6 else NEGATIVE)
+    return rng.choice(TEMPLATES).format(
+        thing=thing, adj=adj, verb="are" if thing.endswith("s") else "is",
+        place=rng.choice(ASPECTS["location"]),
+    )
+
+
+def synthetic_reviews(n, seed=0, sentences=(2, 6)):
+    """n review dicts shaped like the `reviews` table rows /summarize receives."""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i,
+            "pg_id": rng.randrange(1, 1 + max(1, n // 20)),
+            "date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            "comment": " ".join(synthetic_sentence(rng) for _ in range(rng.randint(*sentences))),
+        }
+        for i in range(n)
+    ]
@@ -0,0 +1,47 @@
+# ROUGE-1/2/L F1 on lowercased word tokens; enough to compare backends against
+# the fp32 output without pulling in another dependency.
+import re
+from collections import Counter
+
+_word = re.compile(r"\w+")
+
+
+def _tokens(text):
+    return _word.findall(text.lower())
+
+
+def _f1(overlap, candidate, reference):
+    if not overlap or not candidate or not reference:
+        return 0.0
+    precision, recall = overlap / candidate, overlap / reference
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_n(candidate, reference, n):
+    cand = Counter(zip(*(candidate[i:] for i in range(n))))
+    ref = Counter(zip(*(reference[i:] for i in range(n))))
+    return _f1(sum((cand & ref).values()), sum(cand.values()), sum(ref.values()))
+
+
+def lcs(a, b):
+    prev = [0] * (len(b) + 1)
+    for x in a:
+        cur = [0]
+        for j, y in enumerate(b):
+            cur.append(prev[j] + 1 if x == y else max(prev[j + 1], cur[j]))
+        prev = cur
+    return prev[-1]
+
+
+def rouge(candidate, reference):
+    cand, ref = _tokens(candidate), _tokens(reference)
+    return {
+        "rouge1": rouge_n(cand, ref, 1),
+        "rouge2": rouge_n(cand, ref, 2),
+        "rougeL": _f1(lcs(cand, ref), len(cand), len(ref)),
+    }
+
+
+def mean_rouge(candidates, references):
+    scores = [rouge(c, r) for c, r in zip(candidates, references)]
+    return {k: round(sum(s[k] for s in scores) / len(scores), 4) for k in ("rouge1", "rouge2", "rougeL")}
@@ -0,0 +1,34 @@
+import statistics
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples, elapsed=None):
+    """Latency summary in milliseconds (samples are seconds)."""
+    result = {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+    if elapsed:
+        result["throughput_rps"] = len(samples) / elapsed
+    return result
+
+
+def format_row(name, summary):
+    line = (f"{name:<28} n={summary['count']:<6} mean={summary['mean_ms']:8.2f}ms "
+            f"p50={summary['p50_ms']:8.2f}ms p95={summary['p95_ms']:8.2f}ms "
+            f"p99={summary['p99_ms']:8.2f}ms")
+    if "throughput_rps" in summary:
+        line += f" {summary['throughput_rps']:9.1f} req/s"
+    return line
@@ -0,0 +1,68 @@
+# Build a small, randomly initialised BART summarization model plus a BPE
+# tokenizer trained on synthetic reviews, saved like a hub checkpoint:
+#
+#   cd backend && python -m benchmarks.tiny_bart /tmp/tiny-bart
+#   SUMMARIZER_MODEL=/tmp/tiny-bart python app.py
+#
+# Useful where the hub isn't reachable (CI, sandboxes): every summarizer code
+# path runs, with the same generation settings as distilbart-cnn-12-6. Output
+# text is gibberish and absolute timings are far below the real model's, so use
+# it for relative comparisons only.
+import argparse
+import os
+import random
+
+from benchmarks.reviews import synthetic_reviews
+
+GENERATION = dict(num_beams=4, length_penalty=2.0, no_repeat_ngram_size=3, early_stopping=True,
+                  min_length=56, max_length=142)
+
+
+def build(path, d_model=64, layers=2, vocab_size=2000, seed=0):
+    from tokenizers import ByteLevelBPETokenizer
+    from transformers import BartConfig, BartForConditionalGeneration, BartTokenizerFast, GenerationConfig
+
+    import torch
+
+    os.makedirs(path, exist_ok=True)
+    random.seed(seed)
+    torch.manual_seed(seed)
+
+    bpe = ByteLevelBPETokenizer()
+    corpus = [r["comment"] for r in synthetic_reviews(5000, seed=seed)]
+    bpe.train_from_iterator(corpus, vocab_size=vocab_size,
+                            special_tokens=["<s>", "<pad>", "</s>", "<unk>", "<mask>"])
+    bpe.save_model(path)
+    tokenizer = BartTokenizerFast(os.path.join(path, "vocab.json"), os.path.join(path, "merges.txt"),
+                                  model_max_length=1024)
+    tokenizer.save_pretrained(path)
+
+    config = BartConfig(
+        vocab_size=len(tokenizer), d_model=d_model, encoder_layers=layers, decoder_layers=layers,
+        encoder_attention_heads=4, decoder_attention_heads=4,
+        encoder_ffn_dim=d_model * 4, decoder_ffn_dim=d_model * 4, max_position_embeddings=1024,
+        pad_token_id=tokenizer.pad_token_id, bos_token_id=tokenizer.bos_token_id,
+        eos_token_id=tokenizer.eos_token_id, decoder_start_token_id=tokenizer.eos_token_id,
+    )
+    model = BartForConditionalGeneration(config)
+    model.generation_config = GenerationConfig(
+        bos_token_id=tokenizer.bos_token_id, eos_token_id=tokenizer.eos_token_id,
+        pad_token_id=tokenizer.pad_token_id, decoder_start_token_id=tokenizer.eos_token_id,
+        forced_bos_token_id=tokenizer.bos_token_id, forced_eos_token_id=tokenizer.eos_token_id,
+        **GENERATION,
+    )
+    model.save_pretrained(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path")
+    parser.add_argument("--d-model", type=int, default=64)
+    parser.add_argument("--layers", type=int, default=2)
+    args = parser.parse_args()
+    print(build(args.path, args.d_model, args.layers))
+
+
+if __name__ == "__main__":
+    main()
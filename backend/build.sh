@@ -0,0 +1,7 @@
+#!/bin/sh
+# Build step for the backend host: Python dependencies plus the punkt_tab sentence-splitter
+# data app.py loads from backend/nltk_data, so the server never downloads it on boot.
+set -e
+cd "$(dirname "$0")"
+pip install -r requirements.txt
+python -m nltk.downloader -d nltk_data punkt_tab
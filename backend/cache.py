@@ -0,0 +1,337 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from sqlite_store import SqliteFile
+
+logger = logging.getLogger(__name__)
+
+# sqlite is shared by every worker process on the host, so a write's invalidation reaches
+# all of them; use redis across hosts. memory is per process: other workers only drop an
+# entry when it expires, so its TTL is capped at CACHE_MEMORY_MAX_TTL.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")  # memory | sqlite | redis
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+CACHE_MEMORY_MAX_TTL = float(os.getenv("CACHE_MEMORY_MAX_TTL", "15"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+# Relative paths are taken from this directory, not the working directory, so every worker
+# opens the same file however it was started
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          os.getenv("CACHE_PATH", "catalog_cache.sqlite3"))
+CACHE_URL = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+# sqlite: a hit records its access time at most this often, so hits rarely take the write
+# lock; LRU eviction order is only this precise
+CACHE_TOUCH_INTERVAL = float(os.getenv("CACHE_TOUCH_INTERVAL", "60"))
+# sqlite: the entry count is checked against CACHE_MAX_ENTRIES every this many sets per process
+CACHE_SIZE_CHECK_EVERY = int(os.getenv("CACHE_SIZE_CHECK_EVERY", "64"))
+
+
+class MemoryBackend:
+    """Per-process LRU with TTL. Values are kept as-is, so callers must not mutate them."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_ttl=CACHE_MEMORY_MAX_TTL):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl  # bounds how stale another worker's copy can get
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.tags = {}  # tag -> set of keys
+        self.key_tags = {}  # key -> tags, so evicted keys can be unlinked
+        self.evictions = 0
+        self.expirations = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl, tags):
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (time.monotonic() + min(ttl, self.max_ttl), value)
+            self.key_tags[key] = tags
+            for tag in tags:
+                self.tags.setdefault(tag, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+
+    def delete_tags(self, tags):
+        with self.lock:
+            keys = set()
+            for tag in tags:
+                keys |= self.tags.get(tag, set())
+            for key in keys:
+                self._drop(key)
+            return len(keys)
+
+    def delete(self, keys):
+        with self.lock:
+            for key in keys:
+                self._drop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.tags.clear()
+            self.key_tags.clear()
+
+    def size(self):
+        return len(self.entries)
+
+    def _drop(self, key):
+        self.entries.pop(key, None)
+        for tag in self.key_tags.pop(key, ()):
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+
+
+class SqliteBackend:
+    """File-backed store shared by every worker process on the host."""
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES,
+                 touch_interval=CACHE_TOUCH_INTERVAL, size_check_every=CACHE_SIZE_CHECK_EVERY):
+        self.file = SqliteFile(path)
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.size_check_every = max(1, size_check_every)
+        self.sets = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.file.run(self._create)
+
+    def _create(self, conn):
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS entries "
+                         "(key TEXT PRIMARY KEY, value TEXT, expires_at REAL, accessed_at REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS tags (tag TEXT, key TEXT, PRIMARY KEY (tag, key))")
+            conn.execute("CREATE INDEX IF NOT EXISTS tags_key ON tags (key)")
+
+    def get(self, key):
+        return self.file.run(self._get, key)
+
+    def _get(self, conn, key):
+        row = conn.execute("SELECT value, expires_at, accessed_at FROM entries WHERE key = ?",
+                           (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if row[1] < now:
+            self._delete(conn, [key])
+            self.expirations += 1
+            return None
+        if now - row[2] >= self.touch_interval:
+            try:
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            except sqlite3.OperationalError:
+                pass  # another worker holds the write lock; the hit still stands
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl, tags):
+        self.file.run(self._set, key, json.dumps(value), ttl, tags)
+
+    def _set(self, conn, key, raw, ttl, tags):
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM tags WHERE key = ?", (key,))
+            conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", (key, raw, now + ttl, now))
+            conn.executemany("INSERT OR IGNORE INTO tags VALUES (?, ?)", [(t, key) for t in tags])
+            self.sets += 1
+            if self.sets % self.size_check_every:
+                return
+            overflow = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                victims = [r[0] for r in conn.execute(
+                    "SELECT key FROM entries ORDER BY accessed_at LIMIT ?", (overflow,))]
+                self._delete_rows(conn, victims)
+                self.evictions += len(victims)
+
+    def delete_tags(self, tags):
+        tags = list(tags)
+        if not tags:
+            return 0
+        return self.file.run(self._delete_tags, tags)
+
+    def _delete_tags(self, conn, tags):
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            marks = ",".join("?" * len(tags))
+            keys = [r[0] for r in conn.execute(
+                f"SELECT DISTINCT key FROM tags WHERE tag IN ({marks})", tags)]
+            self._delete_rows(conn, keys)
+        return len(keys)
+
+    def delete(self, keys):
+        self.file.run(self._delete, list(keys))
+
+    def _delete(self, conn, keys):
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._delete_rows(conn, keys)
+
+    def _delete_rows(self, conn, keys):
+        conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in keys])
+        conn.executemany("DELETE FROM tags WHERE key = ?", [(k,) for k in keys])
+
+    def clear(self):
+        self.file.run(self._clear)
+
+    def _clear(self, conn):
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM tags")
+
+    def size(self):
+        return self.file.run(lambda conn: conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0])
+
+
+class RedisBackend:
+    """Redis (or any RESP-compatible store). Size bounds come from the server's maxmemory policy."""
+
+    def __init__(self, url=CACHE_URL, prefix="chaiaurchhat:"):
+        import redis  # optional dependency, only needed for this backend
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl, tags):
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000))
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            pipe.sadd(tag_key, key)
+            pipe.expire(tag_key, int(ttl) + 60)
+        pipe.execute()
+
+    def delete_tags(self, tags):
+        tag_keys = [f"{self.prefix}tag:{t}" for t in tags]
+        if not tag_keys:
+            return 0
+        keys = set(self.client.sunion(tag_keys))
+        pipe = self.client.pipeline()
+        for key in keys:
+            pipe.delete(self.prefix + key.decode())
+        pipe.delete(*tag_keys)
+        pipe.execute()
+        return len(keys)
+
+    def delete(self, keys):
+        keys = [self.prefix + k for k in keys]
+        if keys:
+            self.client.delete(*keys)
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(key)
+
+    def size(self):
+        return sum(1 for _ in self.client.scan_iter(f"{self.prefix}*")
+                   if not _.startswith(f"{self.prefix}tag:".encode()))
+
+
+class Cache:
+    """Read-through cache front with tag-based invalidation and hit/miss counters.
+
+    Entries are tagged with the entities they were built from (``pg:<id>``,
+    ``review:<id>``, ...) so a write can drop exactly the keys it affects.
+    A backend error is logged and treated as a miss (or a no-op for writes):
+    the cache must never turn into a failed request.
+    """
+
+    def __init__(self, backend, ttl=CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def get(self, key):
+        try:
+            value = self.backend.get(key)
+        except Exception:
+            self._failed("get", key)
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value, tags=(), ttl=None):
+        try:
+            self.backend.set(key, value, ttl or self.ttl, tuple(tags))
+        except Exception:
+            self._failed("set", key)
+
+    def invalidate(self, *keys):
+        try:
+            self.backend.delete(keys)
+        except Exception:
+            self._failed("invalidate", keys)
+            return
+        self.invalidations += len(keys)
+
+    def invalidate_tags(self, *tags):
+        try:
+            self.invalidations += self.backend.delete_tags(tags)
+        except Exception:
+            self._failed("invalidate_tags", tags)
+
+    def _failed(self, op, what):
+        self.errors += 1
+        logger.warning("cache %s failed for %r", op, what, exc_info=True)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        try:
+            entries = self.backend.size()
+        except Exception:
+            self._failed("size", None)
+            entries = None
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.backend.evictions,
+            "expirations": self.backend.expirations,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+        }
+
+
+def make_backend(kind=CACHE_BACKEND):
+    if kind == "sqlite":
+        return SqliteBackend()
+    if kind == "redis":
+        return RedisBackend()
+    return MemoryBackend()
+
+
+cache = Cache(make_backend())
@@ -0,0 +1,41 @@
+import hashlib
+import json
+import time
+
+from flask import Response, request
+
+# Browsers must revalidate before reuse, which is a cheap 304 while nothing changed
+CACHE_CONTROL = "no-cache"
+
+
+def rendered(data):
+    """A response body serialized once, with its validators, ready to store in the cache.
+
+    The ETag is a hash of the body, so it changes exactly when the content does and
+    stays stable across workers and cache rebuilds.
+    """
+    body = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return {
+        "body": body,
+        "etag": hashlib.sha256(body.encode()).hexdigest()[:32],
+        "modified": int(time.time()),
+    }
+
+
+def send(entry):
+    """Response for a rendered entry: 304 if the client's copy is current, else the stored body."""
+    resp = Response(entry["body"], mimetype="application/json")
+    resp.set_etag(entry["etag"])
+    resp.last_modified = entry["modified"]
+    resp.cache_control.no_cache = True
+    return resp.make_conditional(request)
+
+
+def add_validators(resp):
+    """after_request hook: content-hash ETag + 304 for JSON GETs that didn't set their own."""
+    if (request.method != "GET" or resp.status_code != 200 or resp.is_streamed
+            or resp.mimetype != "application/json" or "ETag" in resp.headers):
+        return resp
+    resp.add_etag()
+    resp.cache_control.no_cache = True
+    return resp.make_conditional(request)
@@ -1,144 +1,122 @@
-from flask import Flask, jsonify, request
-import time
-import hmac
-import hashlib
-import os
-import base64
-import requests
-from dotenv import load_dotenv
-from flask_cors import CORS
-
-load_dotenv()
-
-app = Flask(__name__)
-CORS(app)
-
-PRIVATE_API_KEY = os.getenv("IMAGEKIT_PRIVATE_API_KEY")
-PUBLIC_API_KEY = os.getenv("IMAGEKIT_PUBLIC_API_KEY")
-
-@app.route('/imagekit-auth', methods=['GET'])
-def imagekit_auth():
-    token = str(int(time.time()))
-    expire = int(time.time()) + 240
-    message = token + str(expire)
-
-    signature = hmac.new(
-        bytes(PRIVATE_API_KEY, 'utf-8'),
-        msg=bytes(message, 'utf-8'),
-        digestmod=hashlib.sha1
-    ).hexdigest()
-
-    return jsonify({
-        "token": token,
-        "expire": expire,
-        "signature": signature,
-        "publicKey": PUBLIC_API_KEY
-    })
-
-@app.route('/imagekit-delete', methods=['POST'])
-def imagekit_delete():
-    data = request.json
-    file_id = data.get("fileId")
-    file_url = data.get("url")
-
-    if not file_id or not file_url:
-        return jsonify({"success": False, "error": "Missing fileId or url"}), 400
-
-    # Step 1: Delete the file
-    delete_url = f"https://api.imagekit.io/v1/files/{file_id}"
-    auth_header = base64.b64encode(f"{PRIVATE_API_KEY}:".encode()).decode()
-
-    delete_response = requests.delete(delete_url, headers={
-        "Authorization": f"Basic {auth_header}"
-    })
-
-    if delete_response.status_code != 204:
-        return jsonify({
-            "success": False,
-            "status": delete_response.status_code,
-            "error": delete_response.text
-        }), delete_response.status_code
-
-    # Step 2: Purge CDN cache
-    purge_response = requests.post(
-        "https://api.imagekit.io/v1/files/purge",
-        headers={"Authorization": f"Basic {auth_header}"},
-        json={"url": file_url}
-    )
-
-    if purge_response.status_code == 200:
-        return jsonify({"success": True})
-    else:
-        return jsonify({
-            "success": False,
-            "status": purge_response.status_code,
-            "error": purge_response.text
-        }), purge_response.status_code
-
-@app.route('/imagekit-batch-delete', methods=['POST'])
-def imagekit_batch_delete():
-    try:
-        data = request.json
-        file_ids = data.get("fileIds")
-
-        if not file_ids or not isinstance(file_ids, list):
-            return jsonify({"success": False, "error": "Missing or invalid fileIds"}), 400
-
-        auth_header = base64.b64encode(f"{PRIVATE_API_KEY}:".encode()).decode()
-
-        deleted = []
-        failed = []
-
-        for file_id in file_ids:
-            try:
-                delete_url = f"https://api.imagekit.io/v1/files/{file_id}"
-                delete_response = requests.delete(delete_url, headers={
-                    "Authorization": f"Basic {auth_header}"
-                })
-
-                if delete_response.status_code == 204:
-                    deleted.append(file_id)
-                else:
-                    failed.append({
-                        "fileId": file_id,
-                        "status": delete_response.status_code,
-                        "error": delete_response.text
-                    })
-            except Exception as e:
-                failed.append({
-                    "fileId": file_id,
-                    "error": str(e)
-                })
-
-        # Respond with appropriate status
-        if len(failed) == 0:
-            return jsonify({
-                "success": True,
-                "deleted": deleted,
-                "failed": []
-            })
-        elif len(deleted) == 0:
-            return jsonify({
-                "success": False,
-                "error": "All deletions failed.",
-                "deleted": [],
-                "failed": failed
-            }), 500
-        else:
-            return jsonify({
-                "success": False,
-                "partial": True,
-                "message": "Some files failed to delete.",
-                "deleted": deleted,
-                "failed": failed
-            }), 207  # 207: Multi-Status
-    except Exception as e:
-        return jsonify({
-            "success": False,
-            "error": "Server error",
-            "details": str(e)
-        }), 500
-
-
-if __name__ == '__main__':
-    app.run(port=5000)
+from flask import Flask, jsonify, request
+import time
+import hmac
+import hashlib
+import os
+from dotenv import load_dotenv
+from flask_cors import CORS
+from imagekit_client import file_deleted, imagekit
+from metrics import instrument
+
+load_dotenv()
+
+app = Flask(__name__)
+CORS(app)
+instrument(app)
+
+PRIVATE_API_KEY = os.getenv("IMAGEKIT_PRIVATE_API_KEY")
+PUBLIC_API_KEY = os.getenv("IMAGEKIT_PUBLIC_API_KEY")
+
+@app.route('/imagekit-auth', methods=['GET'])
+def imagekit_auth():
+    token = str(int(time.time()))
+    expire = int(time.time()) + 240
+    message = token + str(expire)
+
+    signature = hmac.new(
+        bytes(PRIVATE_API_KEY, 'utf-8'),
+        msg=bytes(message, 'utf-8'),
+        digestmod=hashlib.sha1
+    ).hexdigest()
+
+    return jsonify({
+        "token": token,
+        "expire": expire,
+        "signature": signature,
+        "publicKey": PUBLIC_API_KEY
+    })
+
+@app.route('/imagekit-delete', methods=['POST'])
+def imagekit_delete():
+    data = request.json
+    file_id = data.get("fileId")
+    file_url = data.get("url")
+
+    if not file_id or not file_url:
+        return jsonify({"success": False, "error": "Missing fileId or url"}), 400
+
+    # Step 1: Delete the file
+    delete_response = imagekit.delete_file(file_id)
+
+    if not file_deleted(delete_response):
+        return jsonify({
+            "success": False,
+            "status": delete_response.status_code,
+            "error": delete_response.text
+        }), delete_response.status_code
+
+    # Step 2: Purge CDN cache
+    purge_response = imagekit.purge(file_url)
+
+    if purge_response.status_code == 200:
+        return jsonify({"success": True})
+    else:
+        return jsonify({
+            "success": False,
+            "status": purge_response.status_code,
+            "error": purge_response.text
+        }), purge_response.status_code
+
+@app.route('/imagekit-batch-delete', methods=['POST'])
+def imagekit_batch_delete():
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"success": False, "error": "Missing or invalid fileIds"}), 400
+        file_ids = data.get("fileIds")
+        # Optional {fileId: url}; files without one have their URL looked up before deletion
+        urls = data.get("urls") or {}
+
+        if (not file_ids or not isinstance(file_ids, list) or not isinstance(urls, dict)
+                or not all(isinstance(file_id, str) and file_id for file_id in file_ids)):
+            return jsonify({"success": False, "error": "Missing or invalid fileIds"}), 400
+
+        # Deletes run concurrently over one pooled session, then the deleted URLs are purged in waves
+        deleted, failed, deleted_urls = imagekit.delete_files(list(dict.fromkeys(file_ids)), urls)
+        purge_failed = imagekit.purge_urls(deleted_urls.values())
+
+        # Respond with appropriate status
+        if len(failed) == 0 and len(purge_failed) == 0:
+            return jsonify({
+                "success": True,
+                "deleted": deleted,
+                "failed": [],
+                "purgeFailed": []
+            })
+        elif len(deleted) == 0:
+            return jsonify({
+                "success": False,
+                "error": "All deletions failed.",
+                "deleted": [],
+                "failed": failed,
+                "purgeFailed": []
+            }), 500
+        else:
+            return jsonify({
+                "success": False,
+                "partial": True,
+                "message": "Some files failed to delete." if failed else "Some deleted files could not be purged from the CDN.",
+                "deleted": deleted,
+                "failed": failed,
+                "purgeFailed": purge_failed
+            }), 207  # 207: Multi-Status
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Server error",
+            "details": str(e)
+        }), 500
+
+
+if __name__ == '__main__':
+    app.run(port=5000)
@@ -0,0 +1,268 @@
+import os
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from imagekit_client import imagekit
+from pagination import Keyset, iter_rows
+from sqlite_store import SqliteFile
+
+CLEANUP_PATH = os.getenv("IMAGE_CLEANUP_PATH", "image_cleanup.sqlite3")
+BATCH_SIZE = int(os.getenv("IMAGE_CLEANUP_BATCH", "50"))  # files per drain step
+POLL_INTERVAL = float(os.getenv("IMAGE_CLEANUP_POLL", "30"))
+MAX_ATTEMPTS = int(os.getenv("IMAGE_CLEANUP_MAX_ATTEMPTS", "8"))
+RETRY_BASE = 60.0  # seconds before the first retry of a failed delete; doubles per attempt
+LEASE = 300.0  # a claimed batch is hidden from other workers this long, in case this one dies
+
+# Reconciliation: ImageKit files under the review folder that no review references
+REVIEW_FOLDER = os.getenv("IMAGEKIT_REVIEW_FOLDER", "/reviews")
+RECONCILE_INTERVAL = float(os.getenv("IMAGE_RECONCILE_INTERVAL", str(24 * 3600)))  # 0 disables
+# Off by default: a pass only logs what it would delete. Set to 1 to queue the orphans for deletion
+RECONCILE_DELETE = os.getenv("IMAGE_RECONCILE_DELETE") == "1"
+# Uploads happen before the review is saved; younger files may still be about to be referenced
+ORPHAN_GRACE = float(os.getenv("IMAGE_ORPHAN_GRACE", str(24 * 3600)))
+LIST_PAGE_SIZE = 1000  # ImageKit's maximum for the list API
+REVIEWS_ORDER = Keyset(("id", "asc"))
+
+
+def real_file_id(img):
+    # The edit form gives images it only knows by URL a placeholder "existing-<n>" id
+    file_id = img.get("fileId")
+    return file_id if isinstance(file_id, str) and file_id and not file_id.startswith("existing-") else None
+
+
+def image_files(images):
+    """{fileId: url} for a review's `images` column; entries without a real ImageKit id are skipped."""
+    return {real_file_id(img): img.get("url")
+            for img in images or [] if isinstance(img, dict) and real_file_id(img)}
+
+
+def url_keys(url):
+    """The forms a stored image URL can match a listed file by: the URL, and its path with and
+    without the leading ImageKit endpoint segment (to compare with a file's filePath)."""
+    url = url.split("?", 1)[0]
+    path = urlsplit(url).path
+    keys = {url, path} if path else {url}
+    rest = path.lstrip("/").partition("/")[2]
+    if rest:
+        keys.add("/" + rest)
+    return keys
+
+
+def image_refs(images):
+    """Everything a review's `images` column points at: real file ids, plain URL strings and
+    the `url`/`filePath` of dict entries."""
+    refs = set()
+    for img in images or []:
+        if isinstance(img, str):
+            refs.update(url_keys(img))
+        elif isinstance(img, dict):
+            if real_file_id(img):
+                refs.add(real_file_id(img))
+            for field in ("url", "filePath"):
+                if isinstance(img.get(field), str) and img[field]:
+                    refs.update(url_keys(img[field]))
+    return refs
+
+
+def is_referenced(file, refs):
+    """True if a listed ImageKit file matches `refs` by fileId, URL or filePath."""
+    return (file.get("fileId") in refs
+            or bool(file.get("url")) and file["url"].split("?", 1)[0] in refs
+            or file.get("filePath") in refs)
+
+
+class CleanupQueue:
+    """Durable queue of ImageKit files to delete, shared by every worker process on the host."""
+
+    def __init__(self, path=CLEANUP_PATH):
+        self.file = SqliteFile(path)
+        self.file.run(self._create)
+
+    def _create(self, conn):
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS files (file_id TEXT PRIMARY KEY, url TEXT, "
+                         "attempts INTEGER NOT NULL DEFAULT 0, due_at REAL NOT NULL, last_error TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS files_due ON files (due_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL)")
+
+    def push(self, files):
+        """Queue {fileId: url}; files already queued keep their place."""
+        self.file.run(self._push, files)
+
+    def _push(self, conn, files):
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT OR IGNORE INTO files (file_id, url, due_at) VALUES (?, ?, ?)",
+                             [(file_id, url, now) for file_id, url in files.items()])
+
+    def claim(self, limit):
+        """Up to `limit` due (file_id, url, attempts) rows, leased to the caller."""
+        return self.file.run(self._claim, limit)
+
+    def _claim(self, conn, limit):
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute("SELECT file_id, url, attempts FROM files WHERE due_at <= ? "
+                                "ORDER BY due_at LIMIT ?", (now, limit)).fetchall()
+            conn.executemany("UPDATE files SET due_at = ? WHERE file_id = ?",
+                             [(now + LEASE, row[0]) for row in rows])
+        return rows
+
+    def done(self, file_ids):
+        self.file.run(self._done, file_ids)
+
+    def _done(self, conn, file_ids):
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("DELETE FROM files WHERE file_id = ?", [(f,) for f in file_ids])
+
+    def retry(self, failures):
+        """Back off each (file_id, attempts so far, error); give up after MAX_ATTEMPTS."""
+        self.file.run(self._retry, failures)
+
+    def _retry(self, conn, failures):
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for file_id, attempts, error in failures:
+                if attempts + 1 >= MAX_ATTEMPTS:
+                    print(f"❌ Giving up deleting ImageKit file {file_id} after {attempts + 1} attempts: {error}")
+                    conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+                else:
+                    conn.execute("UPDATE files SET attempts = ?, due_at = ?, last_error = ? WHERE file_id = ?",
+                                 (attempts + 1, now + RETRY_BASE * 2 ** attempts, error, file_id))
+
+    def claim_reconcile(self, interval):
+        """True for the one caller, across processes, whose turn it is to reconcile."""
+        return self.file.run(self._claim_reconcile, interval)
+
+    def _claim_reconcile(self, conn, interval):
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT value FROM meta WHERE key = 'reconciled_at'").fetchone()
+            if row is not None and now - row[0] < interval:
+                return False
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('reconciled_at', ?)", (now,))
+            return True
+
+    def size(self):
+        return self.file.run(lambda conn: conn.execute("SELECT COUNT(*) FROM files").fetchone()[0])
+
+
+class ImageCleanup:
+    """Write-behind deletion of review images that no review points at any more.
+
+    Routes enqueue removed files and return at once; a background thread drains
+    the queue in batches through the ImageKit client and, every
+    RECONCILE_INTERVAL, queues stragglers found by comparing the review folder
+    with the images the reviews reference.
+    """
+
+    def __init__(self, queue, client=imagekit):
+        self.queue = queue
+        self.client = client
+        self.wake = threading.Event()
+        self.started = False
+        self.start_lock = threading.Lock()
+
+    def enqueue(self, files):
+        if files:
+            self.queue.push(files)
+            self.wake.set()
+
+    def enqueue_removed(self, before, after):
+        """Queue images present in `before` but gone from `after` (two `images` columns).
+
+        `after` may refer to a kept image only by URL, so an image counts as kept if
+        either its id or its URL is still there.
+        """
+        kept = image_refs(after)
+        self.enqueue({f: url for f, url in image_files(before).items()
+                      if not is_referenced({"fileId": f, "url": url}, kept)})
+
+    def drain_once(self):
+        """Delete one claimed batch; returns how many files it handled."""
+        rows = self.queue.claim(BATCH_SIZE)
+        if not rows:
+            return 0
+        attempts = {file_id: n for file_id, _, n in rows}
+        urls = {file_id: url for file_id, url, _ in rows if url}
+        deleted, failed, deleted_urls = self.client.delete_files(list(attempts), urls)
+        # Best effort: the CDN copy expires on its own if a purge fails
+        self.client.purge_urls(deleted_urls.values())
+        gone = [f["fileId"] for f in failed if f.get("status") == 404]  # deleted some other way
+        self.queue.done(deleted + gone)
+        self.queue.retry([(f["fileId"], attempts[f["fileId"]], f.get("error"))
+                          for f in failed if f.get("status") != 404])
+        return len(rows)
+
+    def reconcile(self):
+        """Queue review-folder files older than ORPHAN_GRACE that no review references.
+
+        A file counts as referenced if any review holds its id, its URL or its path;
+        reviews edited in the form can keep images by URL alone. Unless
+        RECONCILE_DELETE is set the orphans are only logged, not queued.
+
+        Reviews and the folder listing are both read a page at a time; only the
+        references and the orphans found are kept in memory. The listing
+        pages by offset, so orphans are queued only after the walk: queued earlier,
+        other workers would delete them mid-walk and shift later pages past files
+        never seen. Deletions from review edits can still shift a page; anything
+        missed that way is found by the next pass.
+        """
+        referenced = set()
+        for row in iter_rows("reviews?select=id,images", REVIEWS_ORDER):
+            referenced.update(image_refs(row.get("images")))
+
+        cutoff = time.time() - ORPHAN_GRACE
+        orphans = {}
+        skip = 0
+        while True:
+            resp = self.client.list_files(REVIEW_FOLDER, skip, LIST_PAGE_SIZE)
+            resp.raise_for_status()
+            page = resp.json()
+            orphans.update((f["fileId"], f.get("url")) for f in page
+                           if not is_referenced(f, referenced) and created_at(f) < cutoff)
+            if len(page) < LIST_PAGE_SIZE:
+                break
+            skip += len(page)
+        if not RECONCILE_DELETE:
+            print(f"Image reconciliation (dry run, set IMAGE_RECONCILE_DELETE=1 to delete): "
+                  f"{len(orphans)} orphans, e.g. {sorted(orphans)[:10]}")
+            return len(orphans)
+        self.enqueue(orphans)
+        print(f"Image reconciliation: {len(referenced)} references, {len(orphans)} orphans queued")
+        return len(orphans)
+
+    def run(self):
+        while True:
+            try:
+                while self.drain_once():
+                    pass
+                if RECONCILE_INTERVAL and self.queue.claim_reconcile(RECONCILE_INTERVAL):
+                    self.reconcile()
+            except Exception as e:
+                print("Image cleanup failed:", e)
+            self.wake.wait(POLL_INTERVAL)
+            self.wake.clear()
+
+    def start_in_background(self):
+        with self.start_lock:
+            if not self.started:
+                self.started = True
+                threading.Thread(target=self.run, name="image-cleanup", daemon=True).start()
+
+
+def created_at(file):
+    try:
+        return datetime.fromisoformat(file["createdAt"].replace("Z", "+00:00")).timestamp()
+    except (KeyError, ValueError, AttributeError):
+        return float("inf")  # unknown age: never treat as orphaned
+
+
+image_cleanup = ImageCleanup(CleanupQueue())
@@ -0,0 +1,182 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from metrics import upstream_call
+
+load_dotenv()
+
+IMAGEKIT_API_URL = os.getenv("IMAGEKIT_API_URL", "https://api.imagekit.io/v1")
+PRIVATE_API_KEY = os.getenv("IMAGEKIT_PRIVATE_API_KEY")
+
+# Requests in flight at once; ImageKit rate-limits per account, so keep this modest
+CONCURRENCY = int(os.getenv("IMAGEKIT_CONCURRENCY", "8"))
+CONNECT_TIMEOUT = float(os.getenv("IMAGEKIT_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("IMAGEKIT_READ_TIMEOUT", "15"))
+RETRIES = int(os.getenv("IMAGEKIT_RETRIES", "3"))
+RETRY_BACKOFF = float(os.getenv("IMAGEKIT_RETRY_BACKOFF", "0.5"))
+MAX_RETRY_WAIT = 30  # seconds; never sleep longer than this on a rate-limit hint
+PURGE_BATCH = int(os.getenv("IMAGEKIT_PURGE_BATCH", "20"))  # purge requests per wave
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def retry_after(resp):
+    """Seconds the server asked us to wait, from Retry-After or ImageKit's X-RateLimit-Reset (ms)."""
+    try:
+        if resp.headers.get("Retry-After"):
+            return min(float(resp.headers["Retry-After"]), MAX_RETRY_WAIT)
+        if resp.headers.get("X-RateLimit-Reset"):
+            return min(float(resp.headers["X-RateLimit-Reset"]) / 1000, MAX_RETRY_WAIT)
+    except ValueError:
+        pass
+    return None
+
+
+def file_deleted(resp):
+    """True when a DELETE removed the file. A 404 on a retry counts too: an earlier
+    attempt that came back 5xx or lost its connection may have deleted it already."""
+    return resp.status_code == 204 or (resp.status_code == 404 and getattr(resp, "attempts", 1) > 1)
+
+
+def endpoint(path):
+    """The API endpoint of a request path, with the file id replaced: files/:id/details."""
+    parts = path.split("?", 1)[0].strip("/").split("/")
+    if len(parts) > 1 and parts[0] == "files" and parts[1] != "purge":
+        parts[1] = ":id"
+    return "/".join(parts)
+
+
+class ImageKitClient:
+    """Keep-alive client for the ImageKit media API with bounded concurrency.
+
+    Paths are relative to ``/v1``. 429 and 5xx responses are retried with jittered
+    backoff; a rate-limit reply pauses every thread of this client until the
+    server's reset time, not just the one that hit it.
+    """
+
+    def __init__(self, private_key, base_url=IMAGEKIT_API_URL, concurrency=CONCURRENCY,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), retries=RETRIES, backoff=RETRY_BACKOFF):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.resume_at = 0.0
+        self.lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.auth = (private_key or "", "")
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency, pool_block=True, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="imagekit")
+
+    def request(self, method, path, **kwargs):
+        with upstream_call("imagekit", method, endpoint(path)) as call:
+            resp = self._send(method, path, **kwargs)
+            call.status = resp.status_code
+            return resp
+
+    def _send(self, method, path, **kwargs):
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        for attempt in range(self.retries + 1):
+            last_try = attempt == self.retries
+            self._wait_for_rate_limit()
+            wait = None
+            try:
+                resp = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if last_try:
+                    raise
+            else:
+                if resp.status_code not in RETRY_STATUSES or last_try:
+                    resp.attempts = attempt + 1
+                    return resp
+                wait = retry_after(resp)
+                if resp.status_code == 429 and wait is not None:
+                    with self.lock:
+                        self.resume_at = max(self.resume_at, time.monotonic() + wait)
+                resp.close()
+            # Full jitter unless the server said exactly how long to wait
+            time.sleep(wait if wait is not None else random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def _wait_for_rate_limit(self):
+        delay = self.resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def delete_file(self, file_id):
+        return self.request("DELETE", f"files/{file_id}")
+
+    def file_url(self, file_id):
+        resp = self.request("GET", f"files/{file_id}/details")
+        return resp.json().get("url") if resp.ok else None
+
+    def purge(self, url):
+        return self.request("POST", "files/purge", json={"url": url})
+
+    def list_files(self, path, skip=0, limit=1000):
+        # Oldest first, so skip/limit pages stay put while new uploads arrive
+        return self.request("GET", "files", params={"path": path, "type": "file", "sort": "ASC_CREATED",
+                                                    "skip": skip, "limit": limit})
+
+    def delete_files(self, file_ids, urls=None):
+        """(deleted ids, failed entries, {deleted id: url}) for deleting `file_ids` concurrently.
+
+        URLs come from `urls` ({fileId: url}) or, failing that, are looked up before
+        the delete so the caller can purge them; a failed lookup only skips the purge.
+        """
+        urls = urls or {}
+
+        def delete(file_id):
+            url = urls.get(file_id)
+            if not url:
+                try:
+                    url = self.file_url(file_id)
+                except Exception as e:
+                    print(f"⚠️ Couldn't look up the URL of ImageKit file {file_id}, not purging it: {e}")
+                    url = None
+            try:
+                resp = self.delete_file(file_id)
+                if file_deleted(resp):
+                    return file_id, url, None
+                return file_id, None, {"fileId": file_id, "status": resp.status_code, "error": resp.text}
+            except Exception as e:
+                return file_id, None, {"fileId": file_id, "error": str(e)}
+
+        deleted, failed, deleted_urls = [], [], {}
+        for file_id, url, error in self.executor.map(delete, file_ids):
+            if error:
+                failed.append(error)
+            else:
+                deleted.append(file_id)
+                if url:
+                    deleted_urls[file_id] = url
+        return deleted, failed, deleted_urls
+
+    def purge_urls(self, urls, batch_size=PURGE_BATCH):
+        """Purge each distinct URL from the CDN, `batch_size` at a time; returns the failures."""
+        def purge(url):
+            try:
+                resp = self.purge(url)
+                if resp.ok:
+                    return None
+                return {"url": url, "status": resp.status_code, "error": resp.text}
+            except Exception as e:
+                return {"url": url, "error": str(e)}
+
+        urls = list(dict.fromkeys(urls))
+        failed = []
+        # Waves rather than one flood, so a large cleanup leaves rate-limit headroom for uploads
+        for start in range(0, len(urls), batch_size):
+            failed += [f for f in self.executor.map(purge, urls[start:start + batch_size]) if f]
+        return failed
+
+
+imagekit = ImageKitClient(PRIVATE_API_KEY)
@@ -0,0 +1,121 @@
+import threading
+import time
+
+RETRY_INTERVAL = 30.0  # min seconds between build attempts after a failure
+CHANGE_CHECK_INTERVAL = 5.0  # min seconds between reads of the shared change marker
+
+
+class RefreshingIndex:
+    """Holds an in-memory index that is rebuilt off the request path.
+
+    Subclasses implement ``load()`` (fetch + build a fresh index, or None on
+    failure) and ``apply(index, change)`` (fold one incremental change in).
+    Changes that arrive while a rebuild is fetching are replayed onto the new
+    copy after the swap, so nothing written in that window is lost.
+
+    Every worker process holds its own copy and ``update()`` only reaches the
+    caller's. With a ``shared`` cache (one all workers see, like the sqlite
+    catalog cache) an update also stamps a change marker there; the other
+    workers notice it within CHANGE_CHECK_INTERVAL and rebuild, at most once
+    per RETRY_INTERVAL, so they lag a write by about half a minute instead of
+    the full ttl.
+    """
+
+    name = "index"
+
+    def __init__(self, ttl, shared=None):
+        self.ttl = ttl
+        self.shared = shared
+        self.index = None
+        self.built_at = 0.0
+        self.building = threading.Lock()
+        self.lock = threading.Lock()  # orders update() against the fetch and swap in build()
+        self.loading = False
+        self.pending = []
+        self.last_attempt = float("-inf")
+        self.seen_change = 0.0  # wall time of the newest change this copy includes
+        self.checked_at = float("-inf")
+
+    @property
+    def ready(self):
+        return self.index is not None
+
+    @property
+    def marker_key(self):
+        return f"index-changed:{self.name}"
+
+    def load(self):
+        raise NotImplementedError
+
+    def apply(self, index, change):
+        raise NotImplementedError
+
+    def build(self):
+        if not self.building.acquire(blocking=False):
+            return  # a rebuild is already running
+        try:
+            # Updates recorded after this point are replayed; earlier ones are in the fetch
+            with self.lock:
+                self.loading = True
+                started = time.time()
+            index = self.load()
+            with self.lock:
+                self.loading = False
+                pending, self.pending = self.pending, []
+                if index is None:
+                    return
+                for change in pending:
+                    self.apply(index, change)
+                self.index = index
+                self.built_at = time.monotonic()
+                self.seen_change = max(self.seen_change, started)
+        except Exception as e:
+            with self.lock:
+                self.loading = False
+                self.pending = []
+            print(f"{self.name} build failed:", e)
+        finally:
+            self.building.release()
+
+    def build_in_background(self):
+        if time.monotonic() - self.last_attempt < RETRY_INTERVAL:
+            return
+        self.last_attempt = time.monotonic()
+        threading.Thread(target=self.build, name=self.name, daemon=True).start()
+
+    def current(self):
+        if time.monotonic() - self.built_at > self.ttl or self.changed_elsewhere():
+            self.build_in_background()  # serve the current copy meanwhile
+        return self.index
+
+    def changed_elsewhere(self):
+        if self.shared is None or time.monotonic() - self.checked_at < CHANGE_CHECK_INTERVAL:
+            return False
+        self.checked_at = time.monotonic()
+        try:
+            changed = self.shared.get(self.marker_key)
+        except Exception as e:
+            print(f"{self.name} change marker read failed:", e)
+            return False
+        return changed is not None and changed > self.seen_change
+
+    def update(self, change):
+        with self.lock:
+            if self.loading:
+                self.pending.append(change)
+            if self.index is not None:
+                self.apply(self.index, change)
+        self.mark_changed()
+
+    def mark_changed(self):
+        if self.shared is None:
+            return
+        try:
+            previous = self.shared.get(self.marker_key)
+            now = time.time()
+            self.shared.set(self.marker_key, now, ttl=self.ttl)
+            # Nothing from another worker since our copy was current: don't rebuild for our own change
+            if previous is None or previous <= self.seen_change:
+                self.seen_change = now
+        except Exception as e:
+            print(f"{self.name} change marker write failed:", e)
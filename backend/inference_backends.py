@@ -0,0 +1,86 @@
+import ctypes
+import gc
+import os
+import shutil
+
+# torch: stock fp32 weights
+# int8:  torch dynamic quantization; nn.Linear weights stored int8, activations quantized per batch
+# onnx:  ONNX Runtime graph exported once with optimum and reused from ONNX_DIR
+# onnx-int8: the exported graphs with weights dynamically quantized to int8 by onnxruntime
+BACKENDS = ("torch", "int8", "onnx", "onnx-int8")
+ONNX_DIR = os.getenv("SUMMARIZER_ONNX_DIR", "onnx_models")
+
+
+def load_seq2seq(model_name, backend="torch"):
+    """Seq2seq model for `backend` that takes torch tensors in .generate(), like the stock model."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown summarizer backend {backend!r}, expected one of {BACKENDS}")
+    if backend in ("onnx", "onnx-int8"):
+        return load_onnx(model_name, quantized=backend == "onnx-int8")
+
+    import torch
+    from transformers import AutoModelForSeq2SeqLM
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name).eval()
+    if backend == "int8":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        release_freed_memory()  # otherwise the dropped fp32 weights stay in RSS
+    return model
+
+
+def release_freed_memory():
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass  # not glibc
+
+
+def load_onnx(model_name, quantized=False):
+    # optimum[onnxruntime] is only needed for these backends
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    export_dir = os.path.join(ONNX_DIR, model_name.strip("/").replace("/", "--"))
+    if not os.path.exists(os.path.join(export_dir, "config.json")):
+        print(f"Exporting {model_name} to ONNX in {export_dir} (first start only)")
+        ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True).save_pretrained(export_dir)
+    if not quantized:
+        return ORTModelForSeq2SeqLM.from_pretrained(export_dir)
+
+    int8_dir = export_dir + "-int8"
+    if not os.path.exists(os.path.join(int8_dir, "config.json")):
+        quantize_onnx_dir(export_dir, int8_dir)
+    return ORTModelForSeq2SeqLM.from_pretrained(int8_dir)
+
+
+def quantize_onnx_dir(src, dst):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(dst, exist_ok=True)
+    for name in os.listdir(src):
+        if name.endswith(".onnx"):
+            quantize_dynamic(os.path.join(src, name), os.path.join(dst, name), weight_type=QuantType.QInt8)
+    # Config last: its presence marks the directory as complete
+    for name in sorted(os.listdir(src), key=lambda n: n == "config.json"):
+        if not name.endswith(".onnx") and os.path.isfile(os.path.join(src, name)):
+            shutil.copy(os.path.join(src, name), os.path.join(dst, name))
+
+
+def generate_ids(model, sequences, pad_token_id, min_length, max_length):
+    """Output token ids per input sequence (ids already wrapped in special tokens), one padded pass."""
+    import torch
+
+    input_ids = torch.full((len(sequences), max(map(len, sequences))), pad_token_id)
+    attention_mask = torch.zeros_like(input_ids)
+    for row, seq in enumerate(sequences):
+        input_ids[row, :len(seq)] = torch.tensor(seq)
+        attention_mask[row, :len(seq)] = 1
+    with torch.inference_mode():
+        output = model.generate(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            max_length=max_length,
+            min_length=min_length,
+            do_sample=False
+        )
+    return output.tolist()
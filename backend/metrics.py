@@ -0,0 +1,332 @@
+# Prometheus metrics for the Flask apps: per-route, per-upstream and summarizer stage
+# latencies, in-flight gauges and error counters, served as text from /metrics.
+#
+# Recording is a dict lookup and a short lock per observation. Under gunicorn every
+# worker has its own counters, so a scrape would only see whichever worker answered;
+# point METRICS_DIR at a directory private to one app and each worker writes its
+# snapshot there every METRICS_FLUSH_INTERVAL seconds, to be summed at scrape time.
+# Empty the directory before the app starts, as prometheus_client's multiprocess mode requires.
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+
+from flask import Response, g, request
+
+METRICS_DIR = os.getenv("METRICS_DIR")
+FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+# Seconds; from a cached read to a cold multi-level summary
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+registry = []
+
+
+class Value:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        self.value = value
+
+    def sample(self):
+        return self.value
+
+
+class Buckets:
+    __slots__ = ("bounds", "counts", "sum", "lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def sample(self):
+        with self.lock:
+            return [list(self.counts), self.sum]
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.children = {}
+        self.lock = threading.Lock()
+        registry.append(self)
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(values, self.new_child())
+        return child
+
+    def samples(self):
+        return {values: child.sample() for values, child in list(self.children.items())}
+
+
+class Counter(Metric):
+    kind = "counter"
+    new_child = Value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+    new_child = Value
+
+    def __init__(self, name, help, labels=(), function=None):
+        super().__init__(name, help, labels)
+        # Read at scrape time: returns {label values tuple: value}
+        self.function = function
+
+    def samples(self):
+        if self.function is not None:
+            return dict(self.function())
+        return super().samples()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def new_child(self):
+        return Buckets(self.buckets)
+
+
+class timed:
+    """Context manager observing the elapsed seconds into a histogram child."""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+HTTP_SECONDS = Histogram("http_request_duration_seconds", "Time to produce a response, by route",
+                         ("route", "method"))
+HTTP_REQUESTS = Counter("http_requests_total", "Responses, by route and status", ("route", "method", "status"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being handled, by route", ("route",))
+
+UPSTREAM_SECONDS = Histogram("upstream_request_duration_seconds",
+                             "Upstream call time including retries, by service and target",
+                             ("upstream", "method", "target"))
+UPSTREAM_REQUESTS = Counter("upstream_requests_total",
+                            "Upstream calls by final status; 'error' means no response at all",
+                            ("upstream", "method", "target", "status"))
+UPSTREAM_IN_FLIGHT = Gauge("upstream_requests_in_flight", "Upstream calls waiting on a reply", ("upstream",))
+
+
+class upstream_call:
+    """Times one upstream call; set `.status` from the response before leaving the block.
+
+        with upstream_call("supabase", "GET", "reviews") as call:
+            resp = ...
+            call.status = resp.status_code
+    """
+
+    __slots__ = ("upstream", "method", "target", "status", "start")
+
+    def __init__(self, upstream, method, target):
+        self.upstream = upstream
+        self.method = method
+        self.target = target
+        self.status = "error"
+
+    def __enter__(self):
+        UPSTREAM_IN_FLIGHT.labels(self.upstream).inc()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        UPSTREAM_IN_FLIGHT.labels(self.upstream).dec()
+        UPSTREAM_SECONDS.labels(self.upstream, self.method, self.target).observe(elapsed)
+        UPSTREAM_REQUESTS.labels(self.upstream, self.method, self.target, str(self.status)).inc()
+
+
+def instrument(app):
+    """Time every request of `app` by its URL rule and serve the registry at /metrics."""
+
+    @app.before_request
+    def start_timer():
+        if METRICS_DIR and flusher_pid != os.getpid():
+            start_flusher()
+        # The rule, not the path, so /pg/<pg_id> is one series rather than one per PG
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        g.metrics_route = route
+        g.metrics_start = time.perf_counter()
+        HTTP_IN_FLIGHT.labels(route).inc()
+
+    @app.after_request
+    def record_status(resp):
+        g.metrics_status = resp.status_code
+        return resp
+
+    @app.teardown_request
+    def stop_timer(exc):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return
+        route = g.metrics_route
+        status = 500 if exc is not None else g.get("metrics_status", 500)
+        HTTP_IN_FLIGHT.labels(route).dec()
+        HTTP_SECONDS.labels(route, request.method).observe(time.perf_counter() - start)
+        HTTP_REQUESTS.labels(route, request.method, str(status)).inc()
+
+    app.add_url_rule("/metrics", "metrics", metrics_endpoint, methods=["GET"])
+    return app
+
+
+def metrics_endpoint():
+    return Response(exposition(collect()), mimetype="text/plain; version=0.0.4")
+
+
+def snapshot():
+    return {m.name: {"kind": m.kind, "help": m.help, "labels": m.label_names,
+                     "buckets": getattr(m, "buckets", None),
+                     "samples": [[list(values), value] for values, value in m.samples().items()]}
+            for m in registry}
+
+
+def collect():
+    """This process's metrics plus, with METRICS_DIR, every other worker's last snapshot."""
+    merged = snapshot()
+    if not METRICS_DIR:
+        return merged
+    for name in os.listdir(METRICS_DIR):
+        pid, ext = os.path.splitext(name)
+        if ext != ".json" or not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, name)) as f:
+                other = json.load(f)
+        except (OSError, ValueError):
+            continue
+        alive = pid_alive(int(pid))
+        for metric, family in other.items():
+            # A dead worker's counts still happened; its gauges no longer mean anything
+            if metric in merged and (alive or family["kind"] != "gauge"):
+                merge_samples(merged[metric], family["samples"])
+    return merged
+
+
+def merge_samples(family, samples):
+    current = {tuple(values): value for values, value in family["samples"]}
+    for values, value in samples:
+        values = tuple(values)
+        if values not in current:
+            current[values] = value
+        elif family["kind"] == "histogram":
+            counts, total = current[values]
+            current[values] = [[a + b for a, b in zip(counts, value[0])], total + value[1]]
+        else:
+            current[values] += value
+    family["samples"] = [[list(values), value] for values, value in current.items()]
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def exposition(families):
+    lines = []
+    for name, family in families.items():
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+        for values, value in sorted(family["samples"], key=lambda s: s[0]):
+            labels = list(zip(family["labels"], values))
+            if family["kind"] != "histogram":
+                lines.append(f"{name}{label_text(labels)} {number(value)}")
+                continue
+            counts, total = value
+            cumulative = 0
+            for bound, count in zip(list(family["buckets"]) + ["+Inf"], counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else number(bound)
+                lines.append(f"{name}_bucket{label_text(labels + [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{label_text(labels)} {number(total)}")
+            lines.append(f"{name}_count{label_text(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def label_text(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+def number(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+flusher_pid = None
+
+
+def flush():
+    path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(snapshot(), f)
+    os.replace(path + ".tmp", path)
+
+
+def flush_forever():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            flush()
+        except OSError as e:
+            print("Metrics flush failed:", e)
+
+
+def start_flusher():
+    # Started lazily in each worker: threads started before gunicorn forks don't survive it
+    global flusher_pid
+    with flusher_lock:
+        if flusher_pid == os.getpid():
+            return
+        flusher_pid = os.getpid()
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        threading.Thread(target=flush_forever, name="metrics-flush", daemon=True).start()
+        atexit.register(flush)
+
+
+flusher_lock = threading.Lock()
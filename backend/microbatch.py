@@ -0,0 +1,85 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Pools work from concurrent callers into batched calls on one worker thread.
+
+    ``run_batch(key, items)`` returns one result per item. Items only share a
+    batch with items of the same ``key`` (e.g. generation settings). Once the
+    first item arrives the worker waits at most ``max_wait`` seconds for more,
+    and never puts more than ``max_batch`` items in one call.
+    """
+
+    def __init__(self, run_batch, max_batch=8, max_wait=0.015, name="microbatch"):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        self.worker = threading.Thread(target=self._loop, name=name, daemon=True)
+        self.worker.start()
+
+    def submit(self, key, item):
+        future = Future()
+        self.queue.put((key, item, future))
+        return future
+
+    def map(self, key, items):
+        """Results for `items` in order; raises the first failure."""
+        futures = [self.submit(key, item) for item in items]
+        return [f.result() for f in futures]
+
+    def _collect(self):
+        pending = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(pending) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                pending.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        # Drain whatever else is already waiting; it's grouped and capped below
+        while True:
+            try:
+                pending.append(self.queue.get_nowait())
+            except queue.Empty:
+                return pending
+
+    def _loop(self):
+        while True:
+            groups = {}
+            for key, item, future in self._collect():
+                groups.setdefault(key, []).append((item, future))
+            for key, entries in groups.items():
+                for start in range(0, len(entries), self.max_batch):
+                    self._run(key, entries[start:start + self.max_batch])
+
+    def _run(self, key, entries):
+        # Callers can cancel items right up until their batch starts
+        entries = [(item, future) for item, future in entries if future.set_running_or_notify_cancel()]
+        if not entries:
+            return
+        self.batches += 1
+        self.items += len(entries)
+        try:
+            results = self.run_batch(key, [item for item, _ in entries])
+        except Exception as e:
+            for _, future in entries:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(entries, results):
+            future.set_result(result)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "queued": self.queue.qsize(),
+        }
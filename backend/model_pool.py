@@ -0,0 +1,76 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+from inference_backends import generate_ids, load_seq2seq
+
+# Set in each worker process by _init_worker
+_model = None
+_ready = None
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _init_worker(model_name, backend, threads, warmup, ready):
+    global _model, _ready
+    import torch
+
+    # Workers split the cores between them; torch's default of one thread per core
+    # in every worker would oversubscribe the machine
+    torch.set_num_threads(threads)
+    _model = load_seq2seq(model_name, backend)
+    _ready = ready
+    if warmup:
+        _generate(*warmup)
+
+
+def _generate(sequences, pad_token_id, min_length, max_length):
+    return generate_ids(_model, sequences, pad_token_id, min_length, max_length)
+
+
+def _check_in(timeout):
+    # Blocks this worker until every worker has checked in, so each one takes exactly one call
+    _ready.wait(timeout)
+    return os.getpid()
+
+
+class ModelPool:
+    """A copy of the seq2seq model in each of `workers` processes; batches fan out across them.
+
+    Each worker holds the full model, so memory grows with `workers`. Processes are
+    spawned rather than forked: forking a parent that has already started torch's
+    thread pools can deadlock the child.
+    """
+
+    def __init__(self, model_name, backend="torch", workers=None, threads=None, warmup=None):
+        """`warmup` is a (sequences, pad_token_id, min_length, max_length) call each worker runs once loaded."""
+        self.workers = workers or available_cores()
+        self.threads = threads or max(1, available_cores() // self.workers)
+        context = multiprocessing.get_context("spawn")
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(model_name, backend, self.threads, warmup, context.Barrier(self.workers)),
+        )
+
+    def generate(self, sequences, pad_token_id, min_length, max_length):
+        """Same as generate_ids, with the batch split evenly over the workers."""
+        parts = min(self.workers, len(sequences))
+        size = -(-len(sequences) // parts)
+        futures = [self.executor.submit(_generate, sequences[i:i + size], pad_token_id, min_length, max_length)
+                   for i in range(0, len(sequences), size)]
+        return [ids for future in futures for ids in future.result()]
+
+    def wait_ready(self, timeout=600):
+        """Start every worker and block until all of them have loaded and warmed up the model."""
+        pids = [self.executor.submit(_check_in, timeout) for _ in range(self.workers)]
+        return sorted(future.result() for future in pids)
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
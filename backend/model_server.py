@@ -0,0 +1,200 @@
+# One process holding the summarizer model for every web worker on the host.
+#
+#   cd backend && python model_server.py &
+#   SUMMARIZER_SERVER=summarizer.sock gunicorn -w 4 app:app
+#
+# Web workers keep only the tokenizer and send token ids over a local socket, so
+# the model's memory is paid once however many workers serve HTTP. Chunks from all
+# workers share forward passes through one micro-batcher; SUMMARIZER_WORKERS > 1
+# (or 0 for one per core) fans those out over a ModelPool as in a single app process.
+#
+# Messages are JSON (token ids in, token ids out), never pickles. Connections
+# authenticate with SUMMARIZER_SERVER_KEY or, when that is unset, a random key the
+# server writes to SUMMARIZER_SERVER_KEY_FILE (mode 0600) for clients of the same user.
+import ipaddress
+import json
+import os
+import secrets
+import stat
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+# A filesystem path is a Unix socket; host:port is TCP, loopback only
+ADDRESS = os.getenv("SUMMARIZER_SERVER", "summarizer.sock")
+KEY_FILE = os.getenv("SUMMARIZER_SERVER_KEY_FILE", "summarizer.key")
+
+
+def parse_address(address):
+    host, sep, port = address.rpartition(":")
+    if not (sep and port.isdigit()):
+        return address
+    host = host or "127.0.0.1"
+    try:
+        # multiprocessing's TCP addresses are IPv4
+        loopback = host == "localhost" or ipaddress.IPv4Address(host).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback:
+        raise ValueError(f"Model server address {address!r} is not on loopback; use a Unix socket path "
+                         "or 127.0.0.1:<port>")
+    return host, int(port)
+
+
+def load_authkey(create=False):
+    """SUMMARIZER_SERVER_KEY, else the key in KEY_FILE; the server (`create`) writes one if missing."""
+    key = os.getenv("SUMMARIZER_SERVER_KEY")
+    if key:
+        return key.encode()
+    if create and not os.path.exists(KEY_FILE):
+        # Written aside and linked into place, so a client never reads a half-written key
+        tmp = f"{KEY_FILE}.{os.getpid()}.tmp"
+        with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+            f.write(secrets.token_hex(32))
+        try:
+            os.link(tmp, KEY_FILE)
+        except FileExistsError:
+            pass  # another server got there first; use its key
+        finally:
+            os.remove(tmp)
+    # Raises FileNotFoundError (an OSError, so wait_ready retries) until the server has written it
+    with open(KEY_FILE) as f:
+        if os.fstat(f.fileno()).st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+            raise PermissionError(f"{KEY_FILE} is readable by other users; chmod 600 it or set "
+                                  "SUMMARIZER_SERVER_KEY")
+        key = f.read().strip()
+    if not key:
+        raise ValueError(f"{KEY_FILE} is empty")
+    return key.encode()
+
+
+def valid_request(message):
+    sequences = message.get("sequences")
+    ints = [message.get(k) for k in ("pad_token_id", "min_length", "max_length")]
+    return (isinstance(sequences, list) and sequences
+            and all(isinstance(seq, list) and seq and all(type(t) is int for t in seq) for seq in sequences)
+            and all(type(n) is int for n in ints))
+
+
+class ModelClient:
+    """generate_ids() over the socket; one connection per calling thread."""
+
+    def __init__(self, address=ADDRESS, authkey=None):
+        self.address = parse_address(address)
+        self.authkey = authkey
+        self.local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            if self.authkey is None:
+                self.authkey = load_authkey()
+            conn = self.local.conn = Client(self.address, authkey=self.authkey)
+        return conn
+
+    def generate(self, sequences, pad_token_id, min_length, max_length):
+        message = {"sequences": sequences, "pad_token_id": pad_token_id,
+                   "min_length": min_length, "max_length": max_length}
+        try:
+            conn = self._connection()
+            conn.send_bytes(json.dumps(message).encode())
+            reply = json.loads(conn.recv_bytes())
+        except (OSError, EOFError):
+            # Server restarted or dropped us: reconnect on the next call
+            self.local.conn = None
+            raise
+        if not reply.get("ok"):
+            raise RuntimeError(f"Model server: {reply.get('error')}")
+        return reply["ids"]
+
+    def wait_ready(self, timeout=600):
+        # The server only listens once its model is loaded and warm
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self._connection()
+            except PermissionError:
+                raise
+            except (OSError, EOFError):
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.5)
+
+
+def serve(address=ADDRESS, authkey=None):
+    # Imported here so ModelClient users never load torch
+    from transformers import AutoTokenizer
+    from inference_backends import generate_ids, load_seq2seq
+    from microbatch import MicroBatcher
+    from model_pool import ModelPool, available_cores
+
+    model_name = os.getenv("SUMMARIZER_MODEL", "sshleifer/distilbart-cnn-12-6")
+    backend = os.getenv("SUMMARIZER_BACKEND", "torch")
+    workers = int(os.getenv("SUMMARIZER_WORKERS", "1")) or available_cores()  # 0: one per core
+    max_batch = int(os.getenv("SUMMARIZER_MAX_BATCH", "8")) * workers
+    wait = float(os.getenv("SUMMARIZER_BATCH_WAIT_MS", "15")) / 1000
+
+    # Checked before the model loads, so a bad address or key file fails fast
+    address = parse_address(address)
+    authkey = authkey or load_authkey(create=True)
+
+    start = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    warmup = ([tokenizer("The rooms are clean and the food is good.")["input_ids"]], tokenizer.pad_token_id, 5, 20)
+    if workers > 1:
+        pool = ModelPool(model_name, backend, workers, warmup=warmup)
+        pool.wait_ready()
+        generate = pool.generate
+    else:
+        model = load_seq2seq(model_name, backend)
+        generate_ids(model, *warmup)
+        generate = lambda *args: generate_ids(model, *args)  # noqa: E731
+
+    def run_batch(key, sequences):
+        return generate(sequences, *key)
+
+    batcher = MicroBatcher(run_batch, max_batch, wait, name="model-server")
+
+    def handle(conn):
+        with conn:
+            while True:
+                try:
+                    message = json.loads(conn.recv_bytes())
+                except (EOFError, OSError):
+                    return
+                except ValueError:
+                    message = None
+                if not isinstance(message, dict) or not valid_request(message):
+                    reply = {"ok": False, "error": "malformed request"}
+                else:
+                    sequences = message["sequences"]
+                    key = (message["pad_token_id"], message["min_length"], message["max_length"])
+                    try:
+                        reply = {"ok": True, "ids": batcher.map(key, sequences)}
+                    except Exception as e:
+                        print(f"❌ Error generating for {len(sequences)} sequences: {e}")
+                        reply = {"ok": False, "error": str(e)}
+                try:
+                    conn.send_bytes(json.dumps(reply).encode())
+                except OSError:
+                    return
+
+    if isinstance(address, str) and os.path.exists(address):
+        os.remove(address)  # stale socket from a previous run
+    with Listener(address, authkey=authkey) as listener:
+        if isinstance(address, str):
+            os.chmod(address, 0o600)
+        print(f"Model server ready ({model_name}, {backend}, {workers} worker(s)) on {address} "
+              f"in {time.perf_counter() - start:.1f}s")
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # A client that fails the auth handshake must not take the server down
+                print(f"Rejected model server connection: {e}")
+                continue
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,130 @@
+import base64
+import binascii
+import itertools
+import json
+from urllib.parse import quote
+
+from flask import Response
+
+from supabase_client import db
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+STREAM_PAGE_SIZE = 500  # rows per upstream request while streaming
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, width=None):
+    """Cursor values; `width` is the number of keyset columns they must cover."""
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or (width is not None and len(values) != width):
+        raise ValueError("Invalid cursor")
+    if not all(v is None or isinstance(v, (str, int, float)) for v in values):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def quote_value(value):
+    # Double-quoted so commas/parens can't break the or=(...) grammar, then
+    # percent-encoded so "+" in timestamps isn't read as a space
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return '"' + quote(escaped, safe="") + '"'
+
+
+class Keyset:
+    """Stable ordering plus the PostgREST filter that resumes strictly after a row.
+
+    ``columns`` is e.g. ``[("date", "desc"), ("id", "asc")]``; the last column must
+    be unique. Nulls sort last, which the resume filter accounts for.
+    """
+
+    def __init__(self, *columns):
+        self.columns = columns
+
+    def order(self):
+        return ",".join(f"{col}.{direction}.nullslast" for col, direction in self.columns)
+
+    def cursor_for(self, row):
+        return encode_cursor([row.get(col) for col, _ in self.columns])
+
+    def after(self, values):
+        """or=(...) body matching rows that sort strictly after the cursor row.
+
+        Column i may move past the cursor only when every earlier column ties; with
+        nulls last, "past" a value means greater/less or null, and nothing is past null.
+        """
+        clauses = []
+        ties = []
+        for (col, direction), value in zip(self.columns, values):
+            if value is not None:
+                op = "lt" if direction == "desc" else "gt"
+                step = f"or({col}.{op}.{quote_value(value)},{col}.is.null)"
+                clauses.append(f"and({','.join(ties + [step])})" if ties else step)
+            ties.append(f"{col}.is.null" if value is None else f"{col}.eq.{quote_value(value)}")
+        return f"({','.join(clauses)})"
+
+    def query(self, path, limit, after=None, prefix=""):
+        """`path` plus order/limit (and resume filter) params, optionally for an embedded resource."""
+        sep = "&" if "?" in path else "?"
+        query = f"{path}{sep}{prefix}order={self.order()}&{prefix}limit={limit}"
+        if after is not None:
+            query += f"&{prefix}or={self.after(after)}"
+        return query
+
+
+def page_args(args, keyset, prefix=""):
+    """(limit, after) when the caller asked for a page, else None for the legacy full list."""
+    limit_key, after_key = f"{prefix}limit", f"{prefix}after"
+    if limit_key not in args and after_key not in args:
+        return None
+    limit = max(1, min(args.get(limit_key, DEFAULT_LIMIT, type=int), MAX_LIMIT))
+    after = decode_cursor(args[after_key], len(keyset.columns)) if args.get(after_key) else None
+    return limit, after
+
+
+def fetch_page(path, keyset, limit, after=None):
+    """One page plus the cursor for the next (None at the end). Raises on upstream errors."""
+    resp = db.get(keyset.query(path, limit + 1, after))
+    resp.raise_for_status()
+    rows = resp.json()
+    next_cursor = keyset.cursor_for(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def iter_rows(path, keyset, page_size=STREAM_PAGE_SIZE, after=None):
+    while True:
+        rows, after_token = fetch_page(path, keyset, page_size, after)
+        yield from rows
+        if after_token is None:
+            return
+        after = decode_cursor(after_token)
+
+
+def stream_response(path, keyset, fmt, transform=None, after=None):
+    """Rows written to the client page by page as NDJSON or a chunked JSON array."""
+    transform = transform or (lambda row: row)
+    # First page is fetched eagerly so an upstream failure is still a clean error response
+    first, token = fetch_page(path, keyset, STREAM_PAGE_SIZE, after)
+    rest = iter_rows(path, keyset, after=decode_cursor(token)) if token else ()
+    rows = itertools.chain(first, rest)
+
+    def ndjson():
+        for row in rows:
+            yield json.dumps(transform(row)) + "\n"
+
+    def json_array():
+        yield "["
+        for i, row in enumerate(rows):
+            yield ("," if i else "") + json.dumps(transform(row))
+        yield "]"
+
+    if fmt == "ndjson":
+        return Response(ndjson(), mimetype="application/x-ndjson")
+    return Response(json_array(), mimetype="application/json")
@@ -1,80 +1,293 @@
-import requests
+import os
+import threading
+
+import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import os
-from dotenv import load_dotenv
+from supabase_client import db
+from pagination import Keyset, iter_rows
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_API_KEY = os.getenv("SUPABASE_API_KEY")
+TOP_K = int(os.getenv("RECOMMENDER_TOP_K", "20"))
+# Upper bound on the similarity block materialised per chunk of rows
+CHUNK_BUDGET_BYTES = int(os.getenv("RECOMMENDER_CHUNK_BUDGET_MB", "256")) * 1024 * 1024
 
-HEADERS = {
-    "apikey": SUPABASE_API_KEY,
-    "Authorization": f"Bearer {SUPABASE_API_KEY}"
-}
 
-def fetch_data():
-    pgs_url = f"{SUPABASE_URL}/rest/v1/pgs?select=*"
-    reviews_url = f"{SUPABASE_URL}/rest/v1/reviews?select=pg_id,comment"
+# Reviews walked PG by PG, oldest first within each PG
+REVIEWS_BY_PG = Keyset(("pg_id", "asc"), ("date", "asc"), ("id", "asc"))
+
+
+def iter_reviews_by_pg(columns="comment", after_pg=None):
+    """(pg_id, [review rows]) for every PG with reviews, in pg_id order, paged from Supabase.
 
-    pg_resp = requests.get(pgs_url, headers=HEADERS)
-    rev_resp = requests.get(reviews_url, headers=HEADERS)
+    Rows carry pg_id, date and id (the paging keyset) plus `columns`. `after_pg`
+    skips PGs up to and including that id.
+    """
+    path = f"reviews?select=pg_id,date,id,{columns}"
+    if after_pg is not None:
+        path += f"&pg_id=gt.{after_pg}"
+    pg_id, group = None, []
+    for row in iter_rows(path, REVIEWS_BY_PG):
+        if group and row["pg_id"] != pg_id:
+            yield pg_id, group
+            group = []
+        pg_id = row["pg_id"]
+        group.append(row)
+    if group:
+        yield pg_id, group
 
-    if not pg_resp.ok or not rev_resp.ok:
+
+def fetch_data():
+    pg_resp = db.get("pgs?select=*")
+
+    if not pg_resp.ok:
         raise Exception("Failed to fetch data from Supabase")
 
     pgs = pd.DataFrame(pg_resp.json())
-    reviews = pd.DataFrame(rev_resp.json())
+    reviews = pd.DataFrame(
+        [(pg_id, " ".join(filter(None, (r.get("comment") for r in rows))))
+         for pg_id, rows in iter_reviews_by_pg()],
+        columns=["pg_id", "comment"],
+    )
 
     # Merge review comments with PGs
-    reviews = reviews.groupby("pg_id")["comment"].apply(lambda x: " ".join(filter(None, x))).reset_index()
     merged = pgs.merge(reviews, how="left", left_on="id", right_on="pg_id")
 
     return merged
 
-def build_similarity_matrix(df):
-    def combine_text(row):
-        tags = " ".join(row.get("tags") or [])
-        gender = row.get("gender_type", "")
-        # desc = row.get("description", "")
-        college = row.get("college", "")
-        comment = row.get("comment", "")
-        return f"{tags} {desc} {comment} {gender} {college}".lower()
 
-    df["combined"] = df.apply(combine_text, axis=1)
+def combine_text(row):
+    tags = " ".join(row.get("tags") or [])
+    gender = row.get("gender_type") or ""
+    desc = row.get("description") or ""
+    college = row.get("college") or ""
+    comment = row.get("comment") or ""
+    return f"{tags} {desc} {comment} {gender} {college}".lower()
 
-    vectorizer = TfidfVectorizer(stop_words="english")
-    tfidf_matrix = vectorizer.fit_transform(df["combined"])
-    cosine_sim = cosine_similarity(tfidf_matrix)
 
-    return df, cosine_sim
+def top_k_neighbours(matrix, k, rows=None, chunk_budget=None):
+    """Top-k cosine neighbours (excluding self) for `rows` of an L2-normalised sparse matrix.
 
-def recommend_pg(pg_name, top_n=3, rating_margin=0.45):
-    df = fetch_data()
+    Rows are multiplied against the whole matrix a chunk at a time (sparse matrix
+    times a dense slab of the chunk's rows, which beats sparse x sparse once the
+    output is dense-ish). The chunk is sized so the slab plus its similarity block
+    fit in ``chunk_budget`` bytes. Memory is O(rows * k) for the result plus one
+    block, never O(n^2). Only positive similarities are listed; unused slots are -1.
+    """
+    n = matrix.shape[0]
+    rows = np.arange(n) if rows is None else np.asarray(rows)
+    neighbours = np.full((len(rows), k), -1, dtype=np.int32)
+    scores = np.zeros((len(rows), k), dtype=np.float32)
+    k_eff = min(k, n - 1)
+    if k_eff <= 0:
+        return neighbours, scores
 
-    if pg_name not in df["name"].values:
-        print(f"PG named '{pg_name}' not found.")
-        return []
+    chunk = max(1, (chunk_budget or CHUNK_BUDGET_BYTES) // ((n + matrix.shape[1]) * 4))
+    for start in range(0, len(rows), chunk):
+        batch = rows[start:start + chunk]
+        # (n, chunk): column j holds every row's similarity to batch[j]
+        block = np.asarray(matrix @ matrix[batch].T.toarray())
+        block[batch, np.arange(len(batch))] = 0  # never your own neighbour
+        top = np.argpartition(-block, k_eff - 1, axis=0)[:k_eff].T
+        top_scores = np.take_along_axis(block, top.T, axis=0).T
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        out = slice(start, start + len(batch))
+        neighbours[out, :k_eff] = np.where(top_scores > 0, top, -1)
+        scores[out, :k_eff] = np.where(top_scores > 0, top_scores, 0)
+    return neighbours, scores
 
-    df, cosine_sim = build_similarity_matrix(df)
 
-    idx = df[df["name"] == pg_name].index[0]
-    target_rating = df.loc[idx, "rating"]
-    target_college_id = df.loc[idx, "college_id"]
+def _prepare(df):
+    df = df.copy()
+    # pgs carries avg_rating; older rows used `rating`
+    if "avg_rating" in df:
+        df["rating"] = df["avg_rating"]
+    elif "rating" not in df:
+        df["rating"] = np.nan
+    df["combined"] = df.apply(combine_text, axis=1)
+    return df
 
-    if pd.isna(target_rating):
-        print(f"No rating available for '{pg_name}'")
-        return []
 
-    mask = (
-        (df["college_id"] == target_college_id) &
-        (df["rating"].notna()) &
-        (abs(df["rating"] - target_rating) <= rating_margin) &
-        (df.index != idx)
+def replace_rows(matrix, rows, vectors):
+    """matrix with `rows` swapped for `vectors`, as two O(nnz) sparse products."""
+    n = matrix.shape[0]
+    keep = np.ones(n, dtype=np.float32)
+    keep[rows] = 0
+    place = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, np.arange(len(rows)))),
+        shape=(n, len(rows)),
     )
+    result = (sparse.diags(keep) @ matrix + place @ vectors).tocsr()
+    result.eliminate_zeros()
+    return result
+
+
+class RecommenderEngine:
+    """Fit-once TF-IDF recommender holding the sparse matrix and per-PG top-k lists.
+
+    Library only: api.py answers /recommend from recommend_index, not from here.
+    Callers fold edits in themselves with fold_in().
+    """
+
+    def __init__(self, top_k=TOP_K):
+        self.top_k = top_k
+        self.df = None
+        self.vectorizer = None
+        self.matrix = None
+        self.neighbours = None
+        self.scores = None
+        self.row_of = {}  # pg id -> row
+        self.row_by_name = {}
+        self.ratings = None
+        self.colleges = None
+        self.lock = threading.RLock()
+
+    @property
+    def fitted(self):
+        return self.matrix is not None
+
+    def fit(self, df):
+        df = _prepare(df.reset_index(drop=True))
+
+        vectorizer = TfidfVectorizer(stop_words="english", dtype=np.float32)
+        # TfidfVectorizer rows are L2-normalised, so a dot product is the cosine
+        matrix = vectorizer.fit_transform(df["combined"]).tocsr()
+        neighbours, scores = top_k_neighbours(matrix, self.top_k)
+
+        with self.lock:
+            self.df, self.vectorizer, self.matrix = df, vectorizer, matrix
+            self.neighbours, self.scores = neighbours, scores
+            self.row_of = {pg_id: i for i, pg_id in enumerate(df["id"])}
+            self._index_columns()
+        return self
 
-    similar_scores = [(i, cosine_sim[idx][i]) for i in df[mask].index]
-    similar_scores.sort(key=lambda x: x[1], reverse=True)
+    def _index_columns(self):
+        df = self.df
+        self.row_by_name = {}
+        for i, name in enumerate(df["name"]):
+            self.row_by_name.setdefault(name, i)
+        self.ratings = pd.to_numeric(df["rating"], errors="coerce").to_numpy(dtype=np.float64)
+        self.colleges = df["college_id"].to_numpy() if "college_id" in df else np.full(len(df), None)
 
-    recommendations = df.loc[[i for i, _ in similar_scores[:top_n]], "name"].tolist()
-    return recommendations
+    def fold_in(self, rows):
+        """Add or replace PGs (dicts shaped like fetch_data rows) without refitting.
+
+        The vocabulary and IDF weights stay frozen until the next fit(). Changed rows
+        get fresh neighbour lists. Every other row only needs its similarity to the
+        changed rows, which comes from one (changed x n) sparse product.
+        """
+        if not rows:
+            return
+        with self.lock:
+            new = _prepare(pd.DataFrame(rows))
+            vectors = self.vectorizer.transform(new["combined"]).astype(np.float32).tocsr()
+            df, matrix = self.df, self.matrix
+
+            replaced = [i for i, pg_id in enumerate(new["id"]) if pg_id in self.row_of]
+            if replaced:
+                rows_at = np.array([self.row_of[new["id"][i]] for i in replaced])
+                matrix = replace_rows(matrix, rows_at, vectors[replaced])
+                for i, row in zip(replaced, rows_at):
+                    for column in new.columns.intersection(df.columns):
+                        df.at[row, column] = new.at[i, column]
+
+            appended = [i for i, pg_id in enumerate(new["id"]) if pg_id not in self.row_of]
+            if appended:
+                first = matrix.shape[0]
+                matrix = sparse.vstack([matrix, vectors[appended]], format="csr")
+                df = pd.concat([df, new.iloc[appended]], ignore_index=True)
+                pad = len(appended), self.neighbours.shape[1]
+                self.neighbours = np.vstack([self.neighbours, np.full(pad, -1, np.int32)])
+                self.scores = np.vstack([self.scores, np.zeros(pad, np.float32)])
+                for offset, i in enumerate(appended):
+                    self.row_of[new["id"][i]] = first + offset
+
+            self.df, self.matrix = df, matrix
+            self._index_columns()
+            changed = np.array([self.row_of[pg_id] for pg_id in new["id"]], dtype=np.int64)
+            sims = (matrix @ matrix[changed].T).toarray().T  # (changed, n)
+            changed_set = set(changed.tolist())
+            k = self.neighbours.shape[1]
+
+            # Other rows: a changed PG scoring higher just slots into their list, which keeps
+            # it an exact top-k. If a listed PG now scores lower, whatever ranks next isn't
+            # in the list, so that row is recomputed from scratch along with the changed ones.
+            dirty = set(changed_set)
+            for c, row in enumerate(changed):
+                listing_rows, slots = np.nonzero(self.neighbours == row)
+                dropped = sims[c][listing_rows] < self.scores[listing_rows, slots]
+                dirty.update(listing_rows[dropped].tolist())
+                kth = np.where(self.neighbours[:, -1] == -1, 0, self.scores[:, -1]) if k else np.inf
+                for other in np.nonzero(sims[c] > kth)[0].tolist():
+                    if other not in dirty:
+                        self._offer(other, row, float(sims[c][other]))
+
+            dirty = np.array(sorted(dirty), dtype=np.int64)
+            self.neighbours[dirty], self.scores[dirty] = top_k_neighbours(matrix, k, dirty)
+
+    def _offer(self, row, candidate, score):
+        neighbours, scores = self.neighbours[row], self.scores[row]
+        hit = np.nonzero(neighbours == candidate)[0]
+        if hit.size:
+            scores[hit[0]] = score
+        else:
+            neighbours[-1], scores[-1] = candidate, score
+        order = np.argsort(np.where(neighbours == -1, np.inf, -scores), kind="stable")
+        self.neighbours[row], self.scores[row] = neighbours[order], scores[order]
+
+    def similar_rows(self, idx, candidates, top_n):
+        """Best candidate rows for idx, from the precomputed list when it has enough of them.
+
+        Any candidate missing from the top-k list scores no higher than the listed
+        ones, so the list is exact whenever it holds top_n candidates (or all of them).
+        """
+        listed = [(int(j), float(s)) for j, s in zip(self.neighbours[idx], self.scores[idx])
+                  if j >= 0 and candidates[j]]
+        if len(listed) >= min(top_n, candidates.sum()):
+            return listed[:top_n]
+        row = (self.matrix @ self.matrix[idx].T).toarray().ravel()
+        cand = np.nonzero(candidates)[0]
+        order = cand[np.argsort(-row[cand], kind="stable")]
+        return [(int(j), float(row[j])) for j in order[:top_n]]
+
+    def recommend(self, pg_name, top_n=3, rating_margin=0.45):
+        with self.lock:
+            idx = self.row_by_name.get(pg_name)
+            if idx is None:
+                print(f"PG named '{pg_name}' not found.")
+                return []
+
+            target_rating = self.ratings[idx]
+            if np.isnan(target_rating):
+                print(f"No rating available for '{pg_name}'")
+                return []
+
+            ratings = self.ratings
+            with np.errstate(invalid="ignore"):
+                mask = (
+                    (self.colleges == self.colleges[idx]) &
+                    ~np.isnan(ratings) &
+                    (np.abs(ratings - target_rating) <= rating_margin)
+                )
+            mask[idx] = False
+
+            similar = self.similar_rows(idx, mask, top_n)
+            return [self.df.at[j, "name"] for j, _ in similar]
+
+
+engine = RecommenderEngine()
+_fit_lock = threading.Lock()
+
+
+def get_engine():
+    if not engine.fitted:
+        with _fit_lock:
+            if not engine.fitted:
+                engine.fit(fetch_data())
+    return engine
+
+
+def recommend_pg(pg_name, top_n=3, rating_margin=0.45):
+    return get_engine().recommend(pg_name, top_n, rating_margin)
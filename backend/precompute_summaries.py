@@ -0,0 +1,171 @@
+# Summarize every PG's reviews ahead of time into the pg_summaries table
+# (sql/pg_summaries.sql), which GET /pg/<pg_id>/summary in api.py serves directly.
+#
+#   cd backend && python precompute_summaries.py --pgs-per-batch 32 --max-batch 32
+#
+# Only PGs whose review text (or the summarizer model) changed since their stored
+# summary are summarized. Progress is checkpointed after every batch of PGs, so a
+# rerun after a crash or Ctrl-C carries on from the last saved PG.
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+CHECKPOINT_PATH = os.getenv("PRECOMPUTE_CHECKPOINT", "precompute_summaries.checkpoint.json")
+DELETE_BATCH = 200
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pgs-per-batch", type=int, default=32,
+                        help="PGs summarized together; their chunks share forward passes")
+    parser.add_argument("--max-batch", type=int, default=32, help="chunks per forward pass")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    return parser.parse_args()
+
+
+def delete_summaries(db, pg_ids):
+    pg_ids = sorted(pg_ids)
+    for start in range(0, len(pg_ids), DELETE_BATCH):
+        ids = ",".join(str(pg_id) for pg_id in pg_ids[start:start + DELETE_BATCH])
+        db.delete(f"pg_summaries?pg_id=in.({ids})").raise_for_status()
+
+
+def load_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path, state):
+    # Write-then-rename so a crash never leaves half a checkpoint behind
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def summarize_pgs(summarizer, texts):
+    """(final summary per review text, first-level chunk count). Chunks of every text,
+    then each reduce level across all texts, go to the model together so forward passes stay full."""
+    chunked = [summarizer.pack_chunks(text) or [(text, [])] for text in texts]
+    flat = [c for chunks in chunked for c in chunks]
+    results = iter(summarizer.summarize_chunks(flat))
+    partials = [[next(results) for _ in chunks] for chunks in chunked]
+    while True:
+        pending = [i for i, p in enumerate(partials) if len(p) > 1]
+        if not pending:
+            return [p[0] for p in partials], len(flat)
+        windows = [summarizer.reduce_windows(partials[i]) for i in pending]
+        results = iter(summarizer.summarize_chunks([w for ws in windows for w in ws]))
+        for i, ws in zip(pending, windows):
+            partials[i] = [next(results) for _ in ws]
+
+
+def main():
+    args = parse_args()
+    # Read by app at import: one caller, so no micro-batcher wait, and wider forward passes
+    os.environ["SUMMARIZER_BATCH_WAIT_MS"] = "0"
+    os.environ["SUMMARIZER_MAX_BATCH"] = str(args.max_batch)
+    import app as summarizer
+    from pagination import Keyset, iter_rows
+    from pg_recommender import iter_reviews_by_pg
+    from summary_cache import summary_key
+    from supabase_client import db
+
+    state = None if args.restart else load_checkpoint(args.checkpoint)
+    resumed = state is not None
+    if resumed:
+        print(f"Resuming after PG {state['after_pg']} ({state['pgs']} PGs done)")
+    else:
+        state = {"after_pg": None, "pgs": 0, "reviews": 0, "summarized": 0, "unchanged": 0,
+                 "removed": 0, "chunks": 0, "model_seconds": 0.0, "seconds": 0.0}
+
+    summarizer.model_loaded.wait()
+    if summarizer.model_error:
+        sys.exit(f"Summarizer failed to load: {summarizer.model_error}")
+
+    stored = {row["pg_id"]: row["review_hash"]
+              for row in iter_rows("pg_summaries?select=pg_id,review_hash", Keyset(("pg_id", "asc")))}
+    print(f"{len(stored)} stored summaries")
+
+    seen = set()
+    pending = []
+    emptied = []  # PGs with a stored summary whose reviews no longer have any text
+    run_start = time.perf_counter()
+    seconds_before = state["seconds"]
+
+    def flush(last_pg):
+        if pending:
+            start = time.perf_counter()
+            summaries, chunks = summarize_pgs(summarizer, [text for _, text, _, _ in pending])
+            state["model_seconds"] += time.perf_counter() - start
+            state["chunks"] += chunks
+            now = datetime.now(timezone.utc).isoformat()
+            rows = [{"pg_id": pg_id, "summary": summary, "review_hash": key, "review_count": count,
+                     "model": summarizer.model_id, "updated_at": now}
+                    for (pg_id, _, key, count), summary in zip(pending, summaries)]
+            resp = db.post("pg_summaries?on_conflict=pg_id", json=rows,
+                           headers={"Prefer": "resolution=merge-duplicates,return=minimal"})
+            resp.raise_for_status()
+            state["summarized"] += len(rows)
+            pending.clear()
+        if emptied:
+            delete_summaries(db, emptied)
+            state["removed"] = state.get("removed", 0) + len(emptied)
+            emptied.clear()
+
+        # Everything up to last_pg is now stored or unchanged
+        state["after_pg"] = last_pg
+        state["seconds"] = seconds_before + time.perf_counter() - run_start
+        save_checkpoint(args.checkpoint, state)
+        elapsed = state["seconds"] or 1e-9
+        print(f"{state['pgs']} PGs ({state['summarized']} summarized, {state['unchanged']} unchanged), "
+              f"{state['reviews']} reviews | {state['pgs'] / elapsed:.1f} PGs/s, "
+              f"{state['chunks'] / max(state['model_seconds'], 1e-9):.1f} chunks/s in the model | "
+              f"{elapsed:.0f}s elapsed")
+
+    last_pg = state["after_pg"]
+    for pg_id, rows in iter_reviews_by_pg(after_pg=state["after_pg"]):
+        if pg_id is None:
+            continue
+        seen.add(pg_id)
+        state["pgs"] += 1
+        state["reviews"] += len(rows)
+        last_pg = pg_id
+        comments = summarizer.review_comments(rows)
+        if not comments:
+            # Nothing to summarize, so a stored summary would be served stale forever
+            if pg_id in stored:
+                emptied.append(pg_id)
+            continue
+        text = " ".join(comments)
+        key = summary_key(summarizer.model_id, text)
+        if stored.get(pg_id) == key:
+            state["unchanged"] += 1
+            continue
+        pending.append((pg_id, text, key, len(comments)))
+        if len(pending) >= args.pgs_per_batch:
+            flush(last_pg)
+    flush(last_pg)
+
+    # PGs that lost all their reviews; only known after a full pass from the start
+    if not resumed:
+        gone = set(stored) - seen
+        delete_summaries(db, gone)
+        if gone:
+            print(f"Removed {len(gone)} summaries of PGs with no reviews left")
+
+    os.remove(args.checkpoint)
+    print(f"Done: {state['summarized']} summarized, {state['unchanged']} unchanged, "
+          f"{state.get('removed', 0)} removed for having no review text "
+          f"out of {state['pgs']} PGs in {state['seconds']:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import heapq
+import os
+import threading
+from bisect import bisect_left, bisect_right, insort
+from operator import itemgetter
+
+from cache import cache
+from supabase_client import db
+from index_refresh import RefreshingIndex
+
+RECOMMEND_INDEX_TTL = float(os.getenv("RECOMMEND_INDEX_TTL", "900"))
+RATING_WINDOW = 0.5
+RESULT_FIELDS = ("name", "tags", "image", "location", "avg_rating")
+INDEX_COLUMNS = "id,name,college_id,college_city,gender_type,avg_rating,tags,image,location"
+
+_rating = itemgetter(0)
+
+
+class Entry:
+    __slots__ = ("id", "row", "rating", "bits", "partitions", "payload")
+
+
+class RecommendIndex:
+    """PGs partitioned by scope (college, else city) and gender, sorted by avg_rating.
+
+    Tags are interned to bit positions so overlap is a single AND + popcount.
+    Each PG sits in the partitions for its own gender and for "any gender",
+    mirroring the optional gender_type filter /recommend applies.
+    """
+
+    def __init__(self):
+        self.entries = {}  # id -> Entry
+        self.by_name = {}  # name -> id
+        self.tag_bits = {}  # tag -> bit position
+        self.partitions = {}  # (scope, value, gender) -> sorted [(avg_rating, id)]
+        self.lock = threading.Lock()
+
+    def _bits(self, tags):
+        bits = 0
+        for tag in tags or ():
+            bit = self.tag_bits.setdefault(tag, len(self.tag_bits))
+            bits |= 1 << bit
+        return bits
+
+    @staticmethod
+    def _scope(row):
+        if row.get("college_id"):
+            return ("college", row["college_id"])
+        if row.get("college_city"):
+            return ("city", row["college_city"])
+        return ("all", None)
+
+    def upsert(self, row):
+        with self.lock:
+            self._remove(row["id"])
+            entry = Entry()
+            entry.id = row["id"]
+            entry.row = row
+            entry.rating = row.get("avg_rating")
+            entry.bits = self._bits(row.get("tags"))
+            entry.payload = {field: row.get(field) for field in RESULT_FIELDS}
+            entry.partitions = []
+            if entry.rating is not None:
+                # A PG is a candidate both under its college and, for targets
+                # without a college, under its city (or everywhere)
+                gender = row.get("gender_type")
+                scopes = {self._scope(row), ("all", None)}
+                if row.get("college_city"):
+                    scopes.add(("city", row["college_city"]))
+                entry.partitions = [(*scope, g) for scope in scopes for g in {gender, None}]
+                for key in entry.partitions:
+                    insort(self.partitions.setdefault(key, []), (entry.rating, entry.id))
+            self.entries[entry.id] = entry
+            self.by_name[row.get("name")] = entry.id
+
+    def remove(self, pg_id):
+        with self.lock:
+            self._remove(pg_id)
+
+    def _remove(self, pg_id):
+        entry = self.entries.pop(pg_id, None)
+        if entry is None:
+            return
+        for key in entry.partitions:
+            part = self.partitions[key]
+            part.remove((entry.rating, entry.id))
+            if not part:
+                del self.partitions[key]
+        name = entry.payload.get("name")
+        if self.by_name.get(name) == pg_id:
+            del self.by_name[name]
+
+    def recommend(self, name, limit=6):
+        """Same filter as the upstream query: scope, gender, avg_rating within +-0.5.
+
+        Returns None when the PG isn't indexed so the caller can fall back.
+        """
+        with self.lock:
+            pg_id = self.by_name.get(name)
+            if pg_id is None:
+                return None
+            target = self.entries[pg_id]
+            rating = target.rating or 0
+            gender = target.row.get("gender_type") or None
+            part = self.partitions.get((*self._scope(target.row), gender), [])
+            lo = bisect_left(part, rating - RATING_WINDOW, key=_rating)
+            hi = bisect_right(part, rating + RATING_WINDOW, key=_rating)
+
+            # Most shared tags first, then higher rated
+            best = heapq.nsmallest(
+                limit,
+                ((-(target.bits & self.entries[other].bits).bit_count(), -r, other)
+                 for r, other in part[lo:hi] if other != pg_id),
+            )
+            return [self.entries[other].payload for _, _, other in best]
+
+
+class RecommendService(RefreshingIndex):
+    name = "recommend index"
+
+    def load(self):
+        resp = db.get(f"pg_whole_info?select={INDEX_COLUMNS}")
+        if not resp.ok:
+            print("Recommend index build failed:", resp.text)
+            return None
+        index = RecommendIndex()
+        for row in resp.json():
+            index.upsert(row)
+        return index
+
+    def apply(self, index, change):
+        pg_id, row = change
+        if row is None:
+            index.remove(pg_id)
+        else:
+            index.upsert(row)
+
+    def recommend(self, pg_name, limit=6):
+        return self.current().recommend(pg_name, limit)
+
+    def refresh_pg(self, pg_id):
+        # avg_rating moves with every review write; re-read just this PG
+        resp = db.get(f"pg_whole_info?id=eq.{pg_id}&select={INDEX_COLUMNS}")
+        if resp.ok:
+            rows = resp.json()
+            self.update((pg_id, rows[0] if rows else None))
+
+    def refresh_in_background(self, pg_id):
+        if self.ready:
+            db.executor.submit(self.refresh_pg, pg_id)
+
+
+recommend_service = RecommendService(RECOMMEND_INDEX_TTL, shared=cache)
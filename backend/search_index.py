@@ -0,0 +1,165 @@
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+from cache import cache
+from supabase_client import db
+from index_refresh import RefreshingIndex
+
+SEARCH_INDEX_TTL = float(os.getenv("SEARCH_INDEX_TTL", "900"))  # full rebuild interval, seconds
+MIN_TRIGRAM_COVERAGE = 0.4  # share of query trigrams a doc must contain to be a candidate
+MIN_CANDIDATES = 200  # docs with the most shared trigrams that get fully scored
+
+# (field, weight) per entity; what /search returns is exactly these fields
+COLLEGE_FIELDS = [("name", 1.0), ("short_name", 1.0), ("city", 0.8)]
+PG_FIELDS = [("name", 1.0), ("college_short_name", 0.9), ("college_name", 0.85),
+             ("location", 0.7), ("college_city", 0.7)]
+
+_non_word = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode()
+    return _non_word.sub(" ", text.lower()).strip()
+
+
+def trigrams(text, prefix=False):
+    # Words are padded "  word " so short prefixes still produce grams. With prefix=True
+    # the last word isn't closed off, so "hostel" matches while the user is still at "hos".
+    words = text.split()
+    grams = set()
+    for i, word in enumerate(words):
+        padded = f"  {word}" if prefix and i == len(words) - 1 else f"  {word} "
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+class Field:
+    __slots__ = ("text", "words", "grams", "weight")
+
+    def __init__(self, text, weight):
+        self.text = normalize(text)
+        self.words = self.text.split()
+        self.grams = trigrams(self.text)
+        self.weight = weight
+
+    def score(self, query, query_grams):
+        if not self.text:
+            return 0.0
+        if self.text == query:
+            return 1.0
+        if self.text.startswith(query):
+            return 0.9
+        if any(word.startswith(query) for word in self.words):
+            return 0.8
+        if query in self.text:
+            return 0.65
+        # Typo-tolerant fallback: how much of the query's trigrams this field contains
+        return 0.6 * len(query_grams & self.grams) / len(query_grams)
+
+
+class SearchIndex:
+    """Trigram inverted index over colleges and PGs for /search."""
+
+    def __init__(self):
+        self.docs = {}  # (kind, id) -> (payload, [Field])
+        self.postings = {"college": {}, "pg": {}}  # kind -> trigram -> set of ids
+        self.lock = threading.RLock()
+
+    def add(self, kind, doc_id, payload, fields):
+        key = (kind, doc_id)
+        with self.lock:
+            self.remove(kind, doc_id)
+            indexed = [Field(payload.get(name), weight) for name, weight in fields]
+            self.docs[key] = (payload, indexed)
+            postings = self.postings[kind]
+            for field in indexed:
+                for gram in field.grams:
+                    postings.setdefault(gram, set()).add(doc_id)
+
+    def remove(self, kind, doc_id):
+        key = (kind, doc_id)
+        with self.lock:
+            entry = self.docs.pop(key, None)
+            if entry is None:
+                return
+            postings = self.postings[kind]
+            for field in entry[1]:
+                for gram in field.grams:
+                    ids = postings.get(gram)
+                    if ids is not None:
+                        ids.discard(doc_id)
+                        if not ids:
+                            del postings[gram]
+
+    def add_college(self, college):
+        payload = {name: college.get(name) for name, _ in COLLEGE_FIELDS}
+        self.add("college", college.get("id"), payload, COLLEGE_FIELDS)
+
+    def add_pg(self, pg):
+        payload = {name: pg.get(name) for name, _ in PG_FIELDS}
+        self.add("pg", pg.get("id"), payload, PG_FIELDS)
+
+    def search(self, query, kind, limit=20):
+        query = normalize(query)
+        if not query:
+            return []
+        query_grams = trigrams(query, prefix=True)
+        needed = max(1, int(len(query_grams) * MIN_TRIGRAM_COVERAGE))
+
+        with self.lock:
+            postings = self.postings[kind]
+            counts = Counter()
+            for gram in query_grams:
+                counts.update(postings.get(gram, ()))
+
+            ranked = []
+            for doc_id, shared in counts.most_common(max(limit * 10, MIN_CANDIDATES)):
+                if shared < needed:
+                    break
+                payload, fields = self.docs[(kind, doc_id)]
+                score = max(f.weight * f.score(query, query_grams) for f in fields)
+                # Shorter names win ties: "IIT" before "IIT Delhi Boys Hostel" for "iit"
+                ranked.append((-score, len(fields[0].text), payload))
+
+        ranked.sort(key=lambda r: (r[0], r[1]))
+        return [payload for _, _, payload in ranked[:limit]]
+
+
+class SearchService(RefreshingIndex):
+    """Owns the live index: builds it off the request path and swaps in fresh copies."""
+
+    name = "search index"
+
+    def load(self):
+        college_resp, pg_resp = db.get_many(
+            "colleges?select=id,name,city,short_name",
+            "pg_whole_info?select=id,name,location,college_city,college_name,college_short_name",
+        )
+        if not college_resp.ok or not pg_resp.ok:
+            print("Search index build failed:", college_resp.text, pg_resp.text)
+            return None
+        index = SearchIndex()
+        for college in college_resp.json():
+            index.add_college(college)
+        for pg in pg_resp.json():
+            index.add_pg(pg)
+        return index
+
+    def apply(self, index, pg):
+        index.add_pg(pg)
+
+    def search(self, query, limit):
+        index = self.current()
+        return {
+            "colleges": index.search(query, "college", limit),
+            "pgs": index.search(query, "pg", limit),
+        }
+
+    def add_pg(self, pg):
+        self.update(pg)
+
+
+search_service = SearchService(SEARCH_INDEX_TTL, shared=cache)
@@ -0,0 +1,33 @@
+# Async serving mode for api.py: the same Flask app and routes on gevent.
+#
+# Handlers spend nearly all their time waiting on Supabase. Under gevent the
+# blocking socket calls in requests yield to the event loop, so one worker
+# multiplexes thousands of in-flight requests instead of one per thread.
+#
+#   gunicorn -k gevent -w 2 --worker-connections 1000 serve_async:app
+#   python serve_async.py        # single process, PORT (default 5000)
+#
+# CPU-bound work still blocks the loop while it runs: the search and recommend
+# index builds (every catalog row parsed and indexed on each rebuild), and JSON
+# encoding plus ETag hashing of large list responses. Keep rebuilds infrequent
+# and page big lists in this mode.
+#
+# The sqlite catalog cache and image cleanup queue notice the patched threading
+# module (sqlite_store.py): each keeps one connection per process and runs its
+# calls on a native thread, so a locked database stalls only the waiting request.
+from gevent import monkey
+
+monkey.patch_all()
+
+import os
+
+# Greenlets are cheap, so let far more requests share the upstream pool at once
+os.environ.setdefault("SUPABASE_POOL_SIZE", "200")
+
+from gevent.pywsgi import WSGIServer
+
+from api import app
+
+if __name__ == "__main__":
+    port = int(os.getenv("PORT", "5000"))
+    WSGIServer(("0.0.0.0", port), app, log=None).serve_forever()
@@ -0,0 +1,21 @@
+-- Backs the batch endpoints in api.py. Run once in the Supabase SQL editor.
+
+-- /review/helpful/batch: toggle a user's helpful vote on many reviews in one call.
+-- Each id goes through the existing toggle_helpful_vote, so the vote rules live in one place.
+-- p_review_ids must match the type of reviews.id.
+create or replace function toggle_helpful_votes(p_review_ids uuid[], p_user_email text)
+returns table (review_id uuid, helpful_count integer)
+language sql
+as $$
+  select r.id, toggle_helpful_vote(r.id, p_user_email)
+  from reviews r
+  where r.id = any(p_review_ids);
+$$;
+
+-- /wishlist/add/batch: lets the bulk insert skip PGs that are already wishlisted
+do $$
+begin
+  if not exists (select 1 from pg_constraint where conname = 'wishlist_user_email_pg_id_key') then
+    alter table wishlist add constraint wishlist_user_email_pg_id_key unique (user_email, pg_id);
+  end if;
+end $$;
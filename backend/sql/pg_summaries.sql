@@ -0,0 +1,11 @@
+-- Written by precompute_summaries.py, served by GET /pg/<pg_id>/summary in api.py.
+-- Run once in the Supabase SQL editor. pg_id must match the type of pgs.id.
+create table if not exists pg_summaries (
+  pg_id uuid primary key references pgs(id) on delete cascade,
+  summary text not null,
+  -- sha256 of the summarized review text; the batch job skips PGs whose hash is unchanged
+  review_hash text not null,
+  review_count integer not null,
+  model text not null,
+  updated_at timestamptz not null default now()
+);
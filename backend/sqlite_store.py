@@ -0,0 +1,48 @@
+import sqlite3
+import sys
+import threading
+import types
+
+
+def gevent_patched():
+    # Only serve_async.py imports gevent; checking sys.modules keeps it optional here
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("threading")
+
+
+class SqliteFile:
+    """Connections to one sqlite file in WAL mode, shared by every worker process on the host.
+
+    Threaded servers get a connection per thread. Under gevent, threading.local is per
+    greenlet and a blocking sqlite call (up to the 5s busy wait on a locked file) stalls
+    every request in the worker, so there all calls run on one native thread that holds
+    the process's only connection.
+    """
+
+    def __init__(self, path, timeout=5):
+        self.path = path
+        self.timeout = timeout
+        if gevent_patched():
+            from gevent.threadpool import ThreadPool
+
+            self.pool = ThreadPool(1)
+            self.local = types.SimpleNamespace()  # only the pool's thread touches it
+        else:
+            self.pool = None
+            self.local = threading.local()
+
+    def conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def run(self, fn, *args):
+        """fn(conn, *args) on this thread's connection, or on the pool's thread under gevent."""
+        if self.pool is None:
+            return fn(self.conn(), *args)
+        return self.pool.apply(lambda: fn(self.conn(), *args))
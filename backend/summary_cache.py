@@ -0,0 +1,23 @@
+import hashlib
+import json
+import os
+
+from cache import Cache, SqliteBackend
+
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", "summary_cache.sqlite3")
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "50000"))
+# Entries are content-addressed and never go stale; the TTL only bounds disk use for dead keys
+SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", str(30 * 24 * 3600)))
+
+
+def summary_key(model_name, text):
+    """Key for the summary of `text`: a hash of the model and the exact input.
+
+    Length bounds are derived from the text, so they don't need to be part of it.
+    """
+    payload = json.dumps([model_name, text], ensure_ascii=False)
+    return "summary:" + hashlib.sha256(payload.encode()).hexdigest()
+
+
+# On disk and LRU-evicted; shared by every worker on the host
+summary_cache = Cache(SqliteBackend(SUMMARY_CACHE_PATH, SUMMARY_CACHE_MAX_ENTRIES), ttl=SUMMARY_CACHE_TTL)
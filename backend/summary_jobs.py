@@ -0,0 +1,170 @@
+import hashlib
+import math
+import queue
+import threading
+import time
+
+STORE_POLL = 0.5  # seconds between store reads while long-polling a job another process runs
+
+
+class QueueFull(Exception):
+    """No room for another job; `retry_after` is a guess in seconds at when there will be."""
+
+    def __init__(self, retry_after):
+        super().__init__("Summary queue is full")
+        self.retry_after = retry_after
+
+
+def job_id_for(key):
+    # Derived from the content key, so every process maps the same review set to the same id
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+class Job:
+    def __init__(self, key):
+        self.id = job_id_for(key)
+        self.key = key
+        self.status = "queued"  # queued | running | done | failed
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        data = {"job_id": self.id, "status": self.status}
+        if self.status == "done":
+            data["summary"] = self.result
+        elif self.status == "failed":
+            data["error"] = self.error
+        return data
+
+    def record(self):
+        return {"key": self.key, "status": self.status, "result": self.result, "error": self.error}
+
+    @classmethod
+    def from_record(cls, record):
+        job = cls(record["key"])
+        job.status, job.result, job.error = record["status"], record.get("result"), record.get("error")
+        if job.status in ("done", "failed"):
+            job.done.set()
+        return job
+
+
+class JobQueue:
+    """Bounded queue of jobs run by `workers` threads calling ``run(payload)``.
+
+    A job's id is a hash of its key. Submitting a key that is already queued,
+    running or done returns that job instead of a new one. Finished jobs stay
+    readable for `keep` seconds. With a `store` (a Cache shared by every worker
+    process on the host) each status change is written there too, so a poll
+    can land on any process, and a submit can reuse the job of another process.
+    Two processes taking the same new key at the same instant may both run it.
+    """
+
+    def __init__(self, run, workers=1, max_queued=32, keep=600, store=None, name="summary-jobs"):
+        self.run = run
+        self.workers = workers
+        self.keep = keep
+        self.store = store
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.jobs = {}
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.avg_seconds = None
+        for i in range(workers):
+            threading.Thread(target=self._loop, name=f"{name}-{i}", daemon=True).start()
+
+    def submit(self, key, payload):
+        """(job, created); raises QueueFull when the queue has no room."""
+        with self.lock:
+            self._expire()
+            job = self.in_flight.get(key)
+            if job is not None:
+                return job, False
+            # Queued or running in another process, or finished recently; a failure is retried
+            shared = self._load(job_id_for(key))
+            if shared is not None and shared.status != "failed":
+                return shared, False
+            job = Job(key)
+            try:
+                self.queue.put_nowait((job, payload))
+            except queue.Full:
+                raise QueueFull(self.retry_after())
+            self.jobs[job.id] = job
+            self.in_flight[key] = job
+        self._save(job)
+        return job, True
+
+    def get(self, job_id, wait=0):
+        """The job, after waiting up to `wait` seconds for it to finish; None if unknown or expired."""
+        with self.lock:
+            self._expire()
+            job = self.jobs.get(job_id)
+        if job is not None:
+            if wait > 0:
+                job.done.wait(wait)
+            return job
+        # Submitted to another process: follow it through the store
+        deadline = time.monotonic() + wait
+        job = self._load(job_id)
+        while job is not None and not job.done.is_set() and time.monotonic() < deadline:
+            time.sleep(min(STORE_POLL, deadline - time.monotonic()))
+            job = self._load(job_id)
+        return job
+
+    def retry_after(self):
+        # Time for the queue ahead to drain, from the average job so far
+        per_job = self.avg_seconds or 5
+        return max(1, min(300, math.ceil(per_job * (self.queue.qsize() + 1) / self.workers)))
+
+    def stats(self):
+        with self.lock:
+            return {"queued": self.queue.qsize(), "max_queued": self.queue.maxsize,
+                    "in_flight": len(self.in_flight), "jobs": len(self.jobs),
+                    "avg_seconds": self.avg_seconds and round(self.avg_seconds, 3)}
+
+    def _expire(self):
+        cutoff = time.time() - self.keep
+        for job_id in [j.id for j in self.jobs.values() if j.finished and j.finished < cutoff]:
+            del self.jobs[job_id]
+
+    def _load(self, job_id):
+        if self.store is None:
+            return None
+        try:
+            record = self.store.get("job:" + job_id)
+        except Exception as e:
+            print(f"Summary job store read failed: {e}")
+            return None
+        return Job.from_record(record) if record else None
+
+    def _save(self, job):
+        # In-progress records expire too, so a job whose process died is retried after `keep`
+        if self.store is not None:
+            try:
+                self.store.set("job:" + job.id, job.record(), ttl=self.keep)
+            except Exception as e:
+                print(f"Summary job store write failed: {e}")
+
+    def _loop(self):
+        while True:
+            job, payload = self.queue.get()
+            job.status = "running"
+            self._save(job)
+            start = time.perf_counter()
+            try:
+                job.result = self.run(payload)
+                job.status = "done"
+            except Exception as e:
+                print(f"❌ Summary job {job.id} failed: {e}")
+                job.error = str(e)
+                job.status = "failed"
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.avg_seconds = elapsed if self.avg_seconds is None else 0.8 * self.avg_seconds + 0.2 * elapsed
+                job.finished = time.time()
+                self.in_flight.pop(job.key, None)
+                self._expire()
+            self._save(job)
+            job.done.set()
@@ -0,0 +1,111 @@
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from metrics import upstream_call
+
+load_dotenv()  # Load from .env file
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_API_KEY = os.getenv("SUPABASE_API_KEY")
+
+HEADERS = {
+    "apikey": SUPABASE_API_KEY,
+    "Authorization": f"Bearer {SUPABASE_API_KEY}",
+    "Content-Type": "application/json",
+    "Prefer": "return=representation"
+}
+
+# Pool / timeout / retry knobs, overridable per deployment
+POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("SUPABASE_READ_TIMEOUT", "10"))
+READ_RETRIES = int(os.getenv("SUPABASE_READ_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("SUPABASE_RETRY_BACKOFF", "0.1"))
+
+RETRY_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD"}
+
+
+class SupabaseClient:
+    """Keep-alive PostgREST client shared by every route.
+
+    Paths are relative to ``/rest/v1/``, e.g. ``client.get("colleges?select=*")``,
+    and the plain ``requests.Response`` is returned so callers keep using
+    ``.ok`` / ``.json()`` / ``.status_code`` as before.
+    """
+
+    def __init__(self, base_url, headers, pool_size=POOL_SIZE,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                 retries=READ_RETRIES, backoff=RETRY_BACKOFF):
+        self.base_url = f"{(base_url or '').rstrip('/')}/rest/v1"
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+        self.session = requests.Session()
+        self.session.headers.update({k: v for k, v in headers.items() if v is not None})
+        # pool_block keeps the number of sockets to PostgREST bounded under bursts
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                              pool_block=True, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="supabase")
+
+    def url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method, path, timeout=None, **kwargs):
+        method = method.upper()
+        # Table, view or rpc/<function>; the query string would make a series per filter value
+        with upstream_call("supabase", method, path.split("?", 1)[0].strip("/")) as call:
+            resp = self._send(method, path, timeout, **kwargs)
+            call.status = resp.status_code
+            return resp
+
+    def _send(self, method, path, timeout=None, **kwargs):
+        url = self.url(path)
+        timeout = timeout or self.timeout
+        attempts = 1 + (self.retries if method in IDEMPOTENT_METHODS else 0)
+
+        for attempt in range(attempts):
+            last_try = attempt == attempts - 1
+            try:
+                resp = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if last_try:
+                    raise
+            else:
+                if resp.status_code not in RETRY_STATUSES or last_try:
+                    return resp
+                resp.close()
+            self._sleep(attempt)
+
+    def _sleep(self, attempt):
+        # Full jitter: spread retries so a PostgREST hiccup doesn't get a synchronized stampede
+        time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def patch(self, path, **kwargs):
+        return self.request("PATCH", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def get_many(self, *paths, **kwargs):
+        # Independent reads in parallel over the shared pool; latency is the slowest, not the sum
+        futures = [self.executor.submit(self.get, path, **kwargs) for path in paths]
+        return [f.result() for f in futures]
+
+
+db = SupabaseClient(SUPABASE_URL, HEADERS)
@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Module-level caches and queues open their files at import; keep them out of the tree
+STATE_DIR = tempfile.mkdtemp(prefix="chaiaurchhat-tests-")
+os.environ.update({
+    "CACHE_BACKEND": "memory",
+    "CACHE_PATH": os.path.join(STATE_DIR, "catalog_cache.sqlite3"),
+    "IMAGE_CLEANUP_PATH": os.path.join(STATE_DIR, "image_cleanup.sqlite3"),
+    "SUMMARY_CACHE_PATH": os.path.join(STATE_DIR, "summary_cache.sqlite3"),
+    "IMAGE_RECONCILE_INTERVAL": "0",
+})
+
+ORIGIN = "https://chaiaurchhat.vercel.app"
+
+
+@pytest.fixture(scope="session")
+def catalog():
+    from benchmarks.fake_supabase import seed_catalog
+
+    return seed_catalog(scale=0.05)
+
+
+@pytest.fixture(scope="session")
+def upstream(catalog):
+    """The fake Supabase api.py talks to; tests that write pick rows no other test reads."""
+    from benchmarks.fake_supabase import FakeSupabase
+    from benchmarks.imagekit_stub import ImageKitStub
+
+    supabase = FakeSupabase(catalog).start()
+    imagekit = ImageKitStub().start()
+    # Both clients read their URLs when api.py is imported
+    os.environ.update({"SUPABASE_URL": supabase.url, "SUPABASE_API_KEY": "test",
+                       "IMAGEKIT_API_URL": imagekit.url})
+    yield supabase
+    supabase.stop()
+    imagekit.stop()
+
+
+@pytest.fixture(scope="session")
+def api(upstream):
+    import api
+
+    return api
+
+
+@pytest.fixture
+def client(api):
+    api.cache.clear()
+    return api.app.test_client()
+
+
+@pytest.fixture(scope="session")
+def summarizer():
+    """backend/app.py; its model never loads here, so tests stub the pieces they drive."""
+    import app
+
+    app.model_loaded.wait(60)
+    return app
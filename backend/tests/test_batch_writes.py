@@ -0,0 +1,66 @@
+import pytest
+
+# api.py reads the fake Supabase URL at import, so tests reach it through the `api` fixture
+
+
+def test_batch_ids_splits_invalid_and_canonicalizes(api):
+    upper = "6F9619FF-8B86-D011-B42D-00C04FC964FF"
+    valid, invalid = api.batch_ids({"ids": [upper, "nope", upper.lower(), 7, "nope"]}, "ids")
+    assert valid == [upper.lower()]
+    assert invalid == ["nope", 7]
+
+
+@pytest.mark.parametrize("data", [None, [], ["a"], "ids", {"ids": []}, {"ids": "a"},
+                                  {"ids": [{"id": 1}]}])
+def test_batch_ids_rejects_malformed_bodies(api, data):
+    assert api.batch_ids(data, "ids") is None
+
+
+def test_batch_ids_caps_batch_size(api):
+    ids = [f"00000000-0000-4000-8000-{i:012d}" for i in range(api.MAX_BATCH + 1)]
+    assert api.batch_ids({"ids": ids[:-1]}, "ids") is not None
+    assert api.batch_ids({"ids": ids}, "ids") is None
+
+
+def test_review_delete_reports_each_item(client, catalog):
+    review = catalog["reviews"][0]
+    missing = "00000000-0000-4000-8000-000000000000"
+    resp = client.delete("/reviews/batch", json={"review_ids": [review["id"], missing, "bad"]})
+    assert resp.status_code == 207
+    body = resp.get_json()
+    assert body["deleted"] == [review["id"]]
+    assert {(item["review_id"], item["status"]) for item in body["failed"]} == {(missing, 404), ("bad", 400)}
+
+
+def test_only_invalid_ids_is_a_400(client):
+    resp = client.delete("/reviews/batch", json={"review_ids": ["bad"]})
+    assert resp.status_code == 400
+    assert resp.get_json()["failed"] == [{"review_id": "bad", "status": 400, "error": "Invalid id"}]
+
+
+@pytest.mark.parametrize("method,path", [("post", "/review/helpful/batch"), ("delete", "/reviews/batch"),
+                                         ("post", "/wishlist/add/batch"), ("delete", "/wishlist/remove/batch")])
+@pytest.mark.parametrize("body", [["a"], "a", 3])
+def test_non_object_bodies_are_a_400(client, method, path, body):
+    assert getattr(client, method)(path, json=body).status_code == 400
+
+
+def test_wishlist_add_reports_present_and_invalid(client, catalog):
+    pg_a, pg_b = catalog["pgs"][0]["id"], catalog["pgs"][1]["id"]
+    email = "batch-tests@example.com"
+    first = client.post("/wishlist/add/batch", json={"email": email, "pg_ids": [pg_a]})
+    assert first.status_code == 200 and first.get_json()["added"] == [pg_a]
+
+    resp = client.post("/wishlist/add/batch", json={"email": email, "pg_ids": [pg_a, pg_b, "bad"]})
+    assert resp.status_code == 207
+    body = resp.get_json()
+    assert body["added"] == [pg_b]
+    assert body["present"] == [pg_a]
+    assert body["failed"] == [{"pg_id": "bad", "status": 400, "error": "Invalid id"}]
+
+
+def test_helpful_batch_toggles_each_review(client, catalog):
+    review_ids = [catalog["reviews"][1]["id"], catalog["reviews"][2]["id"]]
+    resp = client.post("/review/helpful/batch", json={"user_email": "voter@example.com", "review_ids": review_ids})
+    assert resp.status_code == 200
+    assert [item["review_id"] for item in resp.get_json()["toggled"]] == review_ids
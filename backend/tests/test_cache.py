@@ -0,0 +1,101 @@
+import sqlite3
+from urllib.parse import quote
+
+import pytest
+
+from cache import Cache, MemoryBackend, RedisBackend, SqliteBackend
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        yield Cache(MemoryBackend())
+        return
+    if request.param == "sqlite":
+        yield Cache(SqliteBackend(str(tmp_path / "cache.sqlite3"), size_check_every=1))
+        return
+    pytest.importorskip("redis")
+    backend = RedisBackend(prefix=f"chaiaurchhat-test-{tmp_path.name}:")
+    try:
+        backend.client.ping()
+    except Exception:
+        pytest.skip("no redis server at CACHE_URL")
+    yield Cache(backend)
+    backend.clear()
+
+
+def test_tag_invalidation_drops_only_tagged_keys(cache):
+    cache.set("pg:a", {"name": "A"}, tags=["pg:1", "review:10"])
+    cache.set("pg:b", {"name": "B"}, tags=["pg:2"])
+    cache.set("colleges", [1, 2], tags=["colleges"])
+
+    cache.invalidate_tags("review:10", "colleges")
+
+    assert cache.get("pg:a") is None
+    assert cache.get("colleges") is None
+    assert cache.get("pg:b") == {"name": "B"}
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_set_replaces_a_keys_tags(cache):
+    cache.set("k", 1, tags=["old"])
+    cache.set("k", 2, tags=["new"])
+    cache.invalidate_tags("old")
+    assert cache.get("k") == 2
+    cache.invalidate_tags("new")
+    assert cache.get("k") is None
+
+
+def test_sqlite_evicts_least_recently_used(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "cache.sqlite3"), max_entries=2, touch_interval=0, size_check_every=1)
+    backend.set("a", 1, 60, ())
+    backend.set("b", 2, 60, ())
+    backend.get("a")
+    backend.set("c", 3, 60, ())
+    assert backend.get("b") is None
+    assert backend.get("a") == 1 and backend.get("c") == 3
+
+
+class LockedBackend:
+    evictions = expirations = 0
+
+    def __getattr__(self, name):
+        def locked(*args):
+            raise sqlite3.OperationalError("database is locked")
+        return locked
+
+
+def test_backend_errors_are_misses_and_no_ops():
+    cache = Cache(LockedBackend())
+    assert cache.get("k") is None
+    cache.set("k", 1)
+    cache.invalidate_tags("t")
+    cache.invalidate("k")
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["entries"] is None
+    assert stats["errors"] == 5
+
+
+def test_review_write_invalidates_the_cached_pg(client, api, catalog):
+    pg = catalog["pgs"][5]
+    review = next(r for r in catalog["reviews"] if r["pg_id"] == pg["id"])
+    url = f"/pg?name={quote(pg['name'])}"
+
+    assert client.get(url).status_code == 200
+    hits = api.cache.hits
+    assert client.get(url).status_code == 200
+    assert api.cache.hits == hits + 1
+
+    client.post("/review/helpful/batch", json={"user_email": "cache@example.com", "review_ids": [review["id"]]})
+    misses = api.cache.misses
+    body = client.get(url).get_json()
+    assert api.cache.misses == misses + 1
+    assert next(r for r in body["reviewList"] if r["id"] == review["id"])["helpful_count"] == 1
+
+
+def test_cache_stats_survives_a_failing_backend(client, api, monkeypatch):
+    monkeypatch.setattr(api.cache, "backend", LockedBackend())
+    resp = client.get("/cache/stats")
+    assert resp.status_code == 200
+    assert resp.get_json()["entries"] is None
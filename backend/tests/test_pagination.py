@@ -0,0 +1,85 @@
+from collections import Counter
+
+import pytest
+
+
+@pytest.fixture
+def pagination(api):
+    # Imported after api so its Supabase client points at the fake
+    import pagination
+
+    return pagination
+
+
+def expected_order(rows, columns):
+    """rows sorted like PostgREST with .nullslast on every column."""
+    for col, direction in reversed(columns):
+        present = sorted((r for r in rows if r[col] is not None), key=lambda r: r[col],
+                         reverse=direction == "desc")
+        rows = present + [r for r in rows if r[col] is None]
+    return rows
+
+
+def test_cursor_round_trip(pagination):
+    values = ["2024-05-01T10:00:00+05:30", 'a "quoted", (odd) value', None, 3.5]
+    assert pagination.decode_cursor(pagination.encode_cursor(values), 4) == values
+
+
+@pytest.mark.parametrize("token", ["not base64!", "e30", "WzFd", "W1tdLDFd"])
+def test_bad_cursors_are_rejected(pagination, token):
+    # garbage, {}, [1] for a two-column keyset, [[], 1] (a nested value)
+    with pytest.raises(ValueError):
+        pagination.decode_cursor(token, 2)
+
+
+def test_resume_filter_shape(pagination):
+    keyset = pagination.Keyset(("date", "desc"), ("id", "asc"))
+    assert keyset.after(["2024-01-01", "x"]) == (
+        '(or(date.lt."2024-01-01",date.is.null),and(date.eq."2024-01-01",or(id.gt."x",id.is.null)))')
+    # Nothing sorts past a null date except later ids among the nulls
+    assert keyset.after([None, "x"]) == '(and(date.is.null,or(id.gt."x",id.is.null)))'
+
+
+@pytest.mark.parametrize("resource,columns", [
+    # Heavy ties on the first column
+    ("reviews", (("rating_food", "desc"), ("id", "asc"))),
+    # Every avg_rating is null in the base table
+    ("pgs", (("avg_rating", "desc"), ("id", "asc"))),
+    # Values with spaces and a mix of directions
+    ("colleges", (("city", "asc"), ("name", "desc"), ("id", "asc"))),
+])
+def test_iter_rows_visits_every_row_once_in_order(pagination, catalog, resource, columns):
+    keyset = pagination.Keyset(*columns)
+    rows = list(pagination.iter_rows(resource, keyset, page_size=7))
+    assert [r["id"] for r in rows] == [r["id"] for r in expected_order(catalog[resource], columns)]
+
+
+def user_with_reviews(catalog, n):
+    return next(email for email, count in Counter(r["user_email"] for r in catalog["reviews"]).items()
+                if count >= n)
+
+
+def test_paged_route_matches_the_full_list(client, catalog):
+    email = user_with_reviews(catalog, 5)
+    full = client.get(f"/user-reviews?email={email}").get_json()
+
+    seen, after = [], None
+    while True:
+        url = f"/user-reviews?email={email}&limit=2" + (f"&after={after}" if after else "")
+        page = client.get(url).get_json()
+        seen += [r["id"] for r in page["items"]]
+        after = page["next_cursor"]
+        if after is None:
+            break
+    assert sorted(seen) == sorted(r["id"] for r in full)
+    assert len(seen) == len(set(seen))
+
+    streamed = client.get(f"/user-reviews?email={email}&stream=ndjson").get_data(as_text=True).splitlines()
+    assert len(streamed) == len(full)
+
+
+def test_route_rejects_short_cursor_and_limited_stream(client, pagination, catalog):
+    email = user_with_reviews(catalog, 1)
+    short = pagination.encode_cursor(["2024-01-01"])
+    assert client.get(f"/user-reviews?email={email}&after={short}").status_code == 400
+    assert client.get(f"/user-reviews?email={email}&stream=json&limit=5").status_code == 400
@@ -0,0 +1,40 @@
+import threading
+
+from conftest import ORIGIN
+
+
+def ready(monkeypatch, app):
+    event = threading.Event()
+    event.set()
+    monkeypatch.setattr(app, "model_ready", event)
+
+
+def test_stream_preflight_allows_origin(summarizer):
+    resp = summarizer.app.test_client().options("/summarize/stream", headers={
+        "Origin": ORIGIN, "Access-Control-Request-Method": "POST",
+        "Access-Control-Request-Headers": "Content-Type"})
+    assert resp.headers["Access-Control-Allow-Origin"] == ORIGIN
+    assert "POST" in resp.headers["Access-Control-Allow-Methods"]
+
+
+def test_event_stream_carries_cors_headers(summarizer, monkeypatch):
+    ready(monkeypatch, summarizer)
+    monkeypatch.setattr(summarizer, "pack_chunks", lambda text: [(text, [0])])
+
+    def iter_chunk_summaries(chunks):
+        yield 0, "short"
+
+    monkeypatch.setattr(summarizer, "iter_chunk_summaries", iter_chunk_summaries)
+
+    resp = summarizer.app.test_client().post(
+        "/summarize/stream", json={"reviews": [{"comment": "Clean rooms."}]}, headers={"Origin": ORIGIN})
+    assert resp.mimetype == "text/event-stream"
+    assert resp.headers["Access-Control-Allow-Origin"] == ORIGIN
+    assert 'event: summary\ndata: {"summary": "short"}' in resp.get_data(as_text=True)
+
+
+def test_job_routes_expose_retry_after(summarizer):
+    resp = summarizer.app.test_client().get("/summarize/jobs/unknown", headers={"Origin": ORIGIN})
+    assert resp.status_code == 404
+    assert resp.headers["Access-Control-Allow-Origin"] == ORIGIN
+    assert "Retry-After" in resp.headers["Access-Control-Expose-Headers"]
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+from cache import Cache, MemoryBackend
+from summary_jobs import JobQueue, QueueFull
+
+
+class Gate:
+    """A job runner that holds every job until released."""
+
+    def __init__(self, fail=False):
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+        self.fail = fail
+
+    def __call__(self, payload):
+        self.started.release()
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("model fell over")
+        return f"summary of {payload}"
+
+
+def test_same_key_shares_one_job():
+    gate = Gate()
+    jobs = JobQueue(gate, workers=1, max_queued=4)
+    job, created = jobs.submit("k", "text")
+    again, created_again = jobs.submit("k", "text")
+    assert created and not created_again
+    assert again is job
+
+    gate.release.set()
+    assert jobs.get(job.id, wait=5).to_dict() == {"job_id": job.id, "status": "done", "summary": "summary of text"}
+    # Finished jobs are still answered from the same id
+    assert jobs.submit("k", "text")[0].id == job.id
+
+
+def test_full_queue_raises_with_a_retry_hint():
+    gate = Gate()
+    jobs = JobQueue(gate, workers=1, max_queued=1)
+    jobs.submit("running", "a")
+    assert gate.started.acquire(timeout=5)
+    jobs.submit("queued", "b")
+    with pytest.raises(QueueFull) as exc:
+        jobs.submit("rejected", "c")
+    assert 1 <= exc.value.retry_after <= 300
+    gate.release.set()
+
+
+def test_failed_job_is_retried_on_resubmit():
+    gate = Gate(fail=True)
+    gate.release.set()
+    jobs = JobQueue(gate, workers=1)
+    job, _ = jobs.submit("k", "text")
+    assert jobs.get(job.id, wait=5).to_dict()["status"] == "failed"
+    gate.fail = False
+    retry, created = jobs.submit("k", "text")
+    assert created
+    assert jobs.get(retry.id, wait=5).to_dict()["status"] == "done"
+
+
+def test_other_process_sees_the_job_through_the_store():
+    store = Cache(MemoryBackend(max_ttl=60))
+    gate = Gate()
+    here = JobQueue(gate, workers=1, store=store)
+    there = JobQueue(Gate(), workers=1, store=store)
+
+    job, _ = here.submit("k", "text")
+    shared, created = there.submit("k", "text")
+    assert not created and shared.id == job.id
+
+    gate.release.set()
+    assert there.get(job.id, wait=5).to_dict()["summary"] == "summary of text"
+
+
+@pytest.fixture
+def job_routes(summarizer, monkeypatch):
+    ready = threading.Event()
+    ready.set()
+    monkeypatch.setattr(summarizer, "model_ready", ready)
+    gate = Gate()
+    monkeypatch.setattr(summarizer, "jobs", JobQueue(gate, workers=1, max_queued=1))
+    yield summarizer.app.test_client(), gate
+    gate.release.set()
+
+
+def body(comment):
+    return {"reviews": [{"comment": comment}]}
+
+
+def test_submit_dedups_and_answers_429_when_full(job_routes):
+    client, gate = job_routes
+    first = client.post("/summarize/jobs", json=body("Great food."))
+    assert first.status_code == 202
+    assert first.headers["Location"] == f"/summarize/jobs/{first.get_json()['job_id']}"
+    assert gate.started.acquire(timeout=5)
+
+    again = client.post("/summarize/jobs", json=body("Great food."))
+    assert again.status_code == 200
+    assert again.get_json()["job_id"] == first.get_json()["job_id"]
+
+    assert client.post("/summarize/jobs", json=body("Noisy at night.")).status_code == 202
+    full = client.post("/summarize/jobs", json=body("Far from campus."))
+    assert full.status_code == 429
+    assert int(full.headers["Retry-After"]) >= 1
+
+
+@pytest.mark.parametrize("wait", ["nan", "inf", "-inf"])
+def test_poll_rejects_non_finite_wait(job_routes, wait):
+    client, _ = job_routes
+    assert client.get(f"/summarize/jobs/abc?wait={wait}").status_code == 400
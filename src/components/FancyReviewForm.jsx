@@ -129,7 +129,8 @@ const FancyReviewForm = ({ pgName, onClose, step, setStep, pgMetadata, existingR
   const [images, setImages] = useState([]);
   const [imagesToDelete, setImagesToDelete] = useState(() => {
     const stored = localStorage.getItem('pendingImageDeletions');
-    return stored ? JSON.parse(stored) : [];
+    // Entries are { fileId, url }; older sessions stored bare fileIds
+    return stored ? JSON.parse(stored).map(e => (typeof e === 'string' ? { fileId: e } : e)) : [];
   });
   const [imageUploading, setImageUploading] = useState(false);
   const [uploadError, setUploadError] = useState('');
@@ -256,7 +257,7 @@ const FancyReviewForm = ({ pgName, onClose, step, setStep, pgMetadata, existingR
       }
     } else {
       setImagesToDelete(prev => {
-        const updated = [...prev, fileIdToRemove];
+        const updated = [...prev, { fileId: fileIdToRemove, url: imageToRemove.url }];
         localStorage.setItem('pendingImageDeletions', JSON.stringify(updated));
         return updated;
       });
@@ -323,7 +324,11 @@ const FancyReviewForm = ({ pgName, onClose, step, setStep, pgMetadata, existingR
     setLoading(true);
     try {
       if (imagesToDelete.length > 0) {
-        await axios.post('http://localhost:5000/imagekit-batch-delete', { fileIds: imagesToDelete });
+        // With the URLs the backend can purge the CDN without looking each file up first
+        await axios.post('http://localhost:5000/imagekit-batch-delete', {
+          fileIds: imagesToDelete.map(img => img.fileId),
+          urls: Object.fromEntries(imagesToDelete.filter(img => img.url).map(img => [img.fileId, img.url])),
+        });
         localStorage.removeItem('pendingImageDeletions');
         setImagesToDelete([]);
       }